@@ -0,0 +1,116 @@
+"""
+SQLite FTS5 index over book text (title, subtitle, abstract, CommunitySynopsis).
+
+`book_fts` keeps its own copy of the text plus an UNINDEXED book_id, and is
+kept in step with `book` by triggers, so every writer (services, import
+scripts, raw SQL) updates it. Each FTS row shares its rowid with its book
+row, so the triggers find the row to replace by rowid (an index lookup)
+rather than by the unindexed book_id (a scan of the whole index).
+
+`book` has a string primary key, so VACUUM is allowed to renumber its
+rowids. `ensure_book_search()` checks the two tables still line up at
+startup and re-copies the index if they do not; searches join on book_id
+and stay correct in the meantime.
+
+The table is created with `book` (create_all), by the migration for existing
+databases, and by `ensure_book_search()` at startup for databases built with
+create_all before it existed.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+BOOK_FTS_TABLE = "book_fts"
+
+_COLUMNS = "title, subtitle, abstract, CommunitySynopsis"
+
+BOOK_FTS_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {BOOK_FTS_TABLE} USING fts5(
+        book_id UNINDEXED, {_COLUMNS},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {BOOK_FTS_TABLE} (rowid, book_id, {_COLUMNS})
+        VALUES (new.rowid, new.book_id, new.title, new.subtitle, new.abstract, new.CommunitySynopsis);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        DELETE FROM {BOOK_FTS_TABLE} WHERE rowid = old.rowid;
+    END
+    """,
+    # Only text edits touch the index; profile and stats writes leave it alone
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF book_id, {_COLUMNS} ON book BEGIN
+        DELETE FROM {BOOK_FTS_TABLE} WHERE rowid = old.rowid;
+        INSERT INTO {BOOK_FTS_TABLE} (rowid, book_id, {_COLUMNS})
+        VALUES (new.rowid, new.book_id, new.title, new.subtitle, new.abstract, new.CommunitySynopsis);
+    END
+    """,
+)
+
+# ensure_book_search() replaces versions of these that predate rowid-keyed rows
+BOOK_FTS_TRIGGERS = ("book_fts_ai", "book_fts_ad", "book_fts_au")
+
+BOOK_FTS_REBUILD = (
+    f"DELETE FROM {BOOK_FTS_TABLE}",
+    f"INSERT INTO {BOOK_FTS_TABLE} (rowid, book_id, {_COLUMNS}) SELECT rowid, book_id, {_COLUMNS} FROM book",
+)
+
+# Books whose FTS row is missing or sits under another rowid (one rowid lookup per book)
+BOOK_FTS_MISALIGNED = f"""
+    SELECT
+        (SELECT COUNT(*) FROM book) != (SELECT COUNT(*) FROM {BOOK_FTS_TABLE})
+        OR EXISTS (
+            SELECT 1 FROM book AS b
+            LEFT JOIN {BOOK_FTS_TABLE} AS f ON f.rowid = b.rowid
+            WHERE f.book_id IS NULL OR f.book_id != b.book_id
+        )
+"""
+
+
+def create_book_search(connection: Connection, rebuild: bool = False) -> None:
+    """Create the FTS table and triggers if missing; `rebuild` re-copies every book."""
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in BOOK_FTS_DDL:
+        connection.execute(text(statement))
+    if rebuild:
+        for statement in BOOK_FTS_REBUILD:
+            connection.execute(text(statement))
+
+
+def drop_book_search(connection: Connection) -> None:
+    """Drop the FTS table (its triggers go with `book`)."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {BOOK_FTS_TABLE}"))
+
+
+def ensure_book_search(engine: Engine) -> None:
+    """
+    Create and fill the index on a database that has `book` but no `book_fts`
+    yet; replace triggers that predate rowid-keyed rows, and re-copy the index
+    when its rows no longer line up with `book` (e.g. after a VACUUM).
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    tables = set(inspect(engine).get_table_names())
+    if "book" not in tables:
+        return
+    with engine.begin() as connection:
+        if BOOK_FTS_TABLE not in tables:
+            create_book_search(connection, rebuild=True)
+            return
+        triggers = connection.execute(
+            text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'book'")
+        ).all()
+        current = {name: sql for name, sql in triggers if name in BOOK_FTS_TRIGGERS}
+        if len(current) != len(BOOK_FTS_TRIGGERS) or any("rowid" not in sql for sql in current.values()):
+            for name in BOOK_FTS_TRIGGERS:
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        misaligned = bool(connection.execute(text(BOOK_FTS_MISALIGNED)).scalar())
+        create_book_search(connection, rebuild=misaligned)
@@ -1,3 +1,8 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -7,6 +12,7 @@ from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.db.database import engine, Base
+from app.db.book_search import ensure_book_search
 
 # Import models so SQLAlchemy registers tables/relationships
 from app.models import user, book, genre, book_genre, bookshelf, synopsis_moderation  # noqa: F401
@@ -20,6 +26,8 @@ from app.routes import auth, books, chatbot
 from app.routes.admin import router as admin_router
 from app.routes.bookshelf import router as bookshelf_router
 from app.routes import chroma  # ChromaDB search routes
+from app.services.chroma_service import chroma_services
+from app.services.embedding_cache import embedding_cache
 from app.routes import user_profile
 from app.routes import review
 from app.routes import recommendation_routes
@@ -54,6 +62,33 @@ logger = logging.getLogger(__name__)
 
 # Create tables on startup
 Base.metadata.create_all(bind=engine)
+# Databases created before book_fts existed get it (and its backfill) here
+ensure_book_search(engine)
+
+# Wall time spent importing the application modules above; run
+# scripts/import_time_report.py for a per-module breakdown.
+_import_ms = (time.perf_counter() - _import_started) * 1000
+
+
+async def _warm_up_emotion_extractor():
+    from app.services.mood_recommendation import emotion_extractor
+
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(emotion_extractor.warm_up)
+        logger.info(f"Emotion extractor warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        logger.warning(f"Emotion extractor warm-up failed; it will initialise on first use: {str(e)}")
+
+
+async def _warm_up_chroma_service():
+    started = time.perf_counter()
+    try:
+        service = await asyncio.to_thread(chroma.get_chroma_service)
+        logger.info(f"ChromaService ({service.llm_provider}) ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        logger.warning(f"ChromaService warm-up failed; it will initialise on first use: {str(e)}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -74,8 +109,30 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start synopsis scheduler: {str(e)}")
 
+    # Load NLTK data and the shared emotion extractor off the request path.
+    # Runs in a worker thread so startup is not blocked; a mood request that
+    # arrives first simply waits for the same one-time initialisation.
+    warm_up_task = None
+    if os.getenv("NLTK_WARMUP", "1") != "0":
+        warm_up_task = asyncio.create_task(_warm_up_emotion_extractor())
+
+    # Build the default provider's shared ChromaService (client, embedding
+    # function, HTTP pools) before the first vector search needs it.
+    chroma_task = None
+    if os.getenv("CHROMA_WARMUP", "1") != "0":
+        chroma_task = asyncio.create_task(_warm_up_chroma_service())
+
+    logger.info(f"Startup complete in {(time.perf_counter() - _import_started) * 1000:.0f} ms (module imports {_import_ms:.0f} ms)")
+
     yield
 
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    if chroma_task is not None and not chroma_task.done():
+        chroma_task.cancel()
+    chroma_services.clear()
+    embedding_cache.close()
+
     # Shutdown: Stop the scheduler
     if SynopsisScheduler is not None:
         SynopsisScheduler.stop()
@@ -106,6 +163,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Catalogue paging and revalidation headers (GET /books)
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include routes
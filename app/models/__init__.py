@@ -7,5 +7,9 @@ from .genre import Genre
 from .mood import Mood
 from .review import Review
 from .book_genre import BookGenre
+from .book_rating_stats import BookRatingStats
+from .book_emotion_count import BookEmotionCount
+from .user_emotion_taste import UserEmotionTaste
 from .user_profile import UserProfile
-from .synopsis_moderation import SynopsisModeration
\ No newline at end of file
+from .synopsis_moderation import SynopsisModeration
+from .catalogue_version import CatalogueVersion
\ No newline at end of file
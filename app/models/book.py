@@ -1,14 +1,19 @@
 import uuid, pydantic
 from datetime import datetime, date
-from sqlalchemy import Column, String, DateTime, Integer, Date
+from sqlalchemy import Column, String, DateTime, Integer, Date, Index, event, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.db.book_search import create_book_search, drop_book_search
 
 def new_uuid():
     return str(uuid.uuid4())
 
 class Book(Base):
     __tablename__ = "book"
+    __table_args__ = (
+        # Keyset pagination order of GET /books
+        Index("ix_book_created_at_book_id", "created_at", "book_id"),
+    )
 
     book_id = Column(String, primary_key=True, default=new_uuid)
     title = Column(String, nullable=False)
@@ -20,6 +25,9 @@ class Book(Base):
     CommunitySynopsis = Column(String, nullable=True)
     # JSON/stringified emotion profile created from reviews
     emotion_profile = Column(String, nullable=True)
+    # When the profile was last rebuilt from reviews; reviews updated at or
+    # after this mark are picked up by an incremental rebuild
+    profile_built_at = Column(DateTime(timezone=True), nullable=True)
 
     page_count = Column(Integer, nullable=True)
     published_date = Column(Date, nullable=True)
@@ -37,6 +45,20 @@ class Book(Base):
 
     #Relationship with book_genre
     book_genres = relationship("BookGenre", back_populates="book", cascade="all, delete-orphan")        
+
+    # Rating aggregates maintained on review writes
+    rating_stats = relationship("BookRatingStats", back_populates="book", uselist=False, cascade="all, delete-orphan")
+
+    # Per-emotion counts backing emotion_profile, maintained on review writes
+    emotion_counts = relationship("BookEmotionCount", back_populates="book", cascade="all, delete-orphan")
+
+
+# Case-insensitive exact title lookups (BookSearchService.exact_title_matches)
+Index("ix_book_title_lower", func.lower(Book.title))
+
+# Full-text index (book_fts) lives and dies with the book table
+event.listen(Book.__table__, "after_create", lambda target, connection, **kw: create_book_search(connection))
+event.listen(Book.__table__, "after_drop", lambda target, connection, **kw: drop_book_search(connection))
     
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, Float, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class BookEmotionCount(Base):
+    """
+    Running totals of one emotion across a book's reviews: lexicon matches
+    (`count`) and the sum of each review's match percentage (`score`).
+    """
+
+    __tablename__ = "book_emotion_counts"
+
+    book_id = Column(String, ForeignKey("book.book_id"), primary_key=True)
+    emotion = Column(String, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    score = Column(Float, nullable=False, default=0.0)
+
+    book = relationship("Book", back_populates="emotion_counts")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, Float, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class BookRatingStats(Base):
+    """Per-book rating aggregates, maintained incrementally by ReviewService."""
+
+    __tablename__ = "book_rating_stats"
+
+    book_id = Column(String, ForeignKey("book.book_id"), primary_key=True)
+
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    average_rating = Column(Float, nullable=True)
+
+    book = relationship("Book", back_populates="rating_stats")
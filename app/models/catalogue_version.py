@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, event, text
+
+from app.db.database import Base
+
+
+class CatalogueVersion(Base):
+    """Single-row counter bumped by every catalogue write (drives the GET /books ETag)."""
+
+    __tablename__ = "catalogue_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# The row is seeded with the table, so writers only ever have to UPDATE it
+event.listen(
+    CatalogueVersion.__table__,
+    "after_create",
+    lambda target, connection, **kw: connection.execute(
+        text("INSERT INTO catalogue_version (id, version) VALUES (1, 0)")
+    ),
+)
@@ -32,6 +32,7 @@ class Review(Base):
         UniqueConstraint("user_id", "book_id", name="uq_reviews_user_book"),
         Index("ix_reviews_book_id", "book_id"),
         Index("ix_reviews_user_id", "user_id"),
+        Index("ix_reviews_updated_at", "updated_at"),
     )
 
     review_id = Column(String, primary_key=True, default=new_uuid, index=True)
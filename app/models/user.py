@@ -34,4 +34,7 @@ class User(Base):
 
     # Relationship with Review
     reviews = relationship("Review", back_populates="user", cascade="all, delete-orphan")
+
+    # Aggregated emotion taste, maintained by UserTasteService on review writes
+    emotion_tastes = relationship("UserEmotionTaste", back_populates="user", cascade="all, delete-orphan")
     
\ No newline at end of file
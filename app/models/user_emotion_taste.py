@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Float, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.db.database import Base
+
+
+class UserEmotionTaste(Base):
+    """Rating- and recency-weighted emotion totals across a user's reviews."""
+
+    __tablename__ = "user_emotion_tastes"
+
+    user_id = Column(String, ForeignKey("user.user_id"), primary_key=True)
+    emotion = Column(String, primary_key=True)
+
+    weight = Column(Float, nullable=False, default=0.0)
+
+    user = relationship("User", back_populates="emotion_tastes")
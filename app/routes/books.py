@@ -1,17 +1,52 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from app.schemas.book import BookCreate, BookUpdate, BookRead
+from app.schemas.book import BookCreate, BookUpdate, BookRead, BookTextSearchHit
 from app.services.book_service import BookService
+from app.services.book_search_service import BookSearchService
 from app.dependencies.services import get_book_service
 from app.dependencies.roles import required_admin_role
 from app.dependencies.db import get_db
 from app.models.genre import Genre
+from app.services.catalogue_version import catalogue_etag, current_catalogue_version, etag_matches
 
 router = APIRouter()
 
 @router.get("/", response_model=list[BookRead])
-def get_books(service: BookService = Depends(get_book_service)):
-    return service.get_books()
+def get_books(
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to list every book"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    genre: Optional[list[str]] = Query(None, description="Only books tagged with any of these genres"),
+    fields: Optional[str] = Query(None, description="Comma-separated BookRead fields to return"),
+    if_none_match: Optional[str] = Header(None),
+    service: BookService = Depends(get_book_service),
+    db: Session = Depends(get_db),
+):
+    """
+    List the catalogue, ordered by creation time.
+
+    Pages are keyset-paginated: the next page's cursor is sent in the
+    X-Next-Cursor header. Responses carry an ETag derived from the shared
+    catalogue version, so a matching If-None-Match gets a 304 after a single
+    primary-key read instead of a listing query.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    genres = sorted(set(genre)) if genre else None
+    etag = catalogue_etag(current_catalogue_version(db), limit, cursor, genres, selected)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        rows, next_cursor = service.list_books(limit=limit, cursor=cursor, genres=genres, fields=selected)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(content=jsonable_encoder(rows), headers=headers)
 
 
 @router.get("/genres", response_model=list[str])
@@ -19,6 +54,16 @@ def get_genres(db: Session = Depends(get_db)):
     rows = db.query(Genre.name).order_by(Genre.name.asc()).all()
     return [name for (name,) in rows]
 
+@router.get("/search/text", response_model=list[BookTextSearchHit])
+def search_books_text(
+    q: str = Query(..., min_length=1, description="Words to match in title, subtitle, abstract or synopsis"),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = Query(True, description="Match the last word as a prefix (search-as-you-type)"),
+    db: Session = Depends(get_db),
+):
+    """Keyword search over the local full-text index, ranked by BM25; no embedding call."""
+    return BookSearchService(db).search(q, limit=limit, prefix=prefix)
+
 @router.get("/{book_id}", response_model=BookRead)
 def get_book(book_id: str, service: BookService = Depends(get_book_service)):
     book = service.get_book(book_id)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from app.dependencies.db import get_db
 from app.services.chatbot_service import ChatbotService
 from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.mood_recommendation.result_cache import recommendation_cache
+from app.services.mood_recommendation.trace import RecommendationTrace
 from app.services.book_service import BookService
 from app.services.review_service import ReviewService
 from app.services.bookshelf_service import BookshelfService
@@ -36,8 +38,8 @@ class ChatResponse(BaseModel):
     follow_up_questions: List[str]
 
 
-def get_chatbot_service(db: Session = Depends(get_db)) -> ChatbotService:
-    """Create a ChatbotService with recommendation dependencies."""
+def get_chatbot_service(db: Session = Depends(get_db), request: Request = None) -> ChatbotService:
+    """Create a ChatbotService with recommendation dependencies (`X-Debug-Trace: 1` traces them)."""
     book_service = BookService(db)
     review_service = ReviewService(db)
     bookshelf_service = BookshelfService(db)
@@ -46,6 +48,8 @@ def get_chatbot_service(db: Session = Depends(get_db)) -> ChatbotService:
         review_service=review_service,
         bookshelf_service=bookshelf_service,
         db=db,
+        result_cache=recommendation_cache,
+        trace=RecommendationTrace.from_request(request),
     )
     return ChatbotService(db=db, recommendation_engine=recommendation_engine)
 
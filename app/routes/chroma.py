@@ -1,11 +1,14 @@
 import os
+import json
 import logging
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.dependencies.db import get_db
 from app.dependencies.auth import get_current_user
-from app.services.chroma_service import ChromaService
-from app.schemas.chroma_book import ChromaBookInfo
+from app.services.chroma_service import ChromaService, chroma_services, resolve_llm_provider
+from app.services.hybrid_search_service import HybridSearchService
+from app.schemas.chroma_book import ChromaBookInfo, HybridSearchPage
 from typing import Optional, Literal
 
 
@@ -33,8 +36,12 @@ def get_chroma_service(
     provider_to_use = llm_provider or llm_provider_for_instance
 
     try:
-        # Attempt to get ChromaService. Conflicts are handled internally now.
-        return ChromaService(llm_provider_override=provider_to_use)
+        # Services are built once per provider and shared (see ChromaServiceRegistry).
+        # Conflicts are handled internally now.
+        return chroma_services.get(
+            resolve_llm_provider(provider_to_use),
+            lambda: ChromaService(llm_provider_override=provider_to_use),
+        )
     except Exception as e:
         logging.error(f"Failed to initialize ChromaService: {e}", exc_info=True)
         raise HTTPException(
@@ -54,16 +61,23 @@ def sync_chromadb_from_db(
     """
     Manually trigger synchronization of all books from the main database to ChromaDB.
     This ensures that the ChromaDB search index is up-to-date with the latest book records,
-    handling additions, updates, and deletions.
+    handling additions, updates, and deletions. Books whose title and abstract are unchanged
+    since the last sync are not re-embedded.
     An optional `llm_provider` can be specified to override the default for this sync operation.
     """
     logging.info(f"Initiating ChromaDB synchronization, triggered by admin. LLM Provider: {llm_provider}")
     try:
         sync_results = chroma_service.sync_books(limit=limit) # Capture the results
         upserted = sync_results.get("upserted", 0)
+        skipped = sync_results.get("skipped", 0)
         deleted = sync_results.get("deleted", 0)
-        logging.info(f"ChromaDB synchronization completed. Upserted: {upserted} books, Deleted: {deleted} books.")
-        return {"message": f"ChromaDB synchronization completed using {chroma_service.llm_provider}. Upserted: {upserted} books, Deleted: {deleted} books."}
+        logging.info(f"ChromaDB synchronization completed. Upserted: {upserted} books, Skipped: {skipped} unchanged books, Deleted: {deleted} books.")
+        return {
+            "message": f"ChromaDB synchronization completed using {chroma_service.llm_provider}. Upserted: {upserted} books, Skipped: {skipped} unchanged books, Deleted: {deleted} books.",
+            "upserted": upserted,
+            "skipped": skipped,
+            "deleted": deleted,
+        }
     except Exception as e:
         logging.error(f"Failed to synchronize ChromaDB: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to synchronize ChromaDB: {str(e)}")
@@ -88,6 +102,28 @@ def search_books_in_chromadb(
     return {"query": query, "response": results}
 
 
+@router.get("/hybrid", response_model=HybridSearchPage)
+def hybrid_search_books(
+    query: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=500),
+    distance_threshold: float = 0.9,
+    llm_provider: Optional[Literal["OPENAI", "OLLAMA"]] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+    chroma_service: ChromaService = Depends(get_chroma_service),
+):
+    """
+    Keyword (BM25) and vector search run concurrently and fused with reciprocal rank fusion.
+    Books whose title is exactly the query come first. Page through results with `offset`;
+    `next_offset` is null on the last page.
+    """
+    hits, next_offset = HybridSearchService(db, chroma_service).search(
+        query, limit=limit, offset=offset, distance_threshold=distance_threshold
+    )
+    return {"query": query, "response": hits, "next_offset": next_offset}
+
+
 @router.get("/vector/summary")
 def ai_search_books_in_chromadb(
     query: str,
@@ -108,6 +144,46 @@ def ai_search_books_in_chromadb(
     response = chroma_service.generate_natural_language_response(query, results)
     return {"query": query, "response": response}
 
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """One Server-Sent Events message; JSON keeps newlines in tokens from ending the event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.get("/vector/summary/stream")
+def stream_ai_search_books_in_chromadb(
+    query: str,
+    distance_threshold: float = 0.9,
+    llm_provider: Optional[Literal["OPENAI", "OLLAMA"]] = None,
+    current_user: dict = Depends(get_current_user),
+    chroma_service: ChromaService = Depends(get_chroma_service),
+):
+    """
+    Streaming variant of /vector/summary, as Server-Sent Events.
+    Each `data:` message carries a `{"token": ...}` piece of the summary as the LLM produces it;
+    the stream ends with an `event: done` message, or `event: error` if generation fails midway.
+    """
+    results = chroma_service.search_books(query, distance_threshold=distance_threshold)
+    if not results:
+        raise HTTPException(status_code=404, detail=f"No similar books found for the query: '{query}'.")
+
+    def events():
+        try:
+            for token in chroma_service.stream_natural_language_response(query, results):
+                yield _sse({"token": token})
+        except Exception as e:
+            logging.error(f"Streaming summary failed: {e}", exc_info=True)
+            yield _sse({"detail": chroma_service.summary_error_message(e)}, event="error")
+            return
+        yield _sse({"results": len(results)}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.delete("/vector/{book_id}")
 def delete_book(
     book_id: str,
@@ -1,6 +1,6 @@
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -9,6 +9,8 @@ from app.services.book_service import BookService
 from app.services.review_service import ReviewService
 from app.services.bookshelf_service import BookshelfService
 from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.mood_recommendation.result_cache import recommendation_cache
+from app.services.mood_recommendation.trace import RecommendationTrace
 from app.schemas.book import BookRead
 
 
@@ -35,8 +37,12 @@ class RecommendationItem(BaseModel):
     contrast_score: Optional[float] = None
 
 
-def get_recommendation_engine(db: Session = Depends(get_db)) -> RecommendationEngine:
-    """Create a RecommendationEngine wired to app services using the request DB session."""
+def get_recommendation_engine(db: Session = Depends(get_db), request: Request = None) -> RecommendationEngine:
+    """
+    Create a RecommendationEngine wired to app services using the request DB session.
+
+    Send `X-Debug-Trace: 1` (or `?debug=1`) to log a per-step timing trace.
+    """
     book_service = BookService(db)
     review_service = ReviewService(db)
     bookshelf_service = BookshelfService(db)
@@ -45,6 +51,8 @@ def get_recommendation_engine(db: Session = Depends(get_db)) -> RecommendationEn
         review_service=review_service,
         bookshelf_service=bookshelf_service,
         db=db,
+        result_cache=recommendation_cache,
+        trace=RecommendationTrace.from_request(request),
     )
 
 
@@ -33,6 +33,13 @@ class BookRead(BookBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class BookTextSearchHit(BaseModel):
+    book_id: str
+    title: str
+    subtitle: Optional[str] = None
+    cover_image_url: Optional[str] = None
+    score: float
+
 
 #Code 1
 '''
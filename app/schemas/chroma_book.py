@@ -1,7 +1,24 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class ChromaBookInfo(BaseModel):
     id: str # Corresponds to ShelfAware's Book.book_id (UUID string)
     title: str
     abstract: Optional[str] = None # Corresponds to ShelfAware's Book.abstract
+
+
+class HybridSearchHit(BaseModel):
+    book_id: str
+    title: Optional[str] = None
+    score: float # Reciprocal rank fusion score, higher is better
+    exact_title: bool = False
+    lexical_rank: Optional[int] = None
+    bm25: Optional[float] = None
+    vector_rank: Optional[int] = None
+    distance: Optional[float] = None
+
+
+class HybridSearchPage(BaseModel):
+    query: str
+    response: List[HybridSearchHit]
+    next_offset: Optional[int] = None
@@ -0,0 +1,97 @@
+# app/services/book_search_service.py
+
+from __future__ import annotations
+
+import re
+import string
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.book_search import BOOK_FTS_TABLE
+
+# bm25 column weights: title, subtitle, abstract, CommunitySynopsis (book_id is unindexed)
+BM25_WEIGHTS = (0.0, 10.0, 5.0, 1.0, 1.0)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+# SQLite's lower() only folds ASCII letters
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def build_match_query(query: str, prefix: bool = True) -> str:
+    """
+    FTS5 MATCH expression for free text: every word must match (implicit AND).
+
+    Words are quoted, so FTS5 operators and punctuation in user input are
+    never interpreted; with `prefix` the last word also matches as a prefix
+    (search-as-you-type). Returns "" when the query has no words.
+    """
+    terms = [f'"{term}"' for term in _TERM.findall(query)]
+    if terms and prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def title_terms(text_: str) -> list[str]:
+    """Case-folded words of a title or query, the unit of exact title comparison."""
+    return _TERM.findall(text_.casefold())
+
+
+class BookSearchService:
+    """Keyword search over the book_fts index (see app.db.book_search)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> list[dict[str, Any]]:
+        """
+        Books matching every word of `query`, best BM25 score first.
+
+        Each hit carries the listing fields plus `score` (higher is better).
+        """
+        match = build_match_query(query, prefix=prefix)
+        if not match:
+            return []
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        rows = self.db.execute(
+            text(
+                f"""
+                SELECT b.book_id, b.title, b.subtitle, b.cover_image_url,
+                       -bm25({BOOK_FTS_TABLE}, {weights}) AS score
+                FROM {BOOK_FTS_TABLE}
+                JOIN book AS b ON b.book_id = {BOOK_FTS_TABLE}.book_id
+                WHERE {BOOK_FTS_TABLE} MATCH :match
+                ORDER BY bm25({BOOK_FTS_TABLE}, {weights})
+                LIMIT :limit
+                """
+            ),
+            {"match": match, "limit": limit},
+        )
+        return [dict(row._mapping) for row in rows]
+
+    def exact_title_matches(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
+        """
+        Books whose title is `query`, ignoring case.
+
+        Two equality probes of the ix_book_title_lower index: the query as
+        typed, and its words joined by single spaces (so "ocean tales!" finds
+        "Ocean Tales", though not "Ocean: Tales"). Only books with exactly
+        that title are read, however many titles merely contain the words.
+        """
+        terms = title_terms(query)
+        if not terms:
+            return []
+        rows = self.db.execute(
+            text(
+                """
+                SELECT book_id, title, subtitle, cover_image_url
+                FROM book
+                WHERE lower(title) IN (:typed, :words)
+                ORDER BY book_id
+                LIMIT :limit
+                """
+            ),
+            {"typed": query.strip().translate(_ASCII_LOWER), "words": " ".join(terms), "limit": limit},
+        )
+        return [dict(row._mapping) for row in rows]
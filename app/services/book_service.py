@@ -1,8 +1,37 @@
 #Code 2
-from typing import Optional
+import base64
+import json
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 from app.models.book import Book
-from app.schemas.book import BookCreate, BookUpdate
+from app.models.book_genre import BookGenre
+from app.models.genre import Genre
+from app.schemas.book import BookCreate, BookUpdate, BookRead
+from app.services.catalogue_version import bump_catalogue_version
+from app.services.mood_recommendation.emotion_index import emotion_index
+from app.services.mood_recommendation.rating_matrix import rating_index
+from app.services.mood_recommendation.result_cache import recommendation_cache
+
+# Fields a catalogue listing can select; book_id is always returned
+BOOK_LIST_FIELDS = tuple(BookRead.model_fields)
+
+
+def encode_book_cursor(created_at: datetime, book_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), book_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_book_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of encode_book_cursor; raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, book_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(book_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
 
 class BookService:
     def __init__(self, db: Session):
@@ -17,11 +46,90 @@ class BookService:
     def get_book(self, book_id: str):
         return self.db.query(Book).filter(Book.book_id == book_id).first()
 
+    def list_books(
+        self,
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        genres: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """
+        One keyset page of the catalogue ordered by (created_at, book_id).
+
+        Only the selected columns are read (all BookRead fields by default), as
+        plain dicts. `genres` keeps books tagged with any of the given names.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        Unknown fields or a malformed cursor raise ValueError.
+        """
+        selected = list(fields) if fields else list(BOOK_LIST_FIELDS)
+        unknown = [f for f in selected if f not in BOOK_LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = ["book_id", *(f for f in dict.fromkeys(selected) if f != "book_id")]
+
+        # The sort key is always read so the next cursor can be built
+        stmt = select(*(getattr(Book, f) for f in selected), Book.created_at.label("_sort_created_at"))
+        if cursor:
+            created_at, book_id = decode_book_cursor(cursor)
+            stmt = stmt.where(
+                or_(Book.created_at > created_at, and_(Book.created_at == created_at, Book.book_id > book_id))
+            )
+        if genres:
+            tagged = select(BookGenre.book_id).join(Genre, Genre.genre_id == BookGenre.genre_id).where(
+                Genre.name.in_(list(genres))
+            )
+            stmt = stmt.where(Book.book_id.in_(tagged))
+        stmt = stmt.order_by(Book.created_at, Book.book_id)
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+
+        rows = self.db.execute(stmt).all()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_book_cursor(rows[-1]._sort_created_at, rows[-1].book_id)
+        return [{f: getattr(row, f) for f in selected} for row in rows], next_cursor
+
+    def get_books_by_ids(self, book_ids: Iterable[str], chunk_size: int = 500) -> dict[str, Book]:
+        """Books keyed by id from one IN query per chunk; unknown ids are left out."""
+        ids = list(dict.fromkeys(book_ids))
+        books: dict[str, Book] = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            for book in self.db.query(Book).filter(Book.book_id.in_(chunk)):
+                books[book.book_id] = book
+        return books
+
+    # --- Column projections for ranking paths (no ORM rows, no genre load) ---
+    def get_book_titles(self, book_ids: Optional[Iterable[str]] = None, chunk_size: int = 500) -> dict[str, str]:
+        """Title per book id; every book when `book_ids` is None."""
+        return self._select_by_id(Book.title, book_ids, chunk_size)
+
+    def get_emotion_profiles(
+        self, book_ids: Optional[Iterable[str]] = None, chunk_size: int = 500
+    ) -> dict[str, Optional[str]]:
+        """Raw emotion_profile JSON per book id; every book when `book_ids` is None."""
+        return self._select_by_id(Book.emotion_profile, book_ids, chunk_size)
+
+    def _select_by_id(self, column, book_ids: Optional[Iterable[str]], chunk_size: int) -> dict[str, Any]:
+        if book_ids is None:
+            return dict(self.db.execute(select(Book.book_id, column)).all())
+        ids = list(dict.fromkeys(book_ids))
+        values: dict[str, Any] = {}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            values.update(self.db.execute(select(Book.book_id, column).where(Book.book_id.in_(chunk))).all())
+        return values
+
     def add_book(self, book_data: BookCreate):
         new_book = Book(**book_data.model_dump())
         self.db.add(new_book)
+        bump_catalogue_version(self.db)
         self.db.commit()
         self.db.refresh(new_book)
+        emotion_index.invalidate()
+        recommendation_cache.bump_global()
         return new_book
 
     def update_book(self, book_id: str, updated_data: BookUpdate):
@@ -32,6 +140,7 @@ class BookService:
         for key, value in updated_data.model_dump(exclude_unset=True).items():
             setattr(book, key, value)
 
+        bump_catalogue_version(self.db)
         self.db.commit()
         self.db.refresh(book)
         return book
@@ -41,7 +150,11 @@ class BookService:
         if not book:
             return False
         self.db.delete(book)
+        bump_catalogue_version(self.db)
         self.db.commit()
+        emotion_index.invalidate()
+        rating_index.invalidate()
+        recommendation_cache.bump_global()
         return True
 
 
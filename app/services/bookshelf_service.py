@@ -9,6 +9,7 @@ from sqlalchemy import select, desc, asc, or_
 
 from app.models.bookshelf import Bookshelf
 from app.models.book import Book  # keep for existence check
+from app.services.mood_recommendation.result_cache import recommendation_cache
 
 
 STATUS_ORDER = {
@@ -81,6 +82,7 @@ class BookshelfService:
         )
         self.db.add(item)
         self.db.commit()
+        recommendation_cache.bump_user(user_id)
         self.db.refresh(item)
         return item
 
@@ -97,6 +99,7 @@ class BookshelfService:
 
         self.db.delete(item)
         self.db.commit()
+        recommendation_cache.bump_user(user_id)
 
     def update_status(self, *, user_id: str, book_id: str, new_status: str) -> Bookshelf:
         item = self.db.execute(
@@ -129,6 +132,7 @@ class BookshelfService:
                 raise ValueError("Invalid dates: finished before started")
 
         self.db.commit()
+        recommendation_cache.bump_user(user_id)
         self.db.refresh(item)
         return item
 
@@ -193,6 +197,7 @@ class BookshelfService:
         item.updated_at = now
 
         self.db.commit()
+        recommendation_cache.bump_user(user_id)
         self.db.refresh(item)
         return item
 
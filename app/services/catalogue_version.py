@@ -0,0 +1,55 @@
+"""
+Catalogue version behind the GET /books ETag.
+
+The version lives in a one-row catalogue_version table. Every catalogue
+write (book add/update/delete, accepted community synopses) bumps it in the
+same transaction as the write, so all workers see the new version as soon
+as the write commits, and a rolled-back write never invalidates anything.
+Reading it is a single primary-key lookup, which lets a conditional request
+be answered with 304 before any listing work.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.catalogue_version import CatalogueVersion
+
+_ROW_ID = 1
+
+
+def bump_catalogue_version(db: Session) -> None:
+    """Record a catalogue write in the caller's transaction; commit it with the write."""
+    result = db.execute(
+        update(CatalogueVersion)
+        .where(CatalogueVersion.id == _ROW_ID)
+        .values(version=CatalogueVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        # Row missing (deleted by hand); the UPDATE already holds the write lock
+        db.execute(insert(CatalogueVersion).values(id=_ROW_ID, version=1))
+
+
+def current_catalogue_version(db: Session) -> int:
+    """The committed catalogue version (0 if the row is missing)."""
+    return db.scalar(select(CatalogueVersion.version).where(CatalogueVersion.id == _ROW_ID)) or 0
+
+
+def catalogue_etag(version: int, *parts: Any) -> str:
+    """Weak ETag for a catalogue `version` and the request's `parts` (query parameters)."""
+    raw = repr((version, parts)).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -1,4 +1,5 @@
 from typing import Dict, List, Optional
+import logging
 import os
 
 from sqlalchemy import select
@@ -7,6 +8,8 @@ from sqlalchemy.orm import Session
 from app.models.mood import Mood
 from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
 
+logger = logging.getLogger(__name__)
+
 
 class ChatbotService:
     def __init__(
@@ -73,7 +76,7 @@ class ChatbotService:
             if mood_entry:
                 return mood_entry.mood
         except Exception as e:
-            print(f"Error fetching user mood: {e}")
+            logger.warning("Error fetching user mood: %s", e)
 
         return "peaceful"
 
@@ -102,7 +105,7 @@ class ChatbotService:
 
             return books
         except Exception as e:
-            print(f"Error getting mood recommendations: {e}")
+            logger.exception("Error getting mood recommendations: %s", e)
             return []
 
     def generate_response(self, mood: str) -> str:
@@ -1,29 +1,67 @@
 import re
+import hashlib
 import chromadb
 import logging
 from chromadb.utils import embedding_functions
-from typing import List, Optional, Literal # Added Literal
+from typing import Callable, Dict, Iterator, List, Optional, Literal # Added Literal
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from dotenv import load_dotenv
 
 from sqlalchemy.orm import Session
 from app.dependencies.db import get_db
 from app.models.book import Book
 from app.services.book_service import BookService
+from app.services.embedding_cache import EmbeddingCache, embedding_cache
 
 import openai
 from ollama import Client as OllamaClient
 
 load_dotenv()
 
+# Books per upsert (and per embedding request) during sync
+SYNC_BATCH_SIZE = int(os.getenv("CHROMA_SYNC_BATCH_SIZE", "64"))
+# Embedding requests in flight at once during sync
+SYNC_CONCURRENCY = int(os.getenv("CHROMA_SYNC_CONCURRENCY", "4"))
+# Attempts per embedding request, and the first retry delay (doubled each retry)
+SYNC_MAX_ATTEMPTS = int(os.getenv("CHROMA_SYNC_MAX_ATTEMPTS", "4"))
+SYNC_BACKOFF_SECONDS = float(os.getenv("CHROMA_SYNC_BACKOFF_SECONDS", "0.5"))
+# IDs per page when enumerating the collection, and per metadata lookup by ID
+ID_PAGE_SIZE = int(os.getenv("CHROMA_ID_PAGE_SIZE", "1000"))
+
+
+def book_document(title: str, abstract: Optional[str]) -> str:
+    """The text embedded for a book."""
+    return f"{title}. {abstract}" if abstract else title
+
+
+def content_hash(document: str) -> str:
+    """Fingerprint of an embedded document, stored in its Chroma metadata."""
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+def resolve_llm_provider(llm_provider_override: Optional[str] = None) -> str:
+    """The provider a ChromaService built with `llm_provider_override` will use."""
+    return (llm_provider_override or os.getenv("LLM_PROVIDER", "OPENAI")).upper()
+
 
 class ChromaService:
+    # Embeddings computed through embed() are looked up here first (see app.services.embedding_cache)
+    embedding_cache: Optional[EmbeddingCache] = None
+
     def __init__(self, llm_provider_override: Optional[Literal["OPENAI", "OLLAMA"]] = None): # Removed use_persisted_llm_provider parameter and is_retry
+        self.embedding_cache = embedding_cache
         # Initialize ChromaDB Persistent Client
         self.client = chromadb.PersistentClient(path="./chromadb")
 
         # Determine LLM provider from override, then environment variable, default to OPENAI
-        self.llm_provider = (llm_provider_override or os.getenv("LLM_PROVIDER", "OPENAI")).upper()
+        self.llm_provider = resolve_llm_provider(llm_provider_override)
+        # Set when the persisted collection was dropped for this provider (see ChromaServiceRegistry)
+        self.collection_reset = False
         
         self._initialize_llm_clients() # Moved this call here
         
@@ -51,6 +89,7 @@ class ChromaService:
                         name="books",
                         embedding_function=self.embedding_function
                     )
+                    self.collection_reset = True
                     logging.info(f"ChromaDB collection 'books' successfully reset and initialized with '{self.llm_provider}' embedding function.")
                 else:
                     # If the requested provider is the same as persisted, but there's still a conflict (shouldn't happen)
@@ -69,16 +108,18 @@ class ChromaService:
             openai_api_key = os.getenv("OPENAI_API_KEY")
             if not openai_api_key:
                 raise ValueError("OPENAI_API_KEY environment variable not set for OpenAI provider.")
+            self.embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
             self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(
                 api_key=openai_api_key,
-                model_name=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+                model_name=self.embedding_model
             )
             self.llm_generator_client = openai.Client(api_key=openai_api_key)
             self.llm_model_for_generation = os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini")
         elif self.llm_provider == "OLLAMA":
             ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
+            self.embedding_model = os.getenv("OLLAMA_EMBEDDING_MODEL", "embeddinggemma")
             self.embedding_function = embedding_functions.OllamaEmbeddingFunction(
-                model_name=os.getenv("OLLAMA_EMBEDDING_MODEL", "embeddinggemma"),
+                model_name=self.embedding_model,
                 url=ollama_url
             )
             self.llm_generator_client = OllamaClient(host=ollama_url)
@@ -92,13 +133,98 @@ class ChromaService:
         Add a book's embedding to the collection.
         """
         # Adapted to handle Optional[str] for abstract
-        document_content = f"{title}. {abstract}" if abstract else title
+        document_content = book_document(title, abstract)
         self.collection.upsert(
             ids=[book_id],
             documents=[document_content],
-            metadatas=[{"title": title, "description": abstract or ""}] # Use 'description' key for ChromaDB metadata
+            metadatas=[self._book_metadata(title, abstract, document_content)]
         )
 
+    def _book_metadata(self, title: str, abstract: Optional[str], document: str) -> dict:
+        # 'description' key for ChromaDB metadata; the hash and model let sync skip unchanged books
+        return {
+            "title": title,
+            "description": abstract or "",
+            "content_hash": content_hash(document),
+            "embedding_model": self.embedding_model,
+        }
+
+    def embed(self, texts: List[str], compute: Optional[Callable] = None):
+        """
+        Embeddings for `texts`, in order. Cached vectors are reused; the rest
+        come from `compute` (default: the provider's embedding function).
+        """
+        compute = compute or self.embedding_function
+        if self.embedding_cache is None:
+            return compute(list(texts))
+        return self.embedding_cache.embed(texts, self.llm_provider, self.embedding_model, compute)
+
+    def _embed_with_retry(self, documents: List[str], max_attempts: int, backoff_seconds: float):
+        """One embedding request for `documents`, retried with exponential backoff and jitter."""
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return self.embedding_function(documents)
+            except Exception as e:
+                if attempt == max_attempts:
+                    raise
+                delay = backoff_seconds * 2 ** (attempt - 1)
+                delay += random.uniform(0, delay)
+                logging.warning(f"Embedding request for {len(documents)} documents failed (attempt {attempt}/{max_attempts}): {e}. Retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def upsert_books(
+        self,
+        books: List[tuple],
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+    ) -> int:
+        """
+        Embed and upsert (book_id, title, abstract) tuples in batches.
+
+        Each batch costs at most one embedding request (cached documents are
+        not re-sent) and one upsert; up to `max_workers` embedding requests
+        run at once, while upserts stay on the calling thread. Returns the
+        number of books upserted.
+        """
+        batch_size = batch_size or SYNC_BATCH_SIZE
+        max_attempts = max_attempts or SYNC_MAX_ATTEMPTS
+        backoff_seconds = SYNC_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        batches = [books[i:i + batch_size] for i in range(0, len(books), batch_size)]
+        if not batches:
+            return 0
+
+        upserted = 0
+        pool = ThreadPoolExecutor(max_workers=min(max_workers or SYNC_CONCURRENCY, len(batches)), thread_name_prefix="chroma-embed")
+        try:
+            futures = {
+                pool.submit(
+                    self.embed,
+                    [book_document(title, abstract) for _, title, abstract in batch],
+                    partial(self._embed_with_retry, max_attempts=max_attempts, backoff_seconds=backoff_seconds),
+                ): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                documents = [book_document(title, abstract) for _, title, abstract in batch]
+                self.collection.upsert(
+                    ids=[book_id for book_id, _, _ in batch],
+                    documents=documents,
+                    metadatas=[
+                        self._book_metadata(title, abstract, document)
+                        for (_, title, abstract), document in zip(batch, documents)
+                    ],
+                    embeddings=future.result(),
+                )
+                upserted += len(batch)
+                logging.info(f"Upserted batch of {len(batch)} books ({upserted}/{len(books)}).")
+        finally:
+            # A failed batch stops the sync; don't start embedding requests nobody will use
+            pool.shutdown(wait=True, cancel_futures=True)
+        return upserted
+
     def search_books(self, query: str, n_results: int = 3, distance_threshold: float = 0.9) -> List[dict]:
         """
         Search for similar books based on a query with a similarity threshold.
@@ -109,7 +235,7 @@ class ChromaService:
         :return: List of metadata dictionaries for matching books.
         """
         results = self.collection.query(
-            query_texts=[query], # Single query
+            query_embeddings=self.embed([query]), # Single query, embedded through the cache
             n_results=n_results
         )
         logging.info(f"Raw ChromaDB query results: {results}")
@@ -130,6 +256,32 @@ class ChromaService:
         return filtered_results
 
 
+    SUMMARY_SYSTEM_PROMPT = "You are an expert librarian assistant. Your task is to provide concise and helpful summaries of book search results based on a user's query."
+
+    def _summary_messages(self, query: str, search_results: List[dict]) -> List[dict]:
+        """Chat messages asking the LLM to summarise `search_results` for `query`."""
+        prompt_template = (
+                f'The user queried: "{query}". Below is a list of search results, where each item is a dictionary containing book information. '
+                f"Each dictionary has 'title' and 'description' keys. "
+                f"Your task is to summarize these {len(search_results)} books. "
+                f"For each book, identify its title and provide a brief, relevant summary of its description, highlighting aspects that directly relate to the user's query. "
+                f"Present the summary in a clear, easy-to-read natural language format, not as a list of dictionaries. The overall summary should be concise, ideally under 100 words. \n\n"
+                f"Search Results (Python list of dictionaries):\n{search_results}\n\n"
+                f"Please provide your concise summary now."
+            )
+        return [
+            {"role": "system", "content": self.SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt_template},
+        ]
+
+    def summary_error_message(self, e: Exception) -> str:
+        # Use specific error messages for clarity
+        if self.llm_provider == "OPENAI":
+            return f"Error generating summary with OpenAI: {str(e)}. Please ensure OPENAI_API_KEY is set and the model '{self.llm_model_for_generation}' is available."
+        elif self.llm_provider == "OLLAMA":
+            return f"Error generating summary with Ollama: {str(e)}. Please ensure Ollama is running and the model '{self.llm_model_for_generation}' is pulled."
+        return f"Error generating summary with unsupported LLM_PROVIDER: {self.llm_provider} - {str(e)}."
+
     def generate_natural_language_response(self, query: str, search_results: List[dict]) -> str:
         """
         Generates a concise natural language summary of the search results using the configured LLM.
@@ -138,23 +290,11 @@ class ChromaService:
             return f"No similar books found for the query: '{query}'."
 
         try:
-            prompt_template = (
-                    f'The user queried: "{query}". Below is a list of search results, where each item is a dictionary containing book information. '
-                    f"Each dictionary has 'title' and 'description' keys. "
-                    f"Your task is to summarize these {len(search_results)} books. "
-                    f"For each book, identify its title and provide a brief, relevant summary of its description, highlighting aspects that directly relate to the user's query. "
-                    f"Present the summary in a clear, easy-to-read natural language format, not as a list of dictionaries. The overall summary should be concise, ideally under 100 words. \n\n"
-                    f"Search Results (Python list of dictionaries):\n{search_results}\n\n"
-                    f"Please provide your concise summary now."
-                )
-
+            messages = self._summary_messages(query, search_results)
             if self.llm_provider == "OPENAI":
                 response = self.llm_generator_client.chat.completions.create(
                     model=self.llm_model_for_generation,
-                    messages=[
-                        {"role": "system", "content": "You are an expert librarian assistant. Your task is to provide concise and helpful summaries of book search results based on a user's query."},
-                        {"role": "user", "content": prompt_template},
-                    ],
+                    messages=messages,
                     max_tokens=200,
                     temperature=0.1
                 )
@@ -162,10 +302,7 @@ class ChromaService:
             elif self.llm_provider == "OLLAMA":
                 response = self.llm_generator_client.chat(
                     model=self.llm_model_for_generation,
-                    messages=[
-                        {"role": "system", "content": "You are an expert librarian assistant. Your task is to provide concise and helpful summaries of book search results based on a user's query."},
-                        {"role": "user", "content": prompt_template}
-                    ],
+                    messages=messages,
                     options={
                         "temperature": 0.1,
                         "num_predict": 200,
@@ -173,45 +310,98 @@ class ChromaService:
                 )
                 return response['message']['content']
         except Exception as e:
-            # Use specific error messages for clarity
-            if self.llm_provider == "OPENAI":
-                error_msg = f"Error generating summary with OpenAI: {str(e)}. Please ensure OPENAI_API_KEY is set and the model '{self.llm_model_for_generation}' is available."
-            elif self.llm_provider == "OLLAMA":
-                error_msg = f"Error generating summary with Ollama: {str(e)}. Please ensure Ollama is running and the model '{self.llm_model_for_generation}' is pulled."
-            else:
-                error_msg = f"Error generating summary with unsupported LLM_PROVIDER: {self.llm_provider} - {str(e)}."
+            error_msg = self.summary_error_message(e)
             print(error_msg)
             return error_msg
 
+    def stream_natural_language_response(self, query: str, search_results: List[dict]) -> Iterator[str]:
+        """
+        Same summary as generate_natural_language_response, yielded piece by piece
+        as the provider produces it. Errors raise (after the pieces already yielded)
+        so the caller can report them in-band.
+        """
+        if not search_results:
+            yield f"No similar books found for the query: '{query}'."
+            return
+
+        messages = self._summary_messages(query, search_results)
+        if self.llm_provider == "OPENAI":
+            stream = self.llm_generator_client.chat.completions.create(
+                model=self.llm_model_for_generation,
+                messages=messages,
+                max_tokens=200,
+                temperature=0.1,
+                stream=True,
+            )
+            for chunk in stream:
+                # The final chunk (finish_reason) carries no content
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        elif self.llm_provider == "OLLAMA":
+            stream = self.llm_generator_client.chat(
+                model=self.llm_model_for_generation,
+                messages=messages,
+                options={
+                    "temperature": 0.1,
+                    "num_predict": 200,
+                },
+                stream=True,
+            )
+            for part in stream:
+                if part['message']['content']:
+                    yield part['message']['content']
+        else:
+            raise ValueError(f"Unsupported LLM_PROVIDER: {self.llm_provider}. Must be 'OLLAMA' or 'OPENAI'.")
+
     def delete_book(self, book_id: str):
         """
         Remove a book from the ChromaDB collection.
         """
         collection_name = self.collection.name
         logging.info(f"Attempting to delete book_id '{book_id}' from collection '{collection_name}'.")
-
-        # Log state before deletion
-        initial_items = self.collection.get()
-        initial_ids = initial_items.get('ids', [])
-        logging.info(f"Collection '{collection_name}' has {len(initial_ids)} items before deletion. IDs: {initial_ids}")
-
+        # Delete by ID only; nothing else in the collection is read
         self.collection.delete(ids=[book_id])
+        logging.info(f"Deleted book_id '{book_id}' from collection '{collection_name}'.")
 
-        # Log state after deletion
-        final_items = self.collection.get()
-        final_ids = final_items.get('ids', [])
-        logging.info(f"Collection '{collection_name}' has {len(final_ids)} items after deletion. IDs: {final_ids}")
+    def iter_ids(self, page_size: Optional[int] = None):
+        """Every ID in the collection, read a page at a time without documents, embeddings or metadata."""
+        page_size = page_size or ID_PAGE_SIZE
+        offset = 0
+        while True:
+            ids = self.collection.get(include=[], limit=page_size, offset=offset).get('ids') or []
+            yield from ids
+            if len(ids) < page_size:
+                return
+            offset += page_size
 
-    def sync_books(self, limit: Optional[int] = None) -> dict:
+    def indexed_hashes(self, book_ids: List[str], page_size: Optional[int] = None) -> Dict[str, str]:
+        """Content hash of each of `book_ids` that is in the collection and was embedded with the current model."""
+        page_size = page_size or ID_PAGE_SIZE
+        hashes = {}
+        for start in range(0, len(book_ids), page_size):
+            page = self.collection.get(ids=book_ids[start:start + page_size], include=["metadatas"])
+            ids = page.get('ids') or []
+            metadatas = page.get('metadatas') or [None] * len(ids)
+            for book_id, metadata in zip(ids, metadatas):
+                metadata = metadata or {}
+                if metadata.get("embedding_model") == self.embedding_model:
+                    hashes[book_id] = metadata.get("content_hash")
+        return hashes
+
+    def sync_books(self, limit: Optional[int] = None, batch_size: Optional[int] = None, force: bool = False) -> dict:
         """
         Synchronizes books from the main database to ChromaDB.
         Handles additions, updates, and deletions to ensure ChromaDB
         reflects the current state of the main database.
-        Returns a dictionary with counts of upserted and deleted books.
+        Books whose embedded text (and embedding model) is unchanged since the
+        last sync are skipped, using the content hash stored in their metadata.
+        Returns a dictionary with counts of upserted, skipped and deleted books.
         
         :param limit: Optional. If provided, limits the number of books fetched from the main database.
                       Note: Without an explicit ORDER BY clause in the underlying query,
                       the selection of books when a limit is applied is not deterministic.
+        :param batch_size: Optional. Books per embedding request and upsert (default CHROMA_SYNC_BATCH_SIZE).
+        :param force: Re-embed every book, even unchanged ones.
         """
         logging.info(f"Starting ChromaDB synchronization with limit: {limit if limit is not None else 'No limit'}...")
         db = next(get_db()) # Get a DB session
@@ -227,17 +417,21 @@ class ChromaService:
             db_book_ids = {str(book.book_id) for book in db_books}
             logging.info(f"Found {len(db_books)} books in the main database (limited by {limit if limit is not None else 'N/A'}).")
 
-            # 2. Get all existing book IDs from ChromaDB
+            # 2. Get the stored content hashes of those books, and every book ID, from ChromaDB
             logging.info("Fetching existing book IDs from ChromaDB.")
-            chroma_collection_content = self.collection.get()
-            chroma_book_ids = set(chroma_collection_content.get('ids', []))
+            indexed = {} if force else self.indexed_hashes(sorted(db_book_ids))
+            chroma_book_ids = set(self.iter_ids())
             logging.info(f"Found {len(chroma_book_ids)} books in ChromaDB.")
 
-            # 3. Add/Update books in ChromaDB (upsert)
-            logging.info("Upserting books into ChromaDB...")
-            for book in db_books:
-                self.add_book(str(book.book_id), book.title, book.abstract)
-                upserted_count += 1
+            # 3. Add/Update changed books in ChromaDB (upsert)
+            changed = [
+                (str(book.book_id), book.title, book.abstract)
+                for book in db_books
+                if force or indexed.get(str(book.book_id)) != content_hash(book_document(book.title, book.abstract))
+            ]
+            skipped_count = len(db_books) - len(changed)
+            logging.info(f"Upserting {len(changed)} new or changed books into ChromaDB ({skipped_count} unchanged)...")
+            upserted_count = self.upsert_books(changed, batch_size=batch_size)
             logging.info(f"Successfully upserted {upserted_count} books into ChromaDB.")
 
             # 4. Identify and delete books from ChromaDB that are no longer in the main DB
@@ -249,12 +443,67 @@ class ChromaService:
             else:
                 logging.info("No books to delete from ChromaDB.")
 
-            logging.info(f"ChromaDB synchronization completed. Upserted: {upserted_count}, Deleted: {deleted_count}.")
-            return {"upserted": upserted_count, "deleted": deleted_count}
+            logging.info(f"ChromaDB synchronization completed. Upserted: {upserted_count}, Skipped: {skipped_count}, Deleted: {deleted_count}.")
+            return {"upserted": upserted_count, "skipped": skipped_count, "deleted": deleted_count}
 
         except Exception as e:
             logging.error(f"Error during ChromaDB synchronization: {e}", exc_info=True)
             raise # Re-raise the exception after logging
 
         finally:
-            db.close() # Always close the session
\ No newline at end of file
+            db.close() # Always close the session
+
+
+class ChromaServiceRegistry:
+    """
+    Process-wide ChromaService instances, one per LLM provider.
+
+    Building a service opens the persistent Chroma client, the embedding
+    function and the provider's HTTP client, so each provider is built once
+    (on first use or at startup) and shared by every request after that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services: Dict[str, ChromaService] = {}
+
+    def get(self, provider: str, create: Callable[[], ChromaService]) -> ChromaService:
+        """The service for `provider`, built with `create()` if there is none yet. Failed builds are not cached."""
+        service = self._services.get(provider)
+        if service is not None:
+            return service
+        with self._lock:
+            service = self._services.get(provider)
+            if service is None:
+                service = create()
+                if getattr(service, "collection_reset", False):
+                    # The collection other providers hold was deleted under them
+                    for stale in self._services.values():
+                        self._close(stale)
+                    self._services.clear()
+                self._services[provider] = service
+                logging.info(f"ChromaService for '{provider}' initialised and registered.")
+            return service
+
+    def clear(self) -> None:
+        """Drop (and close) every registered service; the next get() rebuilds."""
+        with self._lock:
+            services = list(self._services.values())
+            self._services.clear()
+        for service in services:
+            self._close(service)
+
+    @staticmethod
+    def _close(service: ChromaService) -> None:
+        close = getattr(getattr(service, "llm_generator_client", None), "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logging.warning(f"Failed to close LLM client: {e}")
+
+    def __contains__(self, provider: str) -> bool:
+        return provider in self._services
+
+
+chroma_services = ChromaServiceRegistry()
@@ -0,0 +1,159 @@
+# app/services/embedding_cache.py
+
+"""
+On-disk cache of text embeddings, shared by vector sync and query search.
+
+Vectors are stored as float32 blobs in a small SQLite file, keyed by a hash
+of (provider, model, text), so switching the embedding model never serves a
+stale vector. The cache holds at most EMBEDDING_CACHE_MAX_ENTRIES vectors;
+when it grows past that, the least recently used ones are evicted.
+EMBEDDING_CACHE_MAX_ENTRIES=0 disables it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Evicting down to this fraction of the limit keeps eviction off most writes
+_EVICT_TO = 0.9
+
+
+def embedding_key(provider: str, model: str, text: str) -> str:
+    return hashlib.sha256(f"{provider}\0{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU-bounded SQLite store of float32 vectors. Safe to share between threads."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        return cls(
+            path=os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db"),
+            max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use so importing the app never touches the disk
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embedding_last_used ON embedding (last_used)")
+            # Per-connection scratch table for get_many() lookups
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup (key TEXT PRIMARY KEY)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for `keys` (missing keys are left out); hits become most recently used."""
+        if not self.enabled or not keys:
+            return {}
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connection()
+            # Stage the keys and join, so the lookup is one fixed statement
+            # whatever the number of keys (no bound-parameter limit either)
+            conn.execute("DELETE FROM temp.lookup")
+            conn.executemany("INSERT OR IGNORE INTO temp.lookup (key) VALUES (?)", [(key,) for key in unique])
+            rows = conn.execute(
+                "SELECT e.key, e.vector FROM embedding AS e JOIN temp.lookup AS l ON l.key = e.key"
+            ).fetchall()
+            conn.execute("DELETE FROM temp.lookup")
+            found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE embedding SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """Store vectors, then evict least recently used entries beyond max_entries."""
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR IGNORE INTO embedding (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            # Other processes share the file, so count inside this write
+            # transaction (the insert holds the write lock) rather than locally
+            size = conn.execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+            if size > self.max_entries:
+                excess = size - int(self.max_entries * _EVICT_TO)
+                conn.execute(
+                    "DELETE FROM embedding WHERE key IN "
+                    "(SELECT key FROM embedding ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                logger.info(f"Evicted {excess} least recently used embeddings from the cache.")
+            conn.commit()
+
+    def embed(
+        self,
+        texts: Sequence[str],
+        provider: str,
+        model: str,
+        compute: Callable[[List[str]], Sequence[Sequence[float]]],
+    ) -> List[np.ndarray]:
+        """
+        Vectors for `texts`, in order. Only texts not already cached are passed
+        to `compute` (once each, in one call); their vectors are then cached.
+        """
+        keys = [embedding_key(provider, model, text) for text in texts]
+        try:
+            cached = self.get_many(keys)
+        except sqlite3.Error as e:
+            # A broken cache file must not take embedding down with it
+            logger.warning(f"Embedding cache read failed: {e}")
+            cached = {}
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            vectors = compute(list(missing.values()))
+            computed = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, vectors)}
+            try:
+                self.put_many(computed)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+embedding_cache = EmbeddingCache.from_env()
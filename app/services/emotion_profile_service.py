@@ -0,0 +1,207 @@
+# app/services/emotion_profile_service.py
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, Mapping, Optional, TYPE_CHECKING
+
+from sqlalchemy import select, update, insert, delete
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+from app.models.book_emotion_count import BookEmotionCount
+
+if TYPE_CHECKING:
+    from app.services.mood_recommendation.emotion_extractor import EmotionExtractor
+
+logger = logging.getLogger(__name__)
+
+
+def review_scores(counts: Mapping[str, int]) -> dict[str, float]:
+    """One review's scores: each emotion's percentage of the review's lexicon matches."""
+    total = sum(counts.values())
+    if not total:
+        return {}
+    return {emotion: (count / total) * 100 for emotion, count in counts.items() if count}
+
+
+class EmotionProfileService:
+    """
+    Persistent per-book emotion profiles.
+
+    `book_emotion_counts` holds each book's running lexicon-match counts and
+    the sum of its reviews' scores (so every review weighs the same in the
+    profile, however many matches it has); `Book.emotion_profile` is the JSON
+    view of those totals read by the recommendation engine. Review writes
+    apply the delta of a single review, so profiles never need rebuilding from
+    raw reviews at request time.
+    """
+
+    def __init__(self, db: Session, emotion_extractor: Optional[EmotionExtractor] = None):
+        self.db = db
+        self._emotion_extractor = emotion_extractor
+
+    @property
+    def emotion_extractor(self) -> EmotionExtractor:
+        if self._emotion_extractor is None:
+            from app.services.mood_recommendation.emotion_extractor import emotion_extractor
+            self._emotion_extractor = emotion_extractor
+        return self._emotion_extractor
+
+    # --- Helpers ---
+    def extract_counts(self, text: Optional[str]) -> dict[str, int]:
+        """Non-zero emotion counts for one review text."""
+        if not text:
+            return {}
+        counts = self.emotion_extractor.extract_emotions(text).get("counts", {})
+        return {emotion: int(count) for emotion, count in counts.items() if count}
+
+    def build_profile(self, counts: dict[str, int], scores: Mapping[str, float]) -> dict[str, dict[str, float]]:
+        """Stored profile format: {emotion: {"count": int, "score": sum of review scores}}."""
+        emotions = list(self.emotion_extractor.emotion_lexicon)
+        for emotion in counts:
+            if emotion not in emotions:
+                emotions.append(emotion)
+        return {
+            emotion: {"count": counts.get(emotion, 0), "score": float(scores.get(emotion, 0.0))}
+            for emotion in emotions
+        }
+
+    def get_counts(self, book_id: str) -> dict[str, int]:
+        return self.get_totals(book_id)[0]
+
+    def get_totals(self, book_id: str) -> tuple[dict[str, int], dict[str, float]]:
+        """A book's ({emotion: count}, {emotion: summed score})."""
+        rows = self.db.execute(
+            select(BookEmotionCount.emotion, BookEmotionCount.count, BookEmotionCount.score)
+            .where(BookEmotionCount.book_id == book_id)
+        ).all()
+        return {emotion: count for emotion, count, _ in rows}, {emotion: score for emotion, _, score in rows}
+
+    def _write_profile(self, book_id: str, counts: dict[str, int], scores: Mapping[str, float]) -> dict[str, float]:
+        profile = self.build_profile(counts, scores)
+        self.db.execute(
+            update(Book).where(Book.book_id == book_id).values(emotion_profile=json.dumps(profile))
+        )
+        return {emotion: data["score"] for emotion, data in profile.items()}
+
+    # --- Commands (caller commits) ---
+    def apply_review_change(
+        self,
+        book_id: str,
+        old_text: Optional[str],
+        new_text: Optional[str],
+    ) -> Optional[dict[str, float]]:
+        """
+        Apply the emotion delta of one review being added, edited or removed.
+
+        Returns the book's new emotion scores, or None when nothing changed or
+        extraction failed (the book is left for the next offline rebuild).
+        """
+        if old_text == new_text:
+            return None
+        try:
+            new_counts = self.extract_counts(new_text)
+            old_counts = self.extract_counts(old_text)
+        except Exception as e:
+            logger.warning(f"Emotion extraction failed for book {book_id}; profile not updated: {e}")
+            return None
+
+        delta = dict(new_counts)
+        for emotion, count in old_counts.items():
+            delta[emotion] = delta.get(emotion, 0) - count
+        # Equal counts give equal scores
+        if not any(delta.values()):
+            return None
+        score_delta = review_scores(new_counts)
+        for emotion, score in review_scores(old_counts).items():
+            score_delta[emotion] = score_delta.get(emotion, 0.0) - score
+
+        for emotion in delta.keys() | score_delta.keys():
+            count, score = delta.get(emotion, 0), score_delta.get(emotion, 0.0)
+            if not count and not score:
+                continue
+            result = self.db.execute(
+                update(BookEmotionCount)
+                .where(BookEmotionCount.book_id == book_id, BookEmotionCount.emotion == emotion)
+                .values(count=BookEmotionCount.count + count, score=BookEmotionCount.score + score)
+            )
+            if result.rowcount == 0 and count > 0:
+                self.db.execute(
+                    insert(BookEmotionCount).values(book_id=book_id, emotion=emotion, count=count, score=score)
+                )
+        self.db.execute(
+            delete(BookEmotionCount).where(BookEmotionCount.book_id == book_id, BookEmotionCount.count <= 0)
+        )
+        return self._write_profile(book_id, *self.get_totals(book_id))
+
+    def rebuild_book(
+        self,
+        book_id: str,
+        review_texts: Iterable[Optional[str]],
+        built_at: Optional[datetime] = None,
+    ) -> dict[str, int]:
+        """Replace a book's counts and stored profile with ones built from all its reviews."""
+        counts: dict[str, int] = {}
+        scores: dict[str, float] = {}
+        for text in review_texts:
+            review_counts = self.extract_counts(text)
+            for emotion, count in review_counts.items():
+                counts[emotion] = counts.get(emotion, 0) + count
+            for emotion, score in review_scores(review_counts).items():
+                scores[emotion] = scores.get(emotion, 0.0) + score
+
+        self.write_counts_bulk({book_id: counts}, {book_id: scores}, built_at=built_at)
+        return counts
+
+    def write_counts_bulk(
+        self,
+        counts_by_book: Mapping[str, Mapping[str, int]],
+        scores_by_book: Mapping[str, Mapping[str, float]],
+        chunk_size: int = 500,
+        built_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Replace the counts, summed review scores and stored profiles of many
+        books at once (`scores_by_book` may leave out books without scores).
+
+        Uses one DELETE per chunk of books plus executemany INSERT/UPDATE
+        batches, so a rebuild costs a handful of statements per chunk instead
+        of several per book. `built_at` is recorded as the books'
+        `profile_built_at` watermark. Returns the number of books written.
+        """
+        book_ids = list(counts_by_book)
+        for start in range(0, len(book_ids), chunk_size):
+            chunk = book_ids[start:start + chunk_size]
+            self.db.execute(delete(BookEmotionCount).where(BookEmotionCount.book_id.in_(chunk)))
+
+            count_rows = [
+                {
+                    "book_id": book_id,
+                    "emotion": emotion,
+                    "count": count,
+                    "score": float(scores_by_book.get(book_id, {}).get(emotion, 0.0)),
+                }
+                for book_id in chunk
+                for emotion, count in counts_by_book[book_id].items()
+                if count > 0
+            ]
+            if count_rows:
+                self.db.execute(insert(BookEmotionCount), count_rows)
+
+            profile_rows = [
+                {
+                    "book_id": book_id,
+                    "emotion_profile": json.dumps(
+                        self.build_profile(dict(counts_by_book[book_id]), scores_by_book.get(book_id, {}))
+                    ),
+                }
+                for book_id in chunk
+            ]
+            if built_at is not None:
+                for row in profile_rows:
+                    row["profile_built_at"] = built_at
+            self.db.execute(update(Book), profile_rows)
+        return len(book_ids)
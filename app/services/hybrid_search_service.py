@@ -0,0 +1,128 @@
+# app/services/hybrid_search_service.py
+
+"""
+Hybrid book search: FTS5/BM25 keyword hits fused with Chroma vector hits.
+
+The two rankings are combined with reciprocal rank fusion (RRF), which only
+looks at positions, so BM25 scores and embedding distances never have to be
+put on a common scale. Books whose title is the query are pinned ahead of
+the fused list; they are found by an indexed title lookup, so the vector side
+is only ever asked for as many results as the requested page needs.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.services.book_search_service import BookSearchService
+
+logger = logging.getLogger(__name__)
+
+# Standard RRF damping constant; larger values flatten the head of each list
+RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+# Vector queries run here while the keyword query runs on the caller's
+# thread (the SQLAlchemy session must stay on the thread that owns it)
+_vector_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("HYBRID_SEARCH_WORKERS", "4")),
+    thread_name_prefix="hybrid-vector",
+)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K) -> list[tuple[str, float]]:
+    """
+    Fuse ranked id lists: each id scores sum(1 / (k + rank)) over the lists
+    it appears in (rank starting at 1). Ties keep first-seen order.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class HybridSearchService:
+    """Keyword + vector search over the catalogue, fused with RRF."""
+
+    def __init__(self, db: Session, chroma_service: Any, rrf_k: int = RRF_K):
+        self.db = db
+        self.chroma_service = chroma_service
+        self.rrf_k = rrf_k
+        self.keyword = BookSearchService(db)
+
+    def _vector_hits(self, query: str, n_results: int, distance_threshold: float) -> list[dict]:
+        try:
+            return self.chroma_service.search_books(
+                query, n_results=n_results, distance_threshold=distance_threshold
+            )
+        except Exception as e:
+            # Keyword results are still useful when the embedding provider is down
+            logger.warning(f"Vector search failed for hybrid query '{query}': {e}", exc_info=True)
+            return []
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        offset: int = 0,
+        distance_threshold: float = 0.9,
+    ) -> tuple[list[dict[str, Any]], Optional[int]]:
+        """
+        One page of hybrid results and the offset of the next page (None on the last page).
+
+        Each hit has book_id, title, score (RRF, higher is better), exact_title,
+        and the book's rank/score on each side it was found on.
+        """
+        depth = offset + limit
+        vector_future = _vector_pool.submit(self._vector_hits, query, depth, distance_threshold)
+        try:
+            exact = self.keyword.exact_title_matches(query, limit=depth)
+            lexical = self.keyword.search(query, limit=depth)
+        finally:
+            vector = vector_future.result()
+
+        hits: dict[str, dict[str, Any]] = {}
+        for rank, hit in enumerate(lexical, start=1):
+            hits[hit["book_id"]] = {
+                "book_id": hit["book_id"],
+                "title": hit["title"],
+                "lexical_rank": rank,
+                "bm25": hit["score"],
+            }
+        for rank, hit in enumerate(vector, start=1):
+            entry = hits.setdefault(hit["id"], {"book_id": hit["id"], "title": hit.get("title")})
+            entry.update(vector_rank=rank, distance=hit["distance"])
+
+        fused = reciprocal_rank_fusion(
+            [[hit["book_id"] for hit in lexical], [hit["id"] for hit in vector]], k=self.rrf_k
+        )
+        pinned = [hit["book_id"] for hit in exact]
+        pinned_ids = set(pinned)
+        for hit in exact:
+            hits.setdefault(hit["book_id"], {"book_id": hit["book_id"], "title": hit["title"]})
+        fused_scores = dict(fused)
+        order = pinned + [book_id for book_id, _ in fused if book_id not in pinned_ids]
+
+        page = []
+        for book_id in order[offset:depth]:
+            entry = hits[book_id]
+            page.append(
+                {
+                    "book_id": book_id,
+                    "title": entry.get("title"),
+                    "score": fused_scores.get(book_id, 0.0),
+                    "exact_title": book_id in pinned_ids,
+                    "lexical_rank": entry.get("lexical_rank"),
+                    "bm25": entry.get("bm25"),
+                    "vector_rank": entry.get("vector_rank"),
+                    "distance": entry.get("distance"),
+                }
+            )
+        # Either side came back full, so a deeper page may hold more
+        more = len(order) > depth or len(lexical) >= depth or len(vector) >= depth
+        return page, (depth if more and page else None)
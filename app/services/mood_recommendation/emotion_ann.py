@@ -0,0 +1,126 @@
+"""
+Approximate nearest-neighbour search over normalised emotion vectors.
+
+`IVFIndex` is an inverted-file index built in NumPy: rows are clustered with
+spherical k-means and a query only scores the rows of the `n_probe` clusters
+whose centroids are closest to it. Exclusions (e.g. the user's read set) are
+handled by over-fetching: more clusters are probed until enough rows survive
+the filter.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.services.mood_recommendation.emotion_index import top_k_indices
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of an L2-normalised float32 matrix.
+
+    The index keeps a reference to `vectors`, so in-place row updates are seen
+    by scoring immediately; rows whose cluster may have changed should be
+    passed to `add_pending()` so they are scored on every query until the next
+    rebuild. All-zero rows (books without a profile) are never indexed.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        *,
+        n_iter: int = 10,
+        sample_size: int = 100_000,
+        seed: int = 0,
+        assign_batch: int = 16_384,
+    ):
+        self.vectors = vectors
+        self._assign_batch = assign_batch
+        indexed = np.flatnonzero(np.any(vectors != 0, axis=1))
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(indexed)))
+        n_lists = max(1, min(n_lists, len(indexed)))
+
+        self.centroids = self._train(vectors[indexed], n_lists, n_iter, sample_size, np.random.default_rng(seed))
+        assignments = self._assign(vectors[indexed])
+        order = np.argsort(assignments, kind="stable")
+        self._rows = indexed[order]
+        self._offsets = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self._pending: set[int] = set()
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def _assign(self, rows: np.ndarray) -> np.ndarray:
+        """Nearest centroid (by cosine) for each row, in batches to bound memory."""
+        assignments = np.empty(len(rows), dtype=np.intp)
+        for start in range(0, len(rows), self._assign_batch):
+            block = rows[start:start + self._assign_batch]
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train(self, rows, n_lists, n_iter, sample_size, rng) -> np.ndarray:
+        if len(rows) == 0:
+            return np.zeros((1, self.vectors.shape[1]), dtype=np.float32)
+        if len(rows) > sample_size:
+            rows = rows[rng.choice(len(rows), sample_size, replace=False)]
+        self.centroids = rows[rng.choice(len(rows), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = self._assign(rows)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, rows)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            np.divide(sums, norms, out=self.centroids, where=norms > 0)
+        return self.centroids
+
+    def add_pending(self, rows: Iterable[int]) -> None:
+        """Always score these rows (their cluster may be stale after an update)."""
+        self._pending.update(int(row) for row in rows)
+
+    def _candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        lists = top_k_indices(self.centroids @ query, n_probe)
+        parts = [self._rows[self._offsets[i]:self._offsets[i + 1]] for i in lists]
+        if self._pending:
+            parts.append(np.fromiter(self._pending, dtype=np.intp))
+        if not parts:
+            return np.zeros(0, dtype=np.intp)
+        return np.unique(np.concatenate(parts))
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        n_probe: int = 8,
+        exclude: Optional[np.ndarray] = None,
+        min_similarity: Optional[float] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k rows for a normalised `query`: (indices, similarities).
+
+        Rows flagged in `exclude`, or scoring at or below `min_similarity`, are
+        dropped; the probe count doubles until `k` rows survive or every
+        cluster has been searched.
+        """
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        n_probe = max(1, min(n_probe, self.n_lists))
+        while True:
+            candidates = self._candidates(query, n_probe)
+            if exclude is not None and len(candidates):
+                candidates = candidates[~exclude[candidates]]
+            scores = self.vectors[candidates] @ query
+            if min_similarity is not None:
+                keep = scores > min_similarity
+                candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) >= k or n_probe >= self.n_lists:
+                break
+            n_probe = min(n_probe * 2, self.n_lists)
+
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
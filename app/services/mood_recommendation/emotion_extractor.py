@@ -1,9 +1,35 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
 from app.services.mood_recommendation.preprocessing import TextPreprocessor
 
+logger = logging.getLogger(__name__)
+
 
 class EmotionExtractor:
-    def __init__(self, emotion_lexicon):
+    """
+    Lexicon-based emotion extractor.
+
+    By default the lexicon is compiled into a vocabulary -> column map and a
+    (vocabulary x emotion) incidence matrix, so a text's counts are one
+    `np.bincount` and a matrix product. Per-text results are memoised in an
+    LRU cache keyed by a hash of the text, so repeated moods and duplicated
+    reviews skip preprocessing entirely.
+    """
+
+    # Texts counted per bincount; bounds the dense (texts x vocabulary) block.
+    _COUNT_BLOCK = 1024
+
+    def __init__(self, emotion_lexicon, compiled=True, cache_size=4096):
         self.emotion_lexicon = emotion_lexicon
+        self.compiled = compiled
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.preprocessor = TextPreprocessor()
 
         # Create reverse mapping: word -> emotions
@@ -14,38 +40,134 @@ class EmotionExtractor:
                     self.word_to_emotions[word] = []
                 self.word_to_emotions[word].append(emotion)
 
-    def extract_emotions(self, review_text):
+        # Compiled form: word -> row, rows x emotions incidence (a word listed
+        # twice under one emotion counts twice, as in the reverse mapping).
+        self._emotions = list(emotion_lexicon.keys())
+        self._vocabulary = {word: i for i, word in enumerate(self.word_to_emotions)}
+        emotion_columns = {emotion: i for i, emotion in enumerate(self._emotions)}
+        self._incidence = np.zeros((len(self._vocabulary), len(self._emotions)), dtype=np.int64)
+        for word, emotions in self.word_to_emotions.items():
+            for emotion in emotions:
+                self._incidence[self._vocabulary[word], emotion_columns[emotion]] += 1
+
+    @property
+    def preprocessor(self):
+        return self._preprocessor
+
+    @preprocessor.setter
+    def preprocessor(self, preprocessor):
+        # Cached results are only valid for the preprocessor that produced them.
+        self._preprocessor = preprocessor
+        self.clear_cache()
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _cache_key(review_text):
+        if not isinstance(review_text, str):
+            return None
+        return hashlib.blake2b(review_text.encode("utf-8"), digest_size=16).digest()
+
+    def _cache_get(self, key):
+        if key is None or self.cache_size <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _cache_put(self, key, entry):
+        if key is None or self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _token_ids(self, tokens):
+        lookup = self._vocabulary.get
+        return [i for i in map(lookup, tokens) if i is not None]
+
+    def _count_tokens(self, tokens):
+        """Uncompiled per-token loop, kept for `compiled=False` and as a reference."""
+        columns = {emotion: i for i, emotion in enumerate(self._emotions)}
+        counts = np.zeros(len(self._emotions), dtype=np.int64)
+        for token in tokens:
+            for emotion in self.word_to_emotions.get(token, ()):
+                counts[columns[emotion]] += 1
+        return counts
+
+    def _count_block(self, token_lists):
+        """Counts for several token lists with a single bincount over (text, word) ids."""
+        vocabulary_size = len(self._vocabulary)
+        flat_ids = []
+        for row, tokens in enumerate(token_lists):
+            offset = row * vocabulary_size
+            flat_ids.extend(offset + i for i in self._token_ids(tokens))
+        word_counts = np.bincount(flat_ids, minlength=len(token_lists) * vocabulary_size)
+        return word_counts.reshape(len(token_lists), vocabulary_size) @ self._incidence
+
+    def _count_vectors(self, review_list):
         """
-        Extract emotions from review text using lexicon matching
-        Returns: Dictionary with emotion counts and scores
+        (counts, total_words) for each text, served from the cache where possible.
+
+        Cache misses are preprocessed individually but counted together: one
+        bincount over (text, word) pairs and one matrix product for the batch.
         """
-        # Preprocess text
-        tokens = self.preprocessor.preprocess(review_text)
+        results = [None] * len(review_list)
+        missing = {}
+        for position, review in enumerate(review_list):
+            key = self._cache_key(review)
+            entry = self._cache_get(key)
+            if entry is not None:
+                results[position] = entry
+            elif key is not None and key in missing:
+                missing[key][1].append(position)
+            else:
+                missing[key if key is not None else ("uncached", position)] = (review, [position])
 
-        # Initialize emotion counters
-        emotion_counts = {emotion: 0 for emotion in self.emotion_lexicon.keys()}
+        if not missing:
+            return results
 
-        # Count emotion word matches
-        total_matches = 0
-        for token in tokens:
-            if token in self.word_to_emotions:
-                for emotion in self.word_to_emotions[token]:
-                    emotion_counts[emotion] += 1
-                    total_matches += 1
+        token_lists = [self.preprocessor.preprocess(review) for review, _ in missing.values()]
+        if self.compiled:
+            batch_counts = []
+            for start in range(0, len(token_lists), self._COUNT_BLOCK):
+                batch_counts.extend(self._count_block(token_lists[start:start + self._COUNT_BLOCK]))
+        else:
+            batch_counts = [self._count_tokens(tokens) for tokens in token_lists]
+
+        for (key, (_, positions)), tokens, counts in zip(missing.items(), token_lists, batch_counts):
+            counts.flags.writeable = False
+            entry = (counts, len(tokens))
+            if not isinstance(key, tuple):
+                self._cache_put(key, entry)
+            for position in positions:
+                results[position] = entry
+        return results
 
-        # Calculate normalized scores (percentages)
-        emotion_scores = {}
+    def _scores(self, counts, total_matches):
         if total_matches > 0:
-            for emotion, count in emotion_counts.items():
-                emotion_scores[emotion] = (count / total_matches) * 100
-        else:
-            emotion_scores = {emotion: 0 for emotion in emotion_counts.keys()}
+            return {emotion: (int(count) / total_matches) * 100 for emotion, count in zip(self._emotions, counts)}
+        return {emotion: 0 for emotion in self._emotions}
+
+    def extract_emotions(self, review_text):
+        """
+        Extract emotions from review text using lexicon matching
+        Returns: Dictionary with emotion counts and scores
+        """
+        counts, total_words = self._count_vectors([review_text])[0]
+        total_matches = int(counts.sum())
 
         return {
-            'counts': emotion_counts,
-            'scores': emotion_scores,
+            'counts': {emotion: int(count) for emotion, count in zip(self._emotions, counts)},
+            'scores': self._scores(counts, total_matches),
             'total_emotion_words': total_matches,
-            'total_words': len(tokens)
+            'total_words': total_words
         }
 
     def get_top_emotions(self, review_text, top_n=5):
@@ -62,29 +184,23 @@ class EmotionExtractor:
     def extract_emotions_batch(self, review_list):
         """
         Extract emotions from multiple reviews
-        Returns aggregated emotion profile
+        Returns aggregated emotion profile; 'score_sums' adds up each review's own scores
         """
-        aggregated_counts = {emotion: 0 for emotion in self.emotion_lexicon.keys()}
-        total_reviews = len(review_list)
-
-        for review in review_list:
-            result = self.extract_emotions(review)
-            for emotion, count in result['counts'].items():
-                aggregated_counts[emotion] += count
-
-        # Calculate average scores
-        total_counts = sum(aggregated_counts.values())
-        aggregated_scores = {}
-        if total_counts > 0:
-            for emotion, count in aggregated_counts.items():
-                aggregated_scores[emotion] = (count / total_counts) * 100
-        else:
-            aggregated_scores = {emotion: 0 for emotion in aggregated_counts.keys()}
+        review_list = list(review_list)
+        aggregated = np.zeros(len(self._emotions), dtype=np.int64)
+        score_sums = np.zeros(len(self._emotions), dtype=np.float64)
+        for counts, _ in self._count_vectors(review_list):
+            aggregated += counts
+            matches = int(counts.sum())
+            if matches:
+                score_sums += counts / matches * 100
+        total_counts = int(aggregated.sum())
 
         return {
-            'counts': aggregated_counts,
-            'scores': aggregated_scores,
-            'num_reviews': total_reviews
+            'counts': {emotion: int(count) for emotion, count in zip(self._emotions, aggregated)},
+            'scores': self._scores(aggregated, total_counts),
+            'score_sums': {emotion: float(score) for emotion, score in zip(self._emotions, score_sums)},
+            'num_reviews': len(review_list)
         }
 
 
@@ -220,8 +336,43 @@ emotion_lexicon = {
     ]
 }
 
-# Initialize emotion extractor
-emotion_extractor = EmotionExtractor(emotion_lexicon)
-print("✓ Emotion extractor initialized")
+class _LazyEmotionExtractor:
+    """
+    Shared extractor built on first use.
+
+    Building loads stopwords and WordNet (and may download them), so it is
+    deferred until a request needs it or `warm_up()` runs at startup.
+    Attribute access is forwarded to the real extractor.
+    """
+
+    def __init__(self, lexicon):
+        self._lexicon = lexicon
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self):
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = EmotionExtractor(self._lexicon)
+                    logger.info("Emotion extractor initialized")
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def warm_up():
+    """Build the shared extractor and load WordNet so the first request doesn't pay for it."""
+    emotion_extractor.get().extract_emotions("warm up")
+
+
+# Shared emotion extractor (built lazily on first use)
+emotion_extractor = _LazyEmotionExtractor(emotion_lexicon)
+
 
 
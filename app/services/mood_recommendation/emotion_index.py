@@ -0,0 +1,326 @@
+"""
+Dense emotion matrix used to score recommendation candidates.
+
+Every catalogue book becomes one float32 row of emotion scores, L2-normalised,
+so cosine similarity against a query is a single matrix-vector product. The
+process-wide `emotion_index` keeps the catalogue matrix between requests and
+is invalidated whenever books, reviews or stored profiles change. Very large
+catalogues additionally get an approximate index (see emotion_ann).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.book import Book
+
+
+def parse_emotion_profile(raw: Optional[str]) -> Optional[dict[str, dict[str, float]]]:
+    """
+    Parse a stored `Book.emotion_profile` JSON string.
+
+    Returns {emotion: {"score": float, "count": int}} or None when the profile
+    is missing or malformed.
+    """
+    if not raw:
+        return None
+    try:
+        saved_profile = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(saved_profile, dict):
+        return None
+    try:
+        return {
+            emotion: {
+                "score": float(data.get("score", 0.0)),
+                "count": int(data.get("count", 0)),
+            }
+            for emotion, data in saved_profile.items()
+        }
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class EmotionMatrix:
+    """Books x emotions float32 matrix with L2-normalised rows."""
+
+    def __init__(self, book_ids: Sequence[Any], emotions: Sequence[str], vectors: np.ndarray):
+        self.book_ids = list(book_ids)
+        self.emotions = list(emotions)
+        self.vectors = vectors
+        self.row_index = {book_id: i for i, book_id in enumerate(self.book_ids)}
+        self.column_index = {emotion: i for i, emotion in enumerate(self.emotions)}
+        # Optional approximate index (IVFIndex) used by `search`; None = exact scan
+        self.ann = None
+        self.ann_probe = 8
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    @classmethod
+    def from_scores(cls, scores_by_book: Mapping[Any, Mapping[str, float]]) -> "EmotionMatrix":
+        """Build a matrix from {book_id: {emotion: score}}; zero rows stay zero."""
+        emotions = sorted({emotion for scores in scores_by_book.values() for emotion in scores})
+        column_index = {emotion: i for i, emotion in enumerate(emotions)}
+
+        vectors = np.zeros((len(scores_by_book), len(emotions)), dtype=np.float32)
+        for row, scores in enumerate(scores_by_book.values()):
+            for emotion, score in scores.items():
+                vectors[row, column_index[emotion]] = float(score)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return cls(list(scores_by_book.keys()), emotions, vectors)
+
+    def query_vector(self, scores: Mapping[str, float]) -> np.ndarray:
+        """
+        Project a query onto the matrix columns, normalised by the full query norm.
+
+        Emotions the catalogue has never seen still count towards the norm, which
+        keeps the result identical to a cosine over the union of keys.
+        """
+        query = np.zeros(len(self.emotions), dtype=np.float32)
+        norm = float(np.sqrt(sum(float(v) * float(v) for v in scores.values())))
+        if norm == 0.0:
+            return query
+        for emotion, score in scores.items():
+            column = self.column_index.get(emotion)
+            if column is not None:
+                query[column] = float(score) / norm
+        return query
+
+    def similarities(self, scores: Mapping[str, float]) -> np.ndarray:
+        """Cosine similarity of every row against `scores`."""
+        if not len(self):
+            return np.zeros(0, dtype=np.float32)
+        return self.vectors @ self.query_vector(scores)
+
+    def search(
+        self,
+        scores: Mapping[str, float],
+        k: int,
+        *,
+        exclude: Optional[np.ndarray] = None,
+        min_similarity: Optional[float] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows most similar to `scores`: (indices, similarities), best first.
+
+        Uses the attached ANN index when there is one, otherwise an exact scan.
+        Rows in `exclude` or scoring at or below `min_similarity` are skipped.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+        if self.ann is not None:
+            return self.ann.search(
+                self.query_vector(scores),
+                k,
+                n_probe=self.ann_probe,
+                exclude=exclude,
+                min_similarity=min_similarity,
+            )
+        similarities = self.similarities(scores)
+        if min_similarity is not None:
+            below = similarities <= min_similarity
+            exclude = below if exclude is None else exclude | below
+        indices = top_k_indices(similarities, k, exclude=exclude)
+        return indices, similarities[indices]
+
+    def iter_search(
+        self,
+        scores: Mapping[str, float],
+        *,
+        exclude: Optional[np.ndarray] = None,
+        initial: int = 16,
+    ) -> Iterator[tuple[int, float]]:
+        """Yield (index, similarity) best first, widening `search` lazily."""
+        if self.ann is None:
+            similarities = self.similarities(scores)
+            for index in iter_ranked_indices(similarities, exclude=exclude, initial=initial):
+                yield index, float(similarities[index])
+            return
+
+        seen: set[int] = set()
+        k = max(initial, 1)
+        while True:
+            indices, similarities = self.search(scores, k, exclude=exclude)
+            for index, similarity in zip(indices.tolist(), similarities.tolist()):
+                if index not in seen:
+                    seen.add(index)
+                    yield index, similarity
+            if len(indices) < k:
+                return
+            k *= 4
+
+    def mask(self, book_ids: Iterable[Any]) -> np.ndarray:
+        """Boolean row mask selecting the given book ids (unknown ids are ignored)."""
+        selected = np.zeros(len(self), dtype=bool)
+        rows = [self.row_index[b] for b in book_ids if b in self.row_index]
+        if rows:
+            selected[rows] = True
+        return selected
+
+
+def top_k_indices(scores: np.ndarray, k: int, *, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first.
+
+    Uses `argpartition` so cost is O(n) plus a sort of the boundary set; ties
+    keep catalogue order, matching a stable descending sort. Rows flagged in
+    `exclude` are never returned.
+    """
+    if exclude is not None and exclude.any():
+        scores = np.where(exclude, -np.inf, scores)
+        available = int(len(scores) - np.count_nonzero(exclude))
+    else:
+        available = len(scores)
+    k = min(k, available)
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    if k < len(scores):
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    candidates = candidates[np.isfinite(scores[candidates])]
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order][:k]
+
+
+def iter_ranked_indices(
+    scores: np.ndarray,
+    *,
+    exclude: Optional[np.ndarray] = None,
+    initial: int = 16,
+) -> Iterator[int]:
+    """
+    Yield indices in descending score order, widening the top-k window lazily.
+
+    Useful when candidates are post-filtered (e.g. by rating) and only the
+    first few survivors are needed.
+    """
+    yielded = 0
+    k = max(initial, 1)
+    while True:
+        ranked = top_k_indices(scores, k, exclude=exclude)
+        for index in ranked[yielded:]:
+            yield int(index)
+        if len(ranked) < k:
+            return
+        yielded = len(ranked)
+        k *= 4
+
+
+class EmotionIndex:
+    """
+    Process-wide cache of the catalogue EmotionMatrix, one per database bind.
+
+    The matrix is rebuilt lazily after `invalidate()` or once it is older than
+    `ttl_seconds`, so writes made by other processes (e.g. the offline profile
+    builder) are eventually picked up. Catalogues of `ann_min_books` or more
+    also get an approximate IVF index, built alongside the matrix.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        ann_min_books: Optional[int] = None,
+        ann_probe: Optional[int] = None,
+    ):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("EMOTION_INDEX_TTL_SECONDS", "300"))
+        if ann_min_books is None:
+            ann_min_books = int(os.getenv("EMOTION_ANN_MIN_BOOKS", "200000"))
+        if ann_probe is None:
+            ann_probe = int(os.getenv("EMOTION_ANN_PROBE", "8"))
+        self.ttl_seconds = ttl_seconds
+        # Catalogues at least this large get an IVF index (0 disables it)
+        self.ann_min_books = ann_min_books
+        self.ann_probe = ann_probe
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: dict[Any, tuple[int, float, EmotionMatrix]] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Drop every cached matrix; the next lookup rebuilds from the database."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def update_book(self, book_id: Any, scores: Mapping[str, float]) -> None:
+        """
+        Refresh one book's row in every cached matrix after its profile changed.
+
+        Falls back to a full invalidation when the book or one of its emotions
+        is not yet part of a cached matrix.
+        """
+        with self._lock:
+            for _, _, matrix in self._entries.values():
+                row = matrix.row_index.get(book_id)
+                if row is None or any(e not in matrix.column_index for e, s in scores.items() if s):
+                    self._version += 1
+                    self._entries.clear()
+                    return
+                vector = np.zeros(len(matrix.emotions), dtype=np.float32)
+                for emotion, score in scores.items():
+                    if emotion in matrix.column_index:
+                        vector[matrix.column_index[emotion]] = float(score)
+                norm = np.linalg.norm(vector)
+                matrix.vectors[row] = vector / norm if norm > 0 else vector
+                if matrix.ann is not None:
+                    matrix.ann.add_pending([row])
+
+    def get_matrix(self, db: Session) -> EmotionMatrix:
+        """
+        Return the catalogue matrix for `db`'s bind, building it if stale.
+
+        Books without a stored profile get an all-zero row.
+        """
+        key = db.get_bind()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, built_at, matrix = entry
+                if version == self._version and now - built_at < self.ttl_seconds:
+                    return matrix
+            version = self._version
+
+        matrix = self._build(db)
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (version, now, matrix)
+        return matrix
+
+    def _build(self, db: Session) -> EmotionMatrix:
+        rows = db.execute(select(Book.book_id, Book.emotion_profile)).all()
+        scores_by_book: dict[Any, Mapping[str, float]] = {}
+        for book_id, raw_profile in rows:
+            profile = parse_emotion_profile(raw_profile) or {}
+            scores_by_book[book_id] = {emotion: data["score"] for emotion, data in profile.items()}
+        matrix = EmotionMatrix.from_scores(scores_by_book)
+        if self.ann_min_books > 0 and len(matrix) >= self.ann_min_books:
+            from app.services.mood_recommendation.emotion_ann import IVFIndex
+
+            matrix.ann = IVFIndex(matrix.vectors)
+            matrix.ann_probe = self.ann_probe
+        return matrix
+
+
+# Shared catalogue index (rebuilt lazily on first use)
+emotion_index = EmotionIndex()
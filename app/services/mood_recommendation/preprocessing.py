@@ -1,5 +1,8 @@
+import os
 import re
-from typing import Any
+import threading
+from functools import lru_cache
+from typing import Any, Optional
 
 import nltk
 from nltk.corpus import stopwords
@@ -7,6 +10,17 @@ from nltk.stem import WordNetLemmatizer
 from nltk.tokenize import word_tokenize
 
 
+# Keep runtime dependencies minimal: only ensure resources needed by tokenizer/lemmatizer.
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+
+_resources_lock = threading.Lock()
+_ensured_resources: set[str] = set()
+
+
 def _ensure_nltk_resource(resource_path: str, download_name: str) -> None:
     try:
         nltk.data.find(resource_path)
@@ -14,20 +28,64 @@ def _ensure_nltk_resource(resource_path: str, download_name: str) -> None:
         nltk.download(download_name, quiet=True)
 
 
-# Keep runtime dependencies minimal: only ensure resources needed by tokenizer/lemmatizer.
-_ensure_nltk_resource("tokenizers/punkt", "punkt")
-_ensure_nltk_resource("corpora/stopwords", "stopwords")
-_ensure_nltk_resource("corpora/wordnet", "wordnet")
+def ensure_nltk_resources(*download_names: str) -> None:
+    """
+    Find (or download) NLTK data on first use rather than at import time.
+
+    Each resource is checked once per process; concurrent callers wait for the
+    first check instead of racing duplicate downloads.
+    """
+    pending = [name for name in (download_names or NLTK_RESOURCES) if name not in _ensured_resources]
+    if not pending:
+        return
+    with _resources_lock:
+        for name in pending:
+            if name not in _ensured_resources:
+                _ensure_nltk_resource(NLTK_RESOURCES[name], name)
+                _ensured_resources.add(name)
+
+
+# Cleaned text only contains [a-z], whitespace and ".!?". word_tokenize splits
+# "!", "?" and "..." into their own tokens and peels periods off word ends,
+# which is all the fast tokenizer needs to reproduce for lexicon matching.
+_FAST_TOKEN_SPLIT = re.compile(r"[\s!?]+|\.\.\.")
+
+TOKENIZERS = ("nltk", "fast")
 
 
 class TextPreprocessor:
-    def __init__(self):
+    """
+    Review text -> lemmatised tokens for lexicon matching.
+
+    `tokenizer="nltk"` runs punkt's `word_tokenize`; `tokenizer="fast"` splits
+    with one regex and needs no punkt data. Both give the same lexicon words
+    (punctuation-only tokens are where they differ). Lemmas are memoised in a
+    bounded LRU since the vocabulary is tiny next to the token volume.
+    """
+
+    def __init__(self, tokenizer: Optional[str] = None, lemma_cache_size: int = 16384):
+        tokenizer = tokenizer or os.getenv("TEXT_PREPROCESSOR_TOKENIZER", "nltk")
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer {tokenizer!r}; expected one of {TOKENIZERS}")
+        self.tokenizer = tokenizer
+        self.lemma_cache_size = lemma_cache_size
+        ensure_nltk_resources("stopwords", "wordnet", *(("punkt",) if tokenizer == "nltk" else ()))
         self.lemmatizer = WordNetLemmatizer()
         self.stop_words = set(stopwords.words("english"))
         # Preserve negation words because they strongly affect sentiment/emotion.
         negation_words = {"not", "no", "never", "neither", "nobody", "nothing", "nowhere", "n't"}
         self.stop_words = self.stop_words - negation_words
 
+    @property
+    def lemmatizer(self):
+        return self._lemmatizer
+
+    @lemmatizer.setter
+    def lemmatizer(self, lemmatizer):
+        # Memoise per lemmatizer so a replaced lemmatizer never sees stale lemmas.
+        self._lemmatizer = lemmatizer
+        self._lemmatize = lru_cache(maxsize=self.lemma_cache_size)(lemmatizer.lemmatize)
+
     def _is_missing(self, value: Any) -> bool:
         if value is None:
             return True
@@ -52,23 +110,34 @@ class TextPreprocessor:
         if not text:
             return []
 
-        try:
-            tokens = word_tokenize(text)
-        except LookupError:
-            # Graceful fallback if punkt tokenizer data is not available for any reason.
-            tokens = text.split()
+        if self.tokenizer == "fast":
+            tokens = self.fast_tokenize(text)
+        else:
+            try:
+                tokens = word_tokenize(text)
+            except LookupError:
+                # Graceful fallback if punkt tokenizer data is not available for any reason.
+                tokens = text.split()
 
+        lemmatize = self._lemmatize
         processed_tokens = [
-            self.lemmatizer.lemmatize(token)
+            lemmatize(token)
             for token in tokens
             if token not in self.stop_words and len(token) > 2
         ]
         return processed_tokens
 
+    @staticmethod
+    def fast_tokenize(text: str) -> list[str]:
+        """Regex tokenizer for cleaned text; drops punctuation-only tokens."""
+        tokens = []
+        for chunk in _FAST_TOKEN_SPLIT.split(text):
+            token = chunk.strip(".")
+            if token:
+                tokens.append(token)
+        return tokens
+
     def preprocess(self, text: Any) -> list[str]:
         """Complete preprocessing pipeline used by EmotionExtractor."""
         cleaned = self.clean_text(text)
         return self.tokenize_and_lemmatize(cleaned)
-
-
-preprocessor = TextPreprocessor()
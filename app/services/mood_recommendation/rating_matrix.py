@@ -0,0 +1,249 @@
+"""
+Sparse user x book rating matrix used by collaborative filtering.
+
+`RatingMatrix` keeps every review rating in CSR form (NumPy `indptr` /
+`indices` / `ratings` arrays, one row per user), so gathering what a set of
+neighbours rated is a handful of slices and a `np.unique` instead of a query
+per candidate. A transposed (CSC) copy of the row numbers, built with the
+matrix, makes a book's raters one slice as well. The process-wide
+`rating_index` caches one matrix per database bind, applies review writes in
+place and also memoises the emotion scores of individual reviews, which
+neighbour search would otherwise re-extract on every request.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.review import Review
+
+
+class RatingMatrix:
+    """Users x books ratings in CSR form (rows: users, columns: books)."""
+
+    def __init__(
+        self,
+        user_ids: Sequence[Any],
+        book_ids: Sequence[Any],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        ratings: np.ndarray,
+    ):
+        self.user_ids = list(user_ids)
+        self.book_ids = list(book_ids)
+        self.indptr = indptr
+        self.indices = indices
+        self.ratings = ratings
+        self.user_index = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.book_index = {book_id: i for i, book_id in enumerate(self.book_ids)}
+        # CSC view: rows that rated column c are row_indices[col_indptr[c]:col_indptr[c + 1]].
+        # The stable sort keeps each column's rows ascending.
+        rows = np.repeat(np.arange(len(self.user_ids), dtype=np.int32), np.diff(indptr))
+        order = np.argsort(indices, kind="stable")
+        self.col_indptr = np.searchsorted(indices[order], np.arange(len(self.book_ids) + 1))
+        self.row_indices = rows[order]
+        # Writes since the build: {user_id: {book column: rating or None}}
+        self._overrides: dict[Any, dict[int, Optional[float]]] = {}
+        # The same writes by column: {book column: {user_id: None}} (an ordered set)
+        self._column_overrides: dict[int, dict[Any, None]] = {}
+        self.override_count = 0
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[Any, Any, float]]) -> "RatingMatrix":
+        """Build from (user_id, book_id, rating) rows; a pair must appear at most once."""
+        user_index: dict[Any, int] = {}
+        book_index: dict[Any, int] = {}
+        user_codes: list[int] = []
+        book_codes: list[int] = []
+        values: list[float] = []
+        for user_id, book_id, rating in rows:
+            user_codes.append(user_index.setdefault(user_id, len(user_index)))
+            book_codes.append(book_index.setdefault(book_id, len(book_index)))
+            values.append(rating)
+
+        users = np.asarray(user_codes, dtype=np.intp)
+        order = np.argsort(users, kind="stable")
+        indptr = np.searchsorted(users[order], np.arange(len(user_index) + 1))
+        indices = np.asarray(book_codes, dtype=np.int32)[order]
+        ratings = np.asarray(values, dtype=np.float32)[order]
+        return cls(list(user_index), list(book_index), indptr, indices, ratings)
+
+    def user_ratings(self, user_id: Any) -> tuple[np.ndarray, np.ndarray]:
+        """(book columns, ratings) of one user, including writes since the build."""
+        row = self.user_index.get(user_id)
+        if row is None:
+            columns = np.zeros(0, dtype=np.int32)
+            ratings = np.zeros(0, dtype=np.float32)
+        else:
+            start, end = self.indptr[row], self.indptr[row + 1]
+            columns, ratings = self.indices[start:end], self.ratings[start:end]
+
+        overrides = self._overrides.get(user_id)
+        if not overrides:
+            return columns, ratings
+        merged = dict(zip(columns.tolist(), ratings.tolist()))
+        for column, rating in dict(overrides).items():
+            if rating is None:
+                merged.pop(column, None)
+            else:
+                merged[column] = rating
+        return (
+            np.fromiter(merged.keys(), dtype=np.int32, count=len(merged)),
+            np.fromiter(merged.values(), dtype=np.float32, count=len(merged)),
+        )
+
+    def set_rating(self, user_id: Any, book_id: Any, rating: Optional[float]) -> bool:
+        """Record a write (None removes the rating); False when the book is not a column."""
+        column = self.book_index.get(book_id)
+        if column is None:
+            return False
+        self._overrides.setdefault(user_id, {})[column] = rating
+        self._column_overrides.setdefault(column, {})[user_id] = None
+        self.override_count += 1
+        return True
+
+    def book_raters(self, book_id: Any) -> list[Any]:
+        """Users who rated `book_id`, in row order, including writes since the build."""
+        column = self.book_index.get(book_id)
+        if column is None:
+            return []
+        rows = self.row_indices[self.col_indptr[column]:self.col_indptr[column + 1]]
+        raters = {self.user_ids[row]: True for row in rows.tolist()}
+        for user_id in list(self._column_overrides.get(column, ())):
+            if self._overrides[user_id][column] is None:
+                raters.pop(user_id, None)
+            else:
+                raters.setdefault(user_id, True)
+        return list(raters)
+
+    def neighbour_averages(
+        self, user_ids: Iterable[Any], *, min_rating: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Books rated at least `min_rating` by any of `user_ids`, with the mean of
+        those ratings: (book columns, averages), columns ascending.
+        """
+        parts = [self.user_ratings(user_id) for user_id in user_ids]
+        if not parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+        columns = np.concatenate([columns for columns, _ in parts])
+        ratings = np.concatenate([ratings for _, ratings in parts])
+        keep = ratings >= min_rating
+        columns, ratings = columns[keep], ratings[keep]
+        books, inverse = np.unique(columns, return_inverse=True)
+        sums = np.bincount(inverse, weights=ratings, minlength=len(books))
+        counts = np.bincount(inverse, minlength=len(books))
+        return books, sums / np.maximum(counts, 1)
+
+    def book_mask(self, book_ids: Iterable[Any]) -> np.ndarray:
+        """Boolean column mask selecting the given book ids (unknown ids are ignored)."""
+        selected = np.zeros(len(self.book_ids), dtype=bool)
+        columns = [self.book_index[b] for b in book_ids if b in self.book_index]
+        if columns:
+            selected[columns] = True
+        return selected
+
+
+class RatingIndex:
+    """
+    Process-wide cache of the RatingMatrix, one per database bind, plus a
+    bounded memo of per-review emotion scores.
+
+    Review writes are applied to cached matrices in place; the matrix is
+    rebuilt after `invalidate()`, once `max_overrides` writes have piled up, or
+    once it is older than `ttl_seconds` (so other processes' writes are
+    eventually seen).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        review_cache_size: Optional[int] = None,
+        max_overrides: int = 10_000,
+    ):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("RATING_INDEX_TTL_SECONDS", "300"))
+        if review_cache_size is None:
+            review_cache_size = int(os.getenv("REVIEW_EMOTION_CACHE_SIZE", "50000"))
+        self.ttl_seconds = ttl_seconds
+        self.review_cache_size = review_cache_size
+        self.max_overrides = max_overrides
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: dict[Any, tuple[int, float, RatingMatrix]] = {}
+        self._review_scores: OrderedDict[Any, tuple[int, dict]] = OrderedDict()
+
+    def invalidate(self) -> None:
+        """Drop every cached matrix; the next lookup rebuilds from the database."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def set_rating(self, user_id: Any, book_id: Any, rating: Optional[float]) -> None:
+        """Apply one review write (None = review deleted) to every cached matrix."""
+        with self._lock:
+            # A build already in flight may predate this write; don't let it be cached
+            self._version += 1
+            for key, (_, built_at, matrix) in list(self._entries.items()):
+                if not matrix.set_rating(user_id, book_id, rating) or matrix.override_count > self.max_overrides:
+                    self._entries.clear()
+                    return
+                self._entries[key] = (self._version, built_at, matrix)
+
+    def get_matrix(self, db: Session) -> RatingMatrix:
+        """Return the rating matrix for `db`'s bind, building it if stale."""
+        key = db.get_bind()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, built_at, matrix = entry
+                if version == self._version and now - built_at < self.ttl_seconds:
+                    return matrix
+            version = self._version
+
+        rows = db.execute(select(Review.user_id, Review.book_id, Review.rating)).all()
+        matrix = RatingMatrix.from_rows(rows)
+        with self._lock:
+            # Don't cache a matrix that a concurrent write already made stale
+            if version == self._version:
+                self._entries[key] = (version, now, matrix)
+        return matrix
+
+    def review_scores(self, review_id: Any, text: str, extract: Callable[[str], Mapping[str, float]]) -> dict:
+        """
+        Emotion scores of one review's text, memoised by review id.
+
+        The entry is keyed to the text's hash, so an edited review is
+        re-extracted; reviews without an id are never memoised.
+        """
+        if review_id is None or self.review_cache_size <= 0:
+            return dict(extract(text))
+        text_hash = hash(text)
+        with self._lock:
+            entry = self._review_scores.get(review_id)
+            if entry is not None and entry[0] == text_hash:
+                self._review_scores.move_to_end(review_id)
+                return entry[1]
+        scores = dict(extract(text))
+        with self._lock:
+            self._review_scores[review_id] = (text_hash, scores)
+            self._review_scores.move_to_end(review_id)
+            while len(self._review_scores) > self.review_cache_size:
+                self._review_scores.popitem(last=False)
+        return scores
+
+
+rating_index = RatingIndex()
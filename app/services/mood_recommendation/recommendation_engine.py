@@ -1,13 +1,27 @@
 from __future__ import annotations
 
-from typing import Optional, Any, TYPE_CHECKING
-import json
+import logging
+from itertools import islice, takewhile
+from typing import Optional, Any, Iterable, Iterator, TYPE_CHECKING
+
+import numpy as np
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.mood import Mood
-from app.models.review import Review
+from app.services.mood_recommendation.emotion_index import (
+    EmotionMatrix,
+    emotion_index,
+    iter_ranked_indices,
+    parse_emotion_profile,
+    top_k_indices,
+)
+from app.services.mood_recommendation.rating_matrix import rating_index
+from app.services.mood_recommendation.trace import RecommendationTrace
+from app.services.mood_recommendation.user_taste import user_taste_index
+
+logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
     from app.services.book_service import BookService
@@ -15,6 +29,7 @@ if TYPE_CHECKING:
     from app.services.bookshelf_service import BookshelfService
     from app.services.mood_recommendation.emotion_extractor import EmotionExtractor
     from app.services.mood_recommendation.emotion_profiler import BookEmotionProfiler
+    from app.services.mood_recommendation.result_cache import RecommendationCache
 
 
 class RecommendationEngine:
@@ -33,6 +48,8 @@ class RecommendationEngine:
         db: Optional[Session] = None,
         emotion_extractor_instance: Optional[EmotionExtractor] = None,
         emotion_profiler_instance: Optional[BookEmotionProfiler] = None,
+        result_cache: Optional[RecommendationCache] = None,
+        trace: Optional[RecommendationTrace] = None,
     ) -> None:
         # Core services for pulling data
         self.book_service = book_service
@@ -40,6 +57,10 @@ class RecommendationEngine:
         self.bookshelf_service = bookshelf_service
         # Optional DB session used for mood lookup
         self.db = db
+        # Optional RecommendationCache shared across requests; None = always compute
+        self.result_cache = result_cache
+        # Per-request step trace; disabled unless the caller asked for one
+        self.trace = trace or RecommendationTrace()
 
         # Emotion tools (allow injection for testing)
         if emotion_extractor_instance is None:
@@ -65,42 +86,32 @@ class RecommendationEngine:
 
     def get_emotion_profile(self, book_id, book_title, reviews):
         """
-        Get or build an emotion profile for a book.
-        
-        First tries to load from saved book.emotion_profile DB column (JSON).
-        Falls back to building from reviews if not saved.
+        Get the emotion profile for a book.
+
+        With a DB session the stored book.emotion_profile column (maintained on
+        review writes) is authoritative; a book without one has an empty profile.
+        Without a session the profile is built from the given reviews.
         """
-        # Try to load saved profile from DB if we have a session
-        if self.db is not None:
-            try:
-                from app.models.book import Book
-                book = self.db.query(Book).filter(Book.book_id == book_id).first()
-                if book and book.emotion_profile:
-                    try:
-                        saved_profile = json.loads(book.emotion_profile)
-                        # Convert saved format back to expected format
-                        emotion_scores = {
-                            emotion: data.get("score", 0.0) 
-                            for emotion, data in saved_profile.items()
-                        }
-                        emotion_counts = {
-                            emotion: data.get("count", 0) 
-                            for emotion, data in saved_profile.items()
-                        }
-                        print(f"  ✓ Loaded saved profile for book {book_id} from DB")
-                        return {
-                            'title': book_title,
-                            'num_reviews': len(reviews),
-                            'emotion_scores': emotion_scores,
-                            'emotion_counts': emotion_counts
-                        }
-                    except (json.JSONDecodeError, KeyError) as e:
-                        print(f"  ⚠ Failed to parse saved profile: {e}, building fresh")
-            except Exception as e:
-                print(f"  ⚠ Could not load saved profile: {e}, building fresh")
-        
-        # Fall back to building from reviews
-        return self.emotion_profiler.create_book_profile(book_id, book_title, reviews)
+        if self.db is None:
+            return self.emotion_profiler.create_book_profile(book_id, book_title, reviews)
+
+        saved_profile = None
+        try:
+            raw_profile = self.book_service.get_emotion_profiles([book_id]).get(book_id)
+            if raw_profile:
+                saved_profile = parse_emotion_profile(raw_profile)
+                if saved_profile is None:
+                    logger.warning("Failed to parse saved emotion profile for book %s", book_id)
+        except Exception as e:
+            logger.warning("Could not load saved emotion profile for book %s: %s", book_id, e)
+
+        saved_profile = saved_profile or {}
+        return {
+            'title': book_title,
+            'num_reviews': len(reviews),
+            'emotion_scores': {e: d["score"] for e, d in saved_profile.items()},
+            'emotion_counts': {e: d["count"] for e, d in saved_profile.items()},
+        }
 
     def get_user_read_books(self, user_id: Any, **kwargs):
         """Return books the user has finished reading via BookshelfService."""
@@ -114,6 +125,49 @@ class RecommendationEngine:
         stmt = select(Mood).where(Mood.user_id == user_id)
         return self.db.execute(stmt).scalars().all()
 
+    # --- Result cache and tracing ---
+    def _serve(self, kind: str, user_id, params: tuple, compute):
+        """
+        Run one public recommendation call: through the result cache when one
+        is configured, with the trace (if enabled) logged once at the end.
+
+        Cached entries hold book ids instead of Book rows; hits are re-hydrated
+        with one bulk BookService query, dropping books deleted since.
+        """
+        trace = self.trace
+        trace.start(kind, user_id=user_id)
+        cache = self.result_cache
+        cache_state = "off"
+        try:
+            if cache is None or not cache.enabled:
+                results = compute()
+            else:
+                # Results are per database, like the catalogue matrix in emotion_index
+                bind = self.db.get_bind() if self.db is not None else None
+                key = cache.make_key(kind, user_id, (bind, *params))
+                entries = cache.get(key)
+                if entries is not None:
+                    cache_state = "hit"
+                    results = self._hydrate_results(entries)
+                    trace.step("hydrate_cached", books=len(results))
+                else:
+                    cache_state = "miss"
+                    results = compute()
+                    cache.put(key, tuple({**result, "book": result["book"].book_id} for result in results))
+        except Exception as e:
+            trace.emit(cache=cache_state, error=repr(e))
+            raise
+        trace.emit(
+            cache=cache_state,
+            results=len(results),
+            book_ids=[result["book"].book_id for result in results] if trace.enabled else None,
+        )
+        return results
+
+    def _hydrate_results(self, entries) -> list[dict]:
+        books = self.book_service.get_books_by_ids([entry["book"] for entry in entries])
+        return [{**entry, "book": books[entry["book"]]} for entry in entries if entry["book"] in books]
+
     # --- Content-based recommendation logic ---
     def recommend_content_based(self, user_id, book_id, rating, review_text):
         """
@@ -122,101 +176,59 @@ class RecommendationEngine:
         Returns a list of up to 5 dicts: {"book": <Book>, "similarity": <float>}.
         In contrast mode, also includes: {"contrast_score": <float>}.
         """
-        print(f"\n{'='*60}")
-        print(f"RECOMMENDATION DEBUG START")
-        print(f"{'='*60}")
-        print(f"Input: user_id={user_id}, book_id={book_id}, rating={rating}")
-        print(f"Review text: '{review_text}'")
+        return self._serve(
+            "content_based",
+            user_id,
+            (book_id, rating, review_text),
+            lambda: self._recommend_content_based(user_id, book_id, rating, review_text),
+        )
+
+    def _recommend_content_based(self, user_id, book_id, rating, review_text):
+        trace = self.trace
 
         # Build read set to filter out previously read books
         read_items = self.get_user_read_books(user_id)
         read_book_ids = {item.book_id for item in read_items}
         read_book_ids.add(book_id)
-        print(f"\n[STEP 4] User's Bookshelf:")
-        print(f"  User has read {len(read_book_ids)} books")
-        print(f"  Read book IDs: {read_book_ids}")
-
-        # Prepare target book profile
-        target_book = self.book_service.get_book(book_id)
-        if not target_book:
-            print("  WARNING: target book not found; returning []")
-            print(f"{'='*60}\n")
+        trace.step("read_set", read_books=len(read_book_ids))
+
+        # Prepare target book profile; only its title is needed, not the full row
+        target_title = self.book_service.get_book_titles([book_id]).get(book_id)
+        if target_title is None:
+            trace.step("target_book", found=False)
             return []
 
-        target_reviews = self._get_review_texts(book_id)
-        target_profile = self.get_emotion_profile(book_id, target_book.title, target_reviews)
+        # Stored profiles need no review texts; only the session-less path builds from reviews
+        target_reviews = self._get_review_texts(book_id) if self.db is None else []
+        target_profile = self.get_emotion_profile(book_id, target_title, target_reviews)
         target_scores = target_profile.get("emotion_scores", {})
-        print(f"\n[STEP 2] Book Emotion Profile:")
-        print(f"  Book {book_id} emotions: {target_scores}")
-        print(f"  Is empty?: {len(target_scores) == 0}")
-
-        # For debugging, list DB books
-        all_books = list(self.get_books())
-        print(f"\n[STEP 5] Database Books:")
-        print(f"  Total books in database: {len(all_books)}")
-        print(f"  Book IDs: {[getattr(book, 'book_id', getattr(book, 'id', None)) for book in all_books[:10]]}...")
+        trace.step("target_profile", emotions=len(target_scores))
 
         if rating < 3:
             review_scores = self._extract_review_scores(review_text)
-            print(f"\n[STEP 1] Review Emotion Extraction:")
-            print(f"  Review emotions: {review_scores}")
-            print(f"  Is empty?: {len(review_scores) == 0}")
-
             base_similarity = self._cosine_similarity(review_scores, target_scores)
-            print(f"\n[STEP 3] Similarity Calculation:")
-            print(f"  Base similarity: {base_similarity}")
-
             contrast_mode = base_similarity > 0.50
-            result = self._recommend_by_review_emotions(
+            trace.step(
+                "review_emotions",
+                emotions=len(review_scores),
+                base_similarity=round(base_similarity, 4),
+                contrast_mode=contrast_mode,
+            )
+            return self._recommend_by_review_emotions(
                 review_scores,
                 read_book_ids,
                 contrast_mode=contrast_mode,
             )
-            print(f"\n[STEP 8] Final Result:")
-            print(f"  Returning {len(result)} recommendations")
-            if len(result) > 0:
-                print(f"  Top recommendation: {result[0]}")
-            else:
-                print(f"  WARNING: Returning empty list!")
-            print(f"{'='*60}\n")
-            return result
-
-        if rating in (3, 4):
-            # include current average rating in the downstream logs via review_service
-            print(f"\n[INFO] Rating in (3,4); using book similarity with require_higher_rating=True")
-            result = self._recommend_by_book_similarity(
-                target_book_id=book_id,
-                target_scores=target_scores,
-                read_book_ids=read_book_ids,
-                require_higher_rating=True,
-            )
-            print(f"\n[STEP 8] Final Result:")
-            print(f"  Returning {len(result)} recommendations")
-            if len(result) > 0:
-                print(f"  Top recommendation: {result[0]}")
-            else:
-                print(f"  WARNING: Returning empty list!")
-            print(f"{'='*60}\n")
-            return result
 
-        if rating == 5:
-            print(f"\n[INFO] Rating == 5; using book similarity with require_higher_rating=False")
-            result = self._recommend_by_book_similarity(
+        if rating in (3, 4, 5):
+            # 3-4 stars only recommend books rated higher than the target; 5 stars any rating
+            return self._recommend_by_book_similarity(
                 target_book_id=book_id,
                 target_scores=target_scores,
                 read_book_ids=read_book_ids,
-                require_higher_rating=False,
+                require_higher_rating=rating != 5,
             )
-            print(f"\n[STEP 8] Final Result:")
-            print(f"  Returning {len(result)} recommendations")
-            if len(result) > 0:
-                print(f"  Top recommendation: {result[0]}")
-            else:
-                print(f"  WARNING: Returning empty list!")
-            print(f"{'='*60}\n")
-            return result
 
-        print(f"{'='*60}\n")
         return []
 
     # --- Collaborative filtering logic ---
@@ -230,75 +242,113 @@ class RecommendationEngine:
         Returns a list of up to 5 dicts: {"book": <Book>, "score": <float>}.
         Score is the weighted average: 70% similar users + 30% overall average.
         """
+        return self._serve(
+            "collaborative",
+            user_id,
+            (book_id, review_text),
+            lambda: self._recommend_collaborative(user_id, book_id, review_text),
+        )
+
+    def _recommend_collaborative(self, user_id, book_id, review_text):
         db = self._require_db()
+        trace = self.trace
 
         # Current user's review emotions for this book
         user_scores = self._extract_review_scores(review_text)
 
-        # Get all reviews for the same book and compare emotions
-        reviews = self.get_reviews_for_book(book_id, limit=500)
-        similarity_by_user: dict[str, float] = {}
-        for r in reviews:
-            if getattr(r, "user_id", None) == user_id:
-                continue
-            other_text = getattr(r, "body", None) or getattr(r, "comment", None) or ""
-            other_scores = self._extract_review_scores(other_text)
-            sim = self._cosine_similarity(user_scores, other_scores)
-            if sim > similarity_by_user.get(r.user_id, -1.0):
-                similarity_by_user[r.user_id] = sim
-
-        if not similarity_by_user:
+        # Top 5 most similar users among this book's other readers, and the books they rated 4-5
+        ratings = rating_index.get_matrix(db)
+        top_users = self._similar_users_by_taste(db, user_id, book_id, user_scores, ratings)
+        if top_users is None:
+            top_users = self._similar_users_by_reviews(user_id, book_id, user_scores)
+        if not top_users:
             return []
-
-        # Top 5 most similar users
-        top_users = [u for u, _ in sorted(similarity_by_user.items(), key=lambda x: x[1], reverse=True)[:5]]
-
-        # Books those users rated 4-5
-        stmt = (
-            select(Review)
-            .where(Review.user_id.in_(top_users))
-            .where(Review.rating >= 4)
-        )
-        similar_user_reviews = db.execute(stmt).scalars().all()
-        candidate_book_ids = {r.book_id for r in similar_user_reviews}
+        columns, similar_user_avg = ratings.neighbour_averages(top_users, min_rating=4)
 
         # Filter out user's read books
         read_items = self.get_user_read_books(user_id)
         read_book_ids = {item.book_id for item in read_items}
         read_book_ids.add(book_id)
-
-        candidate_book_ids = {bid for bid in candidate_book_ids if bid not in read_book_ids}
-        if not candidate_book_ids:
+        unread = ~ratings.book_mask(read_book_ids)[columns]
+        columns, similar_user_avg = columns[unread], similar_user_avg[unread]
+        trace.step("candidates", similar_users=len(top_users), books=len(columns))
+        if not len(columns):
             return []
 
         # Rank by personalized weighting: similar user ratings (70%) > overall rating (30%)
-        scored = []
-        for bid in candidate_book_ids:
-            # Get all ratings from similar users for this book
-            similar_user_ratings = [r.rating for r in similar_user_reviews if r.book_id == bid]
-            
-            if not similar_user_ratings:
-                continue
-            
-            book = self.book_service.get_book(bid)
-            if not book:
-                continue
-            
-            # Calculate weighted score: prioritize similar user preferences
-            similar_user_avg = sum(similar_user_ratings) / len(similar_user_ratings)
-            overall_avg = self.review_service.get_average_rating(bid)
-            
-            # Fallback to similar user average if overall not available
-            if overall_avg is None:
-                overall_avg = similar_user_avg
-            
-            # Weighted combination: 70% similar users, 30% overall
-            weighted_score = (0.7 * similar_user_avg) + (0.3 * overall_avg)
-            
-            scored.append({"book": book, "score": weighted_score})
-
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:5]
+        candidate_ids = [ratings.book_ids[column] for column in columns.tolist()]
+        averages = self.review_service.get_stored_average_ratings(candidate_ids)
+        # Fallback to similar user average if overall not available
+        overall_avg = np.array(
+            [
+                averages[candidate_id] if averages.get(candidate_id) is not None else similar
+                for candidate_id, similar in zip(candidate_ids, similar_user_avg.tolist())
+            ],
+            dtype=np.float64,
+        )
+        weighted = 0.7 * similar_user_avg + 0.3 * overall_avg
+
+        # Hydrate only the best-scoring books, skipping ids with no Book row
+        ranked = (
+            (candidate_ids[index], float(weighted[index]))
+            for index in iter_ranked_indices(weighted, initial=5)
+        )
+        scored = [{"book": book, "score": score} for book, score in self._first_books(ranked, 5)]
+        trace.step("score", scored=len(scored))
+        return scored
+
+    def _similar_users_by_taste(self, db, user_id, book_id, user_scores, ratings) -> Optional[list]:
+        """
+        Most similar readers of `book_id` by stored taste vector.
+
+        A rater scores the cosine of their taste row with the user's review
+        scores plus the cosine with the user's own taste, when they have one.
+        Both query sides are unit vectors over the taste columns (the review
+        scores are re-normalised after dropping emotions no taste has), so
+        neither outweighs the other.
+
+        Returns None when no rater has a taste yet (before the backfill), so the
+        caller can fall back to comparing review texts.
+        """
+        raters = [uid for uid in ratings.book_raters(book_id) if uid != user_id]
+        tastes = user_taste_index.get_matrix(db)
+        rows = np.array([tastes.row_index.get(uid, -1) for uid in raters], dtype=np.intp)
+        known = rows >= 0
+        if not known.any():
+            return None
+        query = tastes.query_vector(user_scores)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        own_row = tastes.row_index.get(user_id)
+        if own_row is not None:
+            query = query + tastes.vectors[own_row]
+        similarities = np.zeros(len(raters), dtype=np.float32)
+        similarities[known] = tastes.vectors[rows[known]] @ query
+        self.trace.step("taste_similarity", raters=len(raters), with_taste=int(known.sum()))
+        return [raters[i] for i in top_k_indices(similarities, 5)]
+
+    def _similar_users_by_reviews(self, user_id, book_id, user_scores) -> list:
+        """Most similar readers of `book_id` by their reviews' emotions, compared in one matrix product."""
+        reviews = [
+            r for r in self.get_reviews_for_book(book_id, limit=500)
+            if getattr(r, "user_id", None) != user_id
+        ]
+        if not reviews:
+            self.trace.step("review_similarity", reviews=0, users=0)
+            return []
+        review_matrix = EmotionMatrix.from_scores(
+            {row: self._review_emotion_scores(r) for row, r in enumerate(reviews)}
+        )
+        similarities = review_matrix.similarities(user_scores)
+
+        # Best similarity per user; users keep their order of first appearance for ties
+        user_order = list(dict.fromkeys(r.user_id for r in reviews))
+        user_position = {uid: i for i, uid in enumerate(user_order)}
+        best = np.full(len(user_order), -np.inf, dtype=np.float32)
+        np.maximum.at(best, [user_position[r.user_id] for r in reviews], similarities)
+        self.trace.step("review_similarity", reviews=len(reviews), users=len(user_order))
+        return [user_order[i] for i in top_k_indices(best, 5)]
 
     def _require_db(self) -> Session:
         if self.db is not None:
@@ -311,6 +361,11 @@ class RecommendationEngine:
         result = self.emotion_extractor.extract_emotions(review_text or "")
         return result.get("scores", {})
 
+    def _review_emotion_scores(self, review) -> dict:
+        """Emotion scores of a stored review, memoised per review id by `rating_index`."""
+        text = getattr(review, "body", None) or getattr(review, "comment", None) or ""
+        return rating_index.review_scores(getattr(review, "review_id", None), text, self._extract_review_scores)
+
     def _get_review_texts(self, book_id) -> list[str]:
         reviews = self.get_reviews_for_book(book_id, limit=500)
         texts: list[str] = []
@@ -323,42 +378,76 @@ class RecommendationEngine:
                 texts.append(comment)
         return texts
 
+    def _get_review_texts_for_books(self, book_ids) -> dict:
+        """Review texts for many books via one bulk ReviewService query."""
+        return self.review_service.get_review_texts_for_books(book_ids, per_book_limit=500)
+
+    def _catalogue_matrix(self) -> EmotionMatrix:
+        """
+        Emotion matrix covering every candidate book.
+
+        With a DB session the shared process-wide index is reused across requests;
+        without one the matrix is built on the fly from book titles and review
+        texts. Either way no Book rows are loaded; `_first_books` hydrates the
+        final top-k.
+        """
+        if self.db is not None:
+            return emotion_index.get_matrix(self.db)
+
+        titles = self.book_service.get_book_titles()
+        texts_by_book = self._get_review_texts_for_books(list(titles))
+        scores_by_book = {}
+        for book_id, title in titles.items():
+            profile = self.get_emotion_profile(book_id, title, texts_by_book.get(book_id, []))
+            scores_by_book[book_id] = profile.get("emotion_scores", {})
+        return EmotionMatrix.from_scores(scores_by_book)
+
+    def _first_books(self, ranked: Iterable[tuple[Any, float]], k: int) -> list[tuple[Any, float]]:
+        """
+        Hydrate the first `k` ranked (book_id, score) pairs that still have a Book row.
+
+        Candidates are pulled lazily, `k` at a time, and each batch is loaded with
+        one bulk BookService query, so ranking never holds more than a batch of
+        Book objects and never sorts more than it returns.
+        """
+        results: list[tuple[Any, float]] = []
+        ranked = iter(ranked)
+        while len(results) < k:
+            batch = list(islice(ranked, k))
+            if not batch:
+                break
+            books = self.book_service.get_books_by_ids([book_id for book_id, _ in batch])
+            for book_id, score in batch:
+                book = books.get(book_id)
+                if book is not None:
+                    results.append((book, score))
+                    if len(results) == k:
+                        break
+        return results
+
     def _recommend_by_review_emotions(self, review_scores: dict, read_book_ids: set, *, contrast_mode: bool):
-        candidates = []
-        for book in self.get_books():
-            if book.book_id in read_book_ids:
-                continue
-            print(f"\n[STEP 6] Checking candidate book {book.book_id}: {getattr(book, 'title', None)}")
-            print(f"  - Is target book?: {book.book_id == getattr(book, 'book_id', book.book_id)}")
-            print(f"  - Is in bookshelf?: {book.book_id in read_book_ids}")
-            profile = self.get_emotion_profile(book.book_id, book.title, self._get_review_texts(book.book_id))
-            book_scores = profile.get("emotion_scores", {})
-            print(f"  - Candidate emotions: {book_scores}")
-            similarity = self._cosine_similarity(review_scores, book_scores)
-            print(f"  - Similarity score: {similarity}")
-            score = 1.0 - similarity if contrast_mode else similarity
-            candidates.append({"book": book, "similarity": similarity, "_score": score})
-
-        print(f"\n[STEP 7] Before Sorting:")
-        print(f"  Total recommendations: {len(candidates)}")
-        if len(candidates) > 0:
-            print(f"  Sample recommendation: {candidates[0]}")
-
-        candidates.sort(key=lambda x: x["_score"], reverse=True)
+        matrix = self._catalogue_matrix()
+        exclude = matrix.mask(read_book_ids)
+        if contrast_mode:
+            # Least similar books: always an exact scan (the ANN index only finds near neighbours)
+            similarities = matrix.similarities(review_scores)
+            ranked = (
+                (matrix.book_ids[index], float(similarities[index]))
+                for index in iter_ranked_indices(1.0 - similarities, exclude=exclude, initial=5)
+            )
+        else:
+            ranked = (
+                (matrix.book_ids[index], similarity)
+                for index, similarity in matrix.iter_search(review_scores, exclude=exclude, initial=5)
+            )
+
         results = []
-        for c in candidates[:5]:
-            item = {"book": c["book"], "similarity": c["similarity"]}
+        for book, similarity in self._first_books(ranked, 5):
+            item = {"book": book, "similarity": similarity}
             if contrast_mode:
-                item["contrast_score"] = c["_score"]
+                item["contrast_score"] = float(1.0 - similarity)
             results.append(item)
-
-        print(f"\n[STEP 8] Final Result:")
-        print(f"  Returning {len(results)} recommendations")
-        if len(results) > 0:
-            print(f"  Top recommendation: {results[0]}")
-        else:
-            print(f"  WARNING: Returning empty list!")
-
+        self.trace.step("rank", candidates=len(matrix), contrast_mode=contrast_mode)
         return results
 
     def _recommend_by_book_similarity(
@@ -369,50 +458,38 @@ class RecommendationEngine:
         read_book_ids: set,
         require_higher_rating: bool,
     ):
-        target_avg = self.review_service.get_average_rating(target_book_id)
-        candidates = []
-
-        for book in self.get_books():
-            if book.book_id in read_book_ids:
-                continue
-
-            print(f"\n[STEP 6] Checking candidate book {book.book_id}: {getattr(book, 'title', None)}")
-            print(f"  - Is target book?: {book.book_id == target_book_id}")
-            print(f"  - Is in bookshelf?: {book.book_id in read_book_ids}")
-            profile = self.get_emotion_profile(book.book_id, book.title, self._get_review_texts(book.book_id))
-            book_scores = profile.get("emotion_scores", {})
-            print(f"  - Candidate emotions: {book_scores}")
-            similarity = self._cosine_similarity(target_scores, book_scores)
-            print(f"  - Similarity score: {similarity}")
-
-            if require_higher_rating and target_avg is not None:
-                candidate_avg = self.review_service.get_average_rating(book.book_id)
-                print(f"  - Current book rating: {target_avg}")
-                print(f"  - Candidate rating: {candidate_avg}")
-                # Include books with no rating; only skip if rated AND lower
-                if candidate_avg is not None and candidate_avg <= target_avg:
-                    print(f"  - Skipping: book has rating {candidate_avg} <= {target_avg}")
-                    continue
-
-            candidates.append({"book": book, "similarity": similarity})
-
-        print(f"\n[STEP 7] Before Sorting:")
-        print(f"  Total recommendations: {len(candidates)}")
-        if len(candidates) > 0:
-            print(f"  Sample recommendation: {candidates[0]}")
-
-        candidates.sort(key=lambda x: x["similarity"], reverse=True)
-        results = candidates[:5]
-
-        print(f"\n[STEP 8] Final Result:")
-        print(f"  Returning {len(results)} recommendations")
-        if len(results) > 0:
-            print(f"  Top recommendation: {results[0]}")
-        else:
-            print(f"  WARNING: Returning empty list!")
-
+        target_avg = None
+        if require_higher_rating:
+            target_avg = self.review_service.get_stored_average_ratings([target_book_id]).get(target_book_id)
+        matrix = self._catalogue_matrix()
+        ranked = (
+            (matrix.book_ids[index], similarity)
+            for index, similarity in matrix.iter_search(target_scores, exclude=matrix.mask(read_book_ids), initial=5)
+        )
+        if target_avg is not None:
+            ranked = self._rated_above(ranked, target_avg)
+
+        results = [
+            {"book": book, "similarity": similarity}
+            for book, similarity in self._first_books(ranked, 5)
+        ]
+        self.trace.step("rank", candidates=len(matrix), target_rating=target_avg)
         return results
 
+    def _rated_above(self, ranked: Iterable[tuple[Any, float]], target_avg: float) -> Iterator[tuple[Any, float]]:
+        """Drop ranked candidates rated at or below `target_avg`; unrated books are kept."""
+        ranked = iter(ranked)
+        while True:
+            # Pull ranked candidates in small batches so ratings come from one query each
+            batch = list(islice(ranked, 20))
+            if not batch:
+                return
+            averages = self.review_service.get_stored_average_ratings([candidate_id for candidate_id, _ in batch])
+            for candidate_id, similarity in batch:
+                candidate_avg = averages.get(candidate_id)
+                if candidate_avg is None or candidate_avg > target_avg:
+                    yield candidate_id, similarity
+
     def _cosine_similarity(self, scores_a: dict, scores_b: dict) -> float:
         keys = sorted(set(scores_a.keys()) | set(scores_b.keys()))
         if not keys:
@@ -427,32 +504,8 @@ class RecommendationEngine:
         return dot / (norm_a * norm_b)
 
     def recommend_by_mood(self, user_id: str, mood: str, top_n: int = 5):
-
-        """Recommend unread books based on emotional similarity to the given mood."""
-        print(f"\n{'='*60}")
-        print("MOOD-BASED RECOMMENDATION START")
-        print(f"{'='*60}")
-        print(f"Input: user_id={user_id}, mood='{mood}', top_n={top_n}")
-
-        mood_emotion_result = self.emotion_extractor.extract_emotions(mood)
-        mood_scores = mood_emotion_result.get("scores", {})
-        print("\n[STEP 1] Mood Emotion Analysis:")
-        print(f"  Mood: '{mood}'")
-        print(f"  Emotion scores: {mood_scores}")
-
-        # Fallback for plain moods not recognized by the extractor.
-        if not any(score > 0 for score in mood_scores.values()):
-            mood_scores = {mood: 100.0}
-            print(f"  No emotions detected, using fallback: {mood_scores}")
-
-        read_items = self.get_user_read_books(user_id)
-        read_book_ids = {item.book_id for item in read_items}
-        print("\n[STEP 2] User's Bookshelf:")
-        print(f"  User has read {len(read_book_ids)} books")
-
-
         """
-        Recommend books based on user's mood.
+        Recommend unread books based on emotional similarity to the given mood.
 
         Args:
             user_id: User identifier
@@ -462,82 +515,63 @@ class RecommendationEngine:
         Returns:
             List of dicts: [{"book": Book, "similarity": float}]
         """
-        print(f"\n{'='*60}")
-        print(f"MOOD-BASED RECOMMENDATION START")
-        print(f"{'='*60}")
-        print(f"Input: user_id={user_id}, mood='{mood}', top_n={top_n}")
+        return self._serve(
+            "mood",
+            user_id,
+            (mood, top_n),
+            lambda: self._recommend_by_mood(user_id, mood, top_n),
+        )
+
+    def _recommend_by_mood(self, user_id: str, mood: str, top_n: int = 5):
+        trace = self.trace
 
         # Convert mood string to emotion scores
         mood_emotion_result = self.emotion_extractor.extract_emotions(mood)
         mood_scores = mood_emotion_result.get("scores", {})
-        print(f"\n[STEP 1] Mood Emotion Analysis:")
-        print(f"  Mood: '{mood}'")
-        print(f"  Emotion scores: {mood_scores}")
 
         # If no emotions detected, use a default profile for the mood
-        if not any(score > 0 for score in mood_scores.values()):
+        fallback_profile = not any(score > 0 for score in mood_scores.values())
+        if fallback_profile:
             # Fallback: create a simple vector with the mood as primary emotion
             mood_scores = {mood: 100.0}
-            print(f"  No emotions detected, using fallback: {mood_scores}")
+        trace.step("mood_emotions", emotions=len(mood_scores), fallback=fallback_profile)
 
         # Get user's read books to filter out
         read_items = self.get_user_read_books(user_id)
         read_book_ids = {item.book_id for item in read_items}
-        print(f"\n[STEP 2] User's Bookshelf:")
-        print(f"  User has read {len(read_book_ids)} books")
-
-        # Find books with similar emotion profiles
-
-        candidates = []
-        for book in self.get_books():
-            if book.book_id in read_book_ids:
-                continue
-
-            print(f"\n[STEP 3] Checking book {book.book_id}: {getattr(book, 'title', None)}")
-            profile = self.get_emotion_profile(book.book_id, book.title, self._get_review_texts(book.book_id))
-            book_scores = profile.get("emotion_scores", {})
-            print(f"  Book emotions: {book_scores}")
-
-            similarity = self._cosine_similarity(mood_scores, book_scores)
-            print(f"  Similarity to mood: {similarity}")
-
-            candidates.append({"book": book, "similarity": similarity})
-
-
-
-        # Sort by similarity and keep only non-zero matches unless nothing matches
-
-        candidates.sort(key=lambda x: x["similarity"], reverse=True)
-        non_zero_candidates = [c for c in candidates if c["similarity"] > 0.0]
-
-        if non_zero_candidates:
-            results = non_zero_candidates[:top_n]
-        else:
-
+        trace.step("read_set", read_books=len(read_book_ids))
+
+        # Find books with similar emotion profiles; keep only non-zero matches
+        matrix = self._catalogue_matrix()
+        exclude = matrix.mask(read_book_ids)
+        ranked = takewhile(
+            lambda candidate: candidate[1] > 0.0,
+            (
+                (matrix.book_ids[index], similarity)
+                for index, similarity in matrix.iter_search(mood_scores, exclude=exclude, initial=top_n)
+            ),
+        )
+        results = [
+            {"book": book, "similarity": similarity}
+            for book, similarity in self._first_books(ranked, top_n)
+        ]
+        trace.step("rank", candidates=len(matrix), matches=len(results))
 
+        if not results:
             # No emotional match; fall back to highest-rated books not already read
-
-            print("  No books with non-zero mood similarity; falling back to top-rated unread books")
-            rates = []
-            for book in self.get_books():
-                if book.book_id in read_book_ids:
-                    continue
-                avg_rating = self.review_service.get_average_rating(book.book_id)
-                rates.append((avg_rating if avg_rating is not None else 0.0, book))
-            rates.sort(key=lambda x: x[0], reverse=True)
-            results = [{"book": r[1], "similarity": 0.0} for r in rates[:top_n]]
-
-
-        print("\n[STEP 4] Final Results:")
-        print(f"  Returning {len(results)} recommendations")
-        for i, result in enumerate(results):
-            print(f"  {i + 1}. {result['book'].title} (similarity: {result['similarity']:.3f})")
-
-        print(f"\n[STEP 4] Final Results:")
-        print(f"  Returning {len(results)} recommendations")
-        for i, result in enumerate(results):
-            print(f"  {i+1}. {result['book'].title} (similarity: {result['similarity']:.3f})")
-
+            averages = self.review_service.get_stored_average_ratings(matrix.book_ids)
+            ratings = np.array(
+                [averages.get(book_id) or 0.0 for book_id in matrix.book_ids],
+                dtype=np.float32,
+            )
+            ranked = (
+                (matrix.book_ids[index], 0.0)
+                for index in iter_ranked_indices(ratings, exclude=exclude, initial=top_n)
+            )
+            results = [
+                {"book": book, "similarity": similarity}
+                for book, similarity in self._first_books(ranked, top_n)
+            ]
+            trace.step("top_rated_fallback", books=len(results))
 
         return results
-
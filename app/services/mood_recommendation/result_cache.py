@@ -0,0 +1,112 @@
+"""
+TTL + LRU cache of recommendation results.
+
+Entries are keyed by the request kind and parameters plus two version
+counters: a per-user shelf version (bumped on bookshelf writes) and a global
+profile version (bumped when reviews, books or stored emotion profiles
+change). A write therefore makes every affected key unreachable at once, and
+the TTL bounds staleness for writes made by other processes.
+
+Only book ids and scores are stored; callers re-hydrate the Book rows in
+their own session so no ORM object outlives the request that loaded it.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class RecommendationCache:
+    """Process-wide TTL + LRU map of recommendation results."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "120"))
+        if max_entries is None:
+            max_entries = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "2048"))
+        self.ttl_seconds = ttl_seconds
+        # 0 disables caching entirely
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._global_version = 0
+        self._user_versions: dict[Any, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @property
+    def global_version(self) -> int:
+        return self._global_version
+
+    def user_version(self, user_id: Any) -> int:
+        return self._user_versions.get(user_id, 0)
+
+    def bump_user(self, user_id: Any) -> None:
+        """Invalidate every cached result for `user_id` (their shelf changed)."""
+        with self._lock:
+            self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+
+    def bump_global(self) -> None:
+        """Invalidate every cached result (reviews, books or profiles changed)."""
+        with self._lock:
+            self._global_version += 1
+            # Nothing built before the bump can be served again; free it now
+            self._entries.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def make_key(self, kind: str, user_id: Any, params: tuple) -> Hashable:
+        """Key for a request, capturing the versions current at call time."""
+        with self._lock:
+            return (kind, user_id, params, self._user_versions.get(user_id, 0), self._global_version)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # A version bump since `make_key` means the value may already be stale
+            if key[-1] != self._global_version or key[-2] != self._user_versions.get(key[1], 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, kind: str, user_id: Any, params: tuple, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for the request, computing and storing it on a miss."""
+        if not self.enabled:
+            return compute()
+        key = self.make_key(kind, user_id, params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+recommendation_cache = RecommendationCache()
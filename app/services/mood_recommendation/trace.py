@@ -0,0 +1,71 @@
+"""
+Per-request trace of recommendation steps.
+
+A `RecommendationTrace` is off by default and then costs one attribute check
+per step. When a request asks for it (the `X-Debug-Trace` header or a
+`debug` query parameter) each step records its wall time since the previous
+step plus a few small fields, and the whole trace is logged as a single JSON
+line when the recommendation call finishes.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Debug-Trace"
+TRACE_QUERY_PARAM = "debug"
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+class RecommendationTrace:
+    """Step timings and small diagnostic fields for one recommendation call."""
+
+    def __init__(self, enabled: bool = False, **context: Any):
+        self.enabled = enabled
+        self.context = context
+        self.steps: list[dict[str, Any]] = []
+        self._started = self._mark = time.perf_counter()
+
+    @classmethod
+    def from_request(cls, request: Optional[Any]) -> "RecommendationTrace":
+        """Enabled when the request carries the trace header or debug query flag."""
+        if request is None:
+            return cls()
+        flag = request.headers.get(TRACE_HEADER) or request.query_params.get(TRACE_QUERY_PARAM) or ""
+        if flag.strip().lower() not in _TRUTHY:
+            return cls()
+        return cls(True, method=request.method, path=request.url.path)
+
+    def start(self, name: str, **context: Any) -> None:
+        """Begin a new traced call; earlier steps are discarded."""
+        if not self.enabled:
+            return
+        self.context = {**self.context, "call": name, **context}
+        self.steps = []
+        self._started = self._mark = time.perf_counter()
+
+    def step(self, name: str, **fields: Any) -> None:
+        """Close a step: time since the previous step (or start) plus `fields`."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.steps.append({"step": name, "ms": round((now - self._mark) * 1000, 3), **fields})
+        self._mark = now
+
+    def emit(self, **fields: Any) -> None:
+        """Log the trace as one structured INFO line."""
+        if not self.enabled:
+            return
+        record = {
+            **self.context,
+            **fields,
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "steps": self.steps,
+        }
+        logger.info("recommendation trace %s", json.dumps(record, default=str))
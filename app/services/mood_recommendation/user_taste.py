@@ -0,0 +1,91 @@
+"""
+Per-user emotion taste vectors.
+
+A user's taste is the sum, over their reviews, of each review's emotion mix
+(the fraction of its lexicon matches per emotion) weighted by rating / 5 and
+by recency. Recency is an exponential decay with a half-life of
+TASTE_HALF_LIFE_DAYS, stored relative to a fixed epoch: a review contributes
+with weight 2 ** (days since TASTE_EPOCH / half-life). Ageing every stored
+vector to "now" would multiply each by the same factor, which cosine
+similarity ignores, so stored totals never need re-ageing and a review's
+contribution can be subtracted exactly when it is edited or deleted.
+Changing the half-life therefore requires a rebuild
+(`scripts/build_emotion_profiles.py --user-tastes`).
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.user_emotion_taste import UserEmotionTaste
+from app.services.mood_recommendation.emotion_index import EmotionIndex, EmotionMatrix
+
+TASTE_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def taste_half_life_days() -> float:
+    return float(os.getenv("TASTE_HALF_LIFE_DAYS", "180"))
+
+
+def review_taste_weight(rating: float, created_at: Optional[datetime], half_life_days: Optional[float] = None) -> float:
+    """Weight of one review in its author's taste; naive timestamps are taken as UTC."""
+    if half_life_days is None:
+        half_life_days = taste_half_life_days()
+    if created_at is None:
+        created_at = datetime.now(timezone.utc)
+    elif created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    days = (created_at - TASTE_EPOCH).total_seconds() / 86400
+    return (float(rating) / 5.0) * 2.0 ** (days / half_life_days)
+
+
+def review_taste(rating: float, created_at: Optional[datetime], counts: Mapping[str, int]) -> dict[str, float]:
+    """One review's contribution to its author's taste vector."""
+    total = sum(counts.values())
+    if not total:
+        return {}
+    weight = review_taste_weight(rating, created_at)
+    return {emotion: weight * count / total for emotion, count in counts.items() if count}
+
+
+def _rescaled(taste: Mapping[str, float]) -> dict[str, float]:
+    # Stored weights grow with time; scale to max 1 so float32 rows never overflow
+    peak = max((abs(weight) for weight in taste.values()), default=0.0)
+    if peak == 0.0:
+        return {}
+    return {emotion: weight / peak for emotion, weight in taste.items() if weight > 0}
+
+
+class UserTasteIndex(EmotionIndex):
+    """
+    Process-wide users x emotions matrix of taste vectors, one per database bind.
+
+    Reuses EmotionIndex's caching: rows are refreshed in place by
+    `update_user()` after review writes and rebuilt after `invalidate()` or
+    once older than `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        super().__init__(ttl_seconds=ttl_seconds, ann_min_books=0)
+
+    def update_user(self, user_id: Any, taste: Mapping[str, float]) -> None:
+        """Refresh one user's row after their taste changed."""
+        self.update_book(user_id, _rescaled(taste))
+
+    def _build(self, db: Session) -> EmotionMatrix:
+        rows = db.execute(
+            select(UserEmotionTaste.user_id, UserEmotionTaste.emotion, UserEmotionTaste.weight)
+        ).all()
+        tastes: dict[Any, dict[str, float]] = {}
+        for user_id, emotion, weight in rows:
+            tastes.setdefault(user_id, {})[emotion] = weight
+        return EmotionMatrix.from_scores({user_id: _rescaled(taste) for user_id, taste in tastes.items()})
+
+
+# Shared taste index (rebuilt lazily on first use)
+user_taste_index = UserTasteIndex()
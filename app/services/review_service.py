@@ -1,23 +1,40 @@
 # app/services/review_service.py
 
 from __future__ import annotations
-from typing import Sequence, Optional
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator, Sequence, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, insert, delete, case, or_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.review import Review
 from app.models.book import Book
+from app.models.book_rating_stats import BookRatingStats
 from app.models.user import User
 
 from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.emotion_profile_service import EmotionProfileService
+from app.services.mood_recommendation.emotion_index import emotion_index
+from app.services.mood_recommendation.rating_matrix import rating_index
+from app.services.mood_recommendation.result_cache import recommendation_cache
+from app.services.mood_recommendation.user_taste import user_taste_index
+from app.services.user_taste_service import UserTasteService
 
 
 class ReviewService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        emotion_profiles: Optional[EmotionProfileService] = None,
+        user_tastes: Optional[UserTasteService] = None,
+    ):
         self.db = db
+        self.emotion_profiles = emotion_profiles or EmotionProfileService(db)
+        self.user_tastes = user_tastes or UserTasteService(db, self.emotion_profiles)
 
     # --- Internal Helpers ---
     def _ensure_book_exists(self, book_id: str) -> str:
@@ -37,6 +54,29 @@ class ReviewService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
         return review
 
+    def _apply_rating_delta(self, book_id: str, count_delta: int, sum_delta: int) -> None:
+        """Adjust the book_rating_stats row in the current transaction."""
+        new_count = BookRatingStats.review_count + count_delta
+        new_sum = BookRatingStats.rating_sum + sum_delta
+        result = self.db.execute(
+            update(BookRatingStats)
+            .where(BookRatingStats.book_id == book_id)
+            .values(
+                review_count=new_count,
+                rating_sum=new_sum,
+                average_rating=case((new_count > 0, new_sum * 1.0 / new_count), else_=None),
+            )
+        )
+        if result.rowcount == 0 and count_delta > 0:
+            self.db.execute(
+                insert(BookRatingStats).values(
+                    book_id=book_id,
+                    review_count=count_delta,
+                    rating_sum=sum_delta,
+                    average_rating=sum_delta / count_delta,
+                )
+            )
+
     # --- Commands ---
     def add_review(self, *, book_id: str, user_id: str, review_data: ReviewCreate) -> Review:
         book_title = self._ensure_book_exists(book_id)
@@ -66,15 +106,28 @@ class ReviewService:
                 detail="Rating must be between 1 and 5",
             )
 
-        review = Review(book_id=book_id, user_id=user_id, **payload)
+        # Set explicitly so the taste contribution below is aged from the stored timestamp
+        created_at = datetime.now(timezone.utc)
+        review = Review(book_id=book_id, user_id=user_id, created_at=created_at, **payload)
         # Book-level mood is attached to the review response, not daily user mood logs.
         setattr(review, "book_mood", (book_mood_text or "").strip() or None)
         setattr(review, "mood", getattr(review, "book_mood", None))
         self.db.add(review)
+        self._apply_rating_delta(book_id, 1, rating)
+        emotion_scores = self.emotion_profiles.apply_review_change(book_id, None, payload.get("body"))
+        taste = self.user_tastes.apply_review_change(
+            user_id, created_at=created_at, new_rating=rating, new_text=payload.get("body")
+        )
 
         try:
             self.db.commit()
+            recommendation_cache.bump_global()
+            rating_index.set_rating(user_id, book_id, rating)
             self.db.refresh(review)
+            if emotion_scores is not None:
+                emotion_index.update_book(book_id, emotion_scores)
+            if taste is not None:
+                user_taste_index.update_user(user_id, taste)
 
             # optional: attach comment for response serialization convenience
             # (does not persist to DB, just helps schemas expecting "comment")
@@ -118,12 +171,41 @@ class ReviewService:
                     detail="Rating must be between 1 and 5",
                 )
 
+        new_rating = update_data.get("rating")
+        if new_rating is not None and new_rating != review.rating:
+            self._apply_rating_delta(review.book_id, 0, new_rating - review.rating)
+
+        emotion_scores = None
+        if "body" in update_data:
+            emotion_scores = self.emotion_profiles.apply_review_change(
+                review.book_id, review.body, update_data["body"]
+            )
+
+        taste = None
+        if new_rating is not None or "body" in update_data:
+            old_rating = getattr(review, "rating", None)
+            taste = self.user_tastes.apply_review_change(
+                review.user_id,
+                created_at=getattr(review, "created_at", None),
+                old_rating=old_rating,
+                old_text=review.body,
+                new_rating=new_rating if new_rating is not None else old_rating,
+                new_text=update_data.get("body", review.body),
+            )
+
         # Update DB fields
         for key, value in update_data.items():
             setattr(review, key, value)
 
         self.db.commit()
+        recommendation_cache.bump_global()
+        if new_rating is not None:
+            rating_index.set_rating(review.user_id, review.book_id, new_rating)
         self.db.refresh(review)
+        if emotion_scores is not None:
+            emotion_index.update_book(review.book_id, emotion_scores)
+        if taste is not None:
+            user_taste_index.update_user(review.user_id, taste)
 
         setattr(review, "comment", review.body)
         if book_mood_text is not None:
@@ -139,7 +221,18 @@ class ReviewService:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this review")
 
         self.db.delete(review)
+        self._apply_rating_delta(review.book_id, -1, -review.rating)
+        emotion_scores = self.emotion_profiles.apply_review_change(review.book_id, review.body, None)
+        taste = self.user_tastes.apply_review_change(
+            review.user_id, created_at=getattr(review, "created_at", None), old_rating=review.rating, old_text=review.body
+        )
         self.db.commit()
+        recommendation_cache.bump_global()
+        rating_index.set_rating(review.user_id, review.book_id, None)
+        if emotion_scores is not None:
+            emotion_index.update_book(review.book_id, emotion_scores)
+        if taste is not None:
+            user_taste_index.update_user(review.user_id, taste)
 
     # --- Queries ---
     def get_reviews_by_book_id(
@@ -168,7 +261,184 @@ class ReviewService:
                 setattr(r, "mood", getattr(r, "book_mood", None))
         return reviews
 
+    def get_review_texts_for_books(
+        self,
+        book_ids: Iterable[str],
+        per_book_limit: int = 500,
+        chunk_size: int = 500,
+    ) -> dict[str, list[str]]:
+        """
+        Newest review bodies for many books in one windowed query per chunk.
+
+        Only (book_id, body) columns are fetched; unknown book ids simply map to
+        an empty list instead of raising 404.
+        """
+        ids = list(dict.fromkeys(book_ids))
+        texts: dict[str, list[str]] = {book_id: [] for book_id in ids}
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            ranked = (
+                select(
+                    Review.book_id,
+                    Review.body,
+                    func.row_number()
+                    .over(partition_by=Review.book_id, order_by=Review.created_at.desc())
+                    .label("position"),
+                )
+                .where(Review.book_id.in_(chunk))
+                .where(Review.body.is_not(None))
+                .where(Review.body != "")
+                .subquery()
+            )
+            stmt = (
+                select(ranked.c.book_id, ranked.c.body)
+                .where(ranked.c.position <= per_book_limit)
+                .order_by(ranked.c.book_id, ranked.c.position)
+            )
+            for book_id, body in self.db.execute(stmt):
+                texts[book_id].append(body)
+        return texts
+
+    def iter_review_text_chunks(
+        self,
+        chunk_size: int = 5000,
+        book_ids: Optional[Iterable[str]] = None,
+    ) -> Iterator[list[tuple[str, str]]]:
+        """
+        Stream every non-empty (book_id, body) pair in chunks of whole books.
+
+        Keyset-paginates on (book_id, review_id) so each chunk is a short query
+        rather than one long-lived cursor; a chunk that ends mid-book is topped
+        up with the rest of that book's reviews, so no book spans two chunks.
+        `book_ids` restricts the stream to those books.
+        """
+        has_body = (Review.body.is_not(None), Review.body != "")
+        if book_ids is not None:
+            yield from self._iter_review_text_chunks_for_books(sorted(set(book_ids)), chunk_size, has_body)
+            return
+
+        last_book_id = None
+        while True:
+            stmt = select(Review.book_id, Review.review_id, Review.body).where(*has_body)
+            if last_book_id is not None:
+                stmt = stmt.where(Review.book_id > last_book_id)
+            rows = self.db.execute(stmt.order_by(Review.book_id, Review.review_id).limit(chunk_size)).all()
+            if not rows:
+                return
+
+            last_book_id, last_review_id, _ = rows[-1]
+            if len(rows) == chunk_size:
+                rows.extend(
+                    self.db.execute(
+                        select(Review.book_id, Review.review_id, Review.body)
+                        .where(*has_body, Review.book_id == last_book_id, Review.review_id > last_review_id)
+                        .order_by(Review.review_id)
+                    ).all()
+                )
+            yield [(book_id, body) for book_id, _, body in rows]
+
+    def _iter_review_text_chunks_for_books(
+        self,
+        book_ids: list[str],
+        chunk_size: int,
+        has_body: tuple,
+        lookup_size: int = 500,
+    ) -> Iterator[list[tuple[str, str]]]:
+        chunk: list[tuple[str, str]] = []
+        for start in range(0, len(book_ids), lookup_size):
+            rows = self.db.execute(
+                select(Review.book_id, Review.body)
+                .where(*has_body, Review.book_id.in_(book_ids[start:start + lookup_size]))
+                .order_by(Review.book_id, Review.review_id)
+            ).all()
+            for _, book_rows in groupby(rows, key=itemgetter(0)):
+                chunk.extend(tuple(row) for row in book_rows)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def get_books_with_changed_reviews(self, since: Optional[datetime] = None) -> list[str]:
+        """
+        Books with reviews created or edited since their profile was last built.
+
+        With `since`, every book with a review updated at or after that time is
+        returned instead. Reviews deleted outside ReviewService leave no trace
+        here; a full rebuild picks those up.
+        """
+        stmt = select(Review.book_id).distinct()
+        if since is not None:
+            stmt = stmt.where(Review.updated_at >= since)
+        else:
+            stmt = stmt.join(Book, Book.book_id == Review.book_id).where(
+                or_(Book.profile_built_at.is_(None), Review.updated_at >= Book.profile_built_at)
+            )
+        return list(self.db.scalars(stmt.order_by(Review.book_id)))
+
     def get_average_rating(self, book_id: str) -> float | None:
         self._ensure_book_exists(book_id)
         avg = self.db.scalar(select(func.avg(Review.rating)).where(Review.book_id == book_id))
         return round(float(avg), 2) if avg is not None else None
+
+    def get_average_ratings(self, book_ids: Iterable[str], chunk_size: int = 500) -> dict[str, float | None]:
+        """Average rating for many books from one GROUP BY query per chunk (None if unrated)."""
+        ids = list(dict.fromkeys(book_ids))
+        averages: dict[str, float | None] = {book_id: None for book_id in ids}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            stmt = (
+                select(Review.book_id, func.avg(Review.rating))
+                .where(Review.book_id.in_(chunk))
+                .group_by(Review.book_id)
+            )
+            for book_id, avg in self.db.execute(stmt):
+                averages[book_id] = round(float(avg), 2) if avg is not None else None
+        return averages
+
+    def get_stored_average_ratings(self, book_ids: Iterable[str], chunk_size: int = 500) -> dict[str, float | None]:
+        """
+        Average rating for many books read from book_rating_stats.
+
+        This never scans `reviews`, so it is the one used by ranking paths.
+        """
+        ids = list(dict.fromkeys(book_ids))
+        averages: dict[str, float | None] = {book_id: None for book_id in ids}
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            stmt = select(BookRatingStats.book_id, BookRatingStats.average_rating).where(
+                BookRatingStats.book_id.in_(chunk)
+            )
+            for book_id, avg in self.db.execute(stmt):
+                averages[book_id] = round(float(avg), 2) if avg is not None else None
+        return averages
+
+    def rebuild_rating_stats(self) -> int:
+        """
+        Recompute book_rating_stats from `reviews` with one GROUP BY.
+
+        Used for backfills and after bulk imports that bypass add_review.
+        Returns the number of books with ratings.
+        """
+        rows = self.db.execute(
+            select(Review.book_id, func.count(Review.review_id), func.sum(Review.rating))
+            .group_by(Review.book_id)
+        ).all()
+        self.db.execute(delete(BookRatingStats))
+        if rows:
+            self.db.execute(
+                insert(BookRatingStats),
+                [
+                    {
+                        "book_id": book_id,
+                        "review_count": count,
+                        "rating_sum": total,
+                        "average_rating": total / count,
+                    }
+                    for book_id, count, total in rows
+                ],
+            )
+        self.db.commit()
+        recommendation_cache.bump_global()
+        return len(rows)
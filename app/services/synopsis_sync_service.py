@@ -7,6 +7,7 @@ from openai import OpenAI
 from app.models.book import Book
 from app.models.review import Review
 from app.models.synopsis_moderation import SynopsisModeration
+from app.services.catalogue_version import bump_catalogue_version
 import hashlib
 
 logger = logging.getLogger(__name__)
@@ -251,6 +252,7 @@ Generate only the synopsis without any additional commentary:"""
         item.status = "accepted"
         item.reviewed_at = datetime.now(timezone.utc)
         item.updated_at = datetime.now(timezone.utc)
+        bump_catalogue_version(db)
         db.commit()
 
         return {
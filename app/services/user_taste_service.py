@@ -0,0 +1,138 @@
+# app/services/user_taste_service.py
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Mapping, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.review import Review
+from app.models.user_emotion_taste import UserEmotionTaste
+from app.services.emotion_profile_service import EmotionProfileService
+from app.services.mood_recommendation.user_taste import review_taste, review_taste_weight
+
+logger = logging.getLogger(__name__)
+
+
+class UserTasteService:
+    """
+    Persistent per-user emotion taste vectors.
+
+    `user_emotion_tastes` holds, per user and emotion, the rating- and
+    recency-weighted sum of their reviews' emotion mixes (see
+    mood_recommendation.user_taste). Review writes apply the contribution of a
+    single review, so tastes never need re-deriving from review text at
+    request time.
+    """
+
+    def __init__(self, db: Session, emotion_profiles: Optional[EmotionProfileService] = None):
+        self.db = db
+        self.emotion_profiles = emotion_profiles or EmotionProfileService(db)
+
+    def get_taste(self, user_id: str) -> dict[str, float]:
+        rows = self.db.execute(
+            select(UserEmotionTaste.emotion, UserEmotionTaste.weight).where(UserEmotionTaste.user_id == user_id)
+        )
+        return {emotion: weight for emotion, weight in rows}
+
+    # --- Commands (caller commits) ---
+    def apply_review_change(
+        self,
+        user_id: str,
+        *,
+        created_at: Optional[datetime],
+        old_rating: Optional[int] = None,
+        old_text: Optional[str] = None,
+        new_rating: Optional[int] = None,
+        new_text: Optional[str] = None,
+    ) -> Optional[dict[str, float]]:
+        """
+        Apply the taste delta of one review being added, edited or removed.
+
+        A side with no rating is absent (None/None for an add's old side).
+        Returns the user's new taste, or None when nothing changed or
+        extraction failed (the user is left for the next offline rebuild).
+        """
+        if (old_rating, old_text) == (new_rating, new_text):
+            return None
+        try:
+            delta: dict[str, float] = {}
+            if new_rating is not None:
+                delta.update(review_taste(new_rating, created_at, self.emotion_profiles.extract_counts(new_text)))
+            if old_rating is not None:
+                old = review_taste(old_rating, created_at, self.emotion_profiles.extract_counts(old_text))
+                for emotion, weight in old.items():
+                    delta[emotion] = delta.get(emotion, 0.0) - weight
+        except Exception as e:
+            logger.warning(f"Emotion extraction failed for user {user_id}; taste not updated: {e}")
+            return None
+
+        delta = {emotion: weight for emotion, weight in delta.items() if weight}
+        if not delta:
+            return None
+
+        for emotion, weight in delta.items():
+            result = self.db.execute(
+                update(UserEmotionTaste)
+                .where(UserEmotionTaste.user_id == user_id, UserEmotionTaste.emotion == emotion)
+                .values(weight=UserEmotionTaste.weight + weight)
+            )
+            if result.rowcount == 0 and weight > 0:
+                self.db.execute(insert(UserEmotionTaste).values(user_id=user_id, emotion=emotion, weight=weight))
+        # Subtracting a review leaves float residue; anything this small is gone
+        residue = review_taste_weight(5, None) * 1e-9
+        self.db.execute(
+            delete(UserEmotionTaste).where(UserEmotionTaste.user_id == user_id, UserEmotionTaste.weight <= residue)
+        )
+        return self.get_taste(user_id)
+
+    def write_tastes_bulk(self, tastes_by_user: Mapping[str, Mapping[str, float]], chunk_size: int = 500) -> int:
+        """Replace the tastes of many users with one DELETE and INSERT per chunk."""
+        user_ids = list(tastes_by_user)
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            self.db.execute(delete(UserEmotionTaste).where(UserEmotionTaste.user_id.in_(chunk)))
+            rows = [
+                {"user_id": user_id, "emotion": emotion, "weight": weight}
+                for user_id in chunk
+                for emotion, weight in tastes_by_user[user_id].items()
+                if weight > 0
+            ]
+            if rows:
+                self.db.execute(insert(UserEmotionTaste), rows)
+        return len(user_ids)
+
+    def rebuild_all(self, chunk_size: int = 1000) -> int:
+        """
+        Recompute every user's taste from their reviews, committing per chunk
+        of users, and drop tastes of users with no reviews left. Returns the
+        number of users written.
+        """
+        written = 0
+        last_user_id = None
+        while True:
+            stmt = select(Review.user_id).distinct().order_by(Review.user_id).limit(chunk_size)
+            if last_user_id is not None:
+                stmt = stmt.where(Review.user_id > last_user_id)
+            user_ids = list(self.db.scalars(stmt))
+            if not user_ids:
+                break
+
+            tastes: dict[str, dict[str, float]] = {user_id: {} for user_id in user_ids}
+            rows = self.db.execute(
+                select(Review.user_id, Review.rating, Review.created_at, Review.body).where(Review.user_id.in_(user_ids))
+            )
+            for user_id, rating, created_at, body in rows:
+                taste = tastes[user_id]
+                for emotion, weight in review_taste(rating, created_at, self.emotion_profiles.extract_counts(body)).items():
+                    taste[emotion] = taste.get(emotion, 0.0) + weight
+            written += self.write_tastes_bulk(tastes)
+            self.db.commit()
+            last_user_id = user_ids[-1]
+
+        self.db.execute(delete(UserEmotionTaste).where(UserEmotionTaste.user_id.not_in(select(Review.user_id))))
+        self.db.commit()
+        return written
@@ -0,0 +1,39 @@
+"""Add book_rating_stats table
+
+Revision ID: 3a9d41c7e2b0
+Revises: 774e91b2ce14
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9d41c7e2b0'
+down_revision: Union[str, None] = '774e91b2ce14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'book_rating_stats',
+        sa.Column('book_id', sa.String(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('average_rating', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['book_id'], ['book.book_id'], ),
+        sa.PrimaryKeyConstraint('book_id')
+    )
+    # Backfill from existing reviews
+    op.execute(
+        "INSERT INTO book_rating_stats (book_id, review_count, rating_sum, average_rating) "
+        "SELECT book_id, COUNT(*), SUM(rating), AVG(rating) FROM reviews GROUP BY book_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('book_rating_stats')
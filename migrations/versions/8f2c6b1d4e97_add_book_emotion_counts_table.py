@@ -0,0 +1,34 @@
+"""Add book_emotion_counts table
+
+Revision ID: 8f2c6b1d4e97
+Revises: 3a9d41c7e2b0
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c6b1d4e97'
+down_revision: Union[str, None] = '3a9d41c7e2b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Populate with `python scripts/build_emotion_profiles.py` after upgrading.
+    op.create_table(
+        'book_emotion_counts',
+        sa.Column('book_id', sa.String(), nullable=False),
+        sa.Column('emotion', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['book.book_id'], ),
+        sa.PrimaryKeyConstraint('book_id', 'emotion')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('book_emotion_counts')
@@ -0,0 +1,32 @@
+"""Add single-row catalogue_version table for GET /books ETags
+
+Revision ID: b8e4f1a7c250
+Revises: f3b8d2a6c417
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f1a7c250'
+down_revision: Union[str, None] = 'f3b8d2a6c417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalogue_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO catalogue_version (id, version) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('catalogue_version')
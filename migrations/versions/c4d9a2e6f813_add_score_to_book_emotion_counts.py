@@ -0,0 +1,30 @@
+"""Add score column to book_emotion_counts
+
+Revision ID: c4d9a2e6f813
+Revises: b8e4f1a7c250
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d9a2e6f813'
+down_revision: Union[str, None] = 'b8e4f1a7c250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Scores need the emotion lexicon, so they are filled in by
+    # `python scripts/build_emotion_profiles.py` after upgrading.
+    with op.batch_alter_table('book_emotion_counts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score', sa.Float(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('book_emotion_counts', schema=None) as batch_op:
+        batch_op.drop_column('score')
@@ -0,0 +1,34 @@
+"""Add profile_built_at to book and index reviews.updated_at
+
+Revision ID: c4e8a2f61b93
+Revises: 8f2c6b1d4e97
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f61b93'
+down_revision: Union[str, None] = '8f2c6b1d4e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Books start without a watermark, so the first incremental rebuild
+    # (`build_emotion_profiles.py --incremental`) processes every reviewed book.
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profile_built_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_index('ix_reviews_updated_at', 'reviews', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_updated_at', table_name='reviews')
+
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_column('profile_built_at')
@@ -0,0 +1,26 @@
+"""Index lower(book.title) for exact title lookups
+
+Revision ID: d2a7e5c9b316
+Revises: c4d9a2e6f813
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7e5c9b316'
+down_revision: Union[str, None] = 'c4d9a2e6f813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_book_title_lower', 'book', [sa.text('lower(title)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_title_lower', table_name='book')
@@ -0,0 +1,34 @@
+"""Add user_emotion_tastes table
+
+Revision ID: d7b3e5a90c12
+Revises: c4e8a2f61b93
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7b3e5a90c12'
+down_revision: Union[str, None] = 'c4e8a2f61b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Populate with `python scripts/build_emotion_profiles.py --user-tastes` after upgrading.
+    op.create_table(
+        'user_emotion_tastes',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('emotion', sa.String(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'emotion')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_emotion_tastes')
@@ -0,0 +1,25 @@
+"""Index book (created_at, book_id) for catalogue pagination
+
+Revision ID: e5a1c9f3b724
+Revises: d7b3e5a90c12
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9f3b724'
+down_revision: Union[str, None] = 'd7b3e5a90c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_book_created_at_book_id', 'book', ['created_at', 'book_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_created_at_book_id', table_name='book')
@@ -0,0 +1,75 @@
+"""Add book_fts full-text index and sync triggers
+
+Revision ID: f3b8d2a6c417
+Revises: e5a1c9f3b724
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2a6c417'
+down_revision: Union[str, None] = 'e5a1c9f3b724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FTS5 is SQLite-only; keyword search is unavailable on other backends.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(
+            book_id UNINDEXED, title, subtitle, abstract, CommunitySynopsis,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """
+    )
+    # FTS rows share their book's rowid, so the triggers replace them with a
+    # rowid lookup instead of scanning the index for the unindexed book_id.
+    for trigger in ("book_fts_ai", "book_fts_ad", "book_fts_au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute(
+        """
+        CREATE TRIGGER book_fts_ai AFTER INSERT ON book BEGIN
+            INSERT INTO book_fts (rowid, book_id, title, subtitle, abstract, CommunitySynopsis)
+            VALUES (new.rowid, new.book_id, new.title, new.subtitle, new.abstract, new.CommunitySynopsis);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER book_fts_ad AFTER DELETE ON book BEGIN
+            DELETE FROM book_fts WHERE rowid = old.rowid;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER book_fts_au
+        AFTER UPDATE OF book_id, title, subtitle, abstract, CommunitySynopsis ON book BEGIN
+            DELETE FROM book_fts WHERE rowid = old.rowid;
+            INSERT INTO book_fts (rowid, book_id, title, subtitle, abstract, CommunitySynopsis)
+            VALUES (new.rowid, new.book_id, new.title, new.subtitle, new.abstract, new.CommunitySynopsis);
+        END
+        """
+    )
+    op.execute("DELETE FROM book_fts")
+    op.execute(
+        "INSERT INTO book_fts (rowid, book_id, title, subtitle, abstract, CommunitySynopsis) "
+        "SELECT rowid, book_id, title, subtitle, abstract, CommunitySynopsis FROM book"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS book_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS book_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS book_fts_ai")
+    op.execute("DROP TABLE IF EXISTS book_fts")
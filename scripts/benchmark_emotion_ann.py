@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of the IVF emotion index against the exact matrix scan.
+
+Uses the catalogue matrix from the database (--from-db) or a synthetic
+clustered catalogue, then for random mood-like queries compares the ANN
+top-k (with a random read set excluded) with the exact top-k.
+
+Usage:
+    python scripts/benchmark_emotion_ann.py [--books 1000000] [--k 10] [--probes 4 8 16]
+    python scripts/benchmark_emotion_ann.py --from-db
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.mood_recommendation.emotion_ann import IVFIndex
+from app.services.mood_recommendation.emotion_index import EmotionIndex, top_k_indices
+
+
+def synthetic_vectors(books: int, emotions: int, seed: int) -> np.ndarray:
+    """Sparse, clustered non-negative rows, L2-normalised like stored profiles."""
+    rng = np.random.default_rng(seed)
+    centres = rng.random((256, emotions), dtype=np.float32) ** 4
+    vectors = centres[rng.integers(0, len(centres), books)]
+    vectors = vectors + 0.1 * rng.random((books, emotions), dtype=np.float32) ** 4
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def database_vectors() -> np.ndarray:
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return EmotionIndex(ann_min_books=0).get_matrix(db).vectors
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-db", action="store_true", help="Use the catalogue matrix from the database")
+    parser.add_argument("--books", type=int, default=1_000_000, help="Synthetic catalogue size")
+    parser.add_argument("--emotions", type=int, default=24, help="Synthetic emotion columns")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--read-set", type=int, default=200, help="Random books excluded per query")
+    parser.add_argument("--lists", type=int, default=None, help="IVF clusters (default: sqrt(books))")
+    parser.add_argument("--probes", type=int, nargs="+", default=[2, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = database_vectors() if args.from_db else synthetic_vectors(args.books, args.emotions, args.seed)
+    print(f"Catalogue: {vectors.shape[0]:,} books x {vectors.shape[1]} emotions")
+
+    started = time.perf_counter()
+    index = IVFIndex(vectors, n_lists=args.lists, seed=args.seed)
+    print(f"IVF build: {index.n_lists} lists in {time.perf_counter() - started:.2f}s\n")
+
+    rng = np.random.default_rng(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        query = np.zeros(vectors.shape[1], dtype=np.float32)
+        query[rng.choice(vectors.shape[1], 2, replace=False)] = rng.random(2)
+        query /= np.linalg.norm(query)
+        exclude = np.zeros(len(vectors), dtype=bool)
+        exclude[rng.choice(len(vectors), min(args.read_set, len(vectors)), replace=False)] = True
+        queries.append((query, exclude))
+
+    started = time.perf_counter()
+    exact = [set(top_k_indices(vectors @ q, args.k, exclude=e).tolist()) for q, e in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"{'method':>10}  {'recall@' + str(args.k):>10}  {'ms/query':>9}")
+    print(f"{'exact':>10}  {1.0:>10.3f}  {exact_ms:>9.2f}")
+
+    for n_probe in args.probes:
+        started = time.perf_counter()
+        found = [index.search(q, args.k, n_probe=n_probe, exclude=e)[0] for q, e in queries]
+        ann_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([len(truth & set(f.tolist())) / max(len(truth), 1) for truth, f in zip(exact, found)])
+        print(f"{'probe ' + str(n_probe):>10}  {recall:>10.3f}  {ann_ms:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
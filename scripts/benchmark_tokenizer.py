@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compare the NLTK and fast TextPreprocessor tokenizers on the seeded reviews.
+
+For every review in seed_sample_reviews.MOOD_REVIEWS this checks that both
+modes produce identical emotion counts, then times a full pass of each mode
+(extractor result cache disabled, so every review is preprocessed each pass).
+
+Usage:
+    python scripts/benchmark_tokenizer.py [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.mood_recommendation.emotion_extractor import EmotionExtractor, emotion_lexicon
+from app.services.mood_recommendation.preprocessing import TextPreprocessor
+from seed_sample_reviews import MOOD_REVIEWS
+
+
+def _extractor(preprocessor: TextPreprocessor) -> EmotionExtractor:
+    extractor = EmotionExtractor(emotion_lexicon, cache_size=0)
+    extractor.preprocessor = preprocessor
+    return extractor
+
+
+def _time_pass(extractor: EmotionExtractor, reviews: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for review in reviews:
+            extractor.extract_emotions(review)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus per mode")
+    args = parser.parse_args()
+
+    reviews = [review["body"] for data in MOOD_REVIEWS.values() for review in data["reviews"]]
+    # Baseline: punkt tokenizer with the lemma memo disabled (the previous behaviour)
+    nltk_extractor = _extractor(TextPreprocessor(tokenizer="nltk", lemma_cache_size=0))
+    fast_extractor = _extractor(TextPreprocessor(tokenizer="fast"))
+
+    mismatches = 0
+    for review in reviews:
+        expected = nltk_extractor.extract_emotions(review)["counts"]
+        actual = fast_extractor.extract_emotions(review)["counts"]
+        if expected != actual:
+            mismatches += 1
+            diff = {e: (expected[e], actual[e]) for e in expected if expected[e] != actual[e]}
+            print(f"✗ Counts differ (nltk, fast) {diff}: {review[:70]}...")
+
+    print(f"Reviews compared: {len(reviews)}  mismatches: {mismatches}")
+
+    nltk_seconds = _time_pass(nltk_extractor, reviews, args.repeat)
+    fast_seconds = _time_pass(fast_extractor, reviews, args.repeat)
+    total = len(reviews) * args.repeat
+    print(f"nltk: {nltk_seconds:.3f}s ({total / nltk_seconds:,.0f} reviews/s)")
+    print(f"fast: {fast_seconds:.3f}s ({total / fast_seconds:,.0f} reviews/s)")
+    print(f"speed-up: {nltk_seconds / fast_seconds:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
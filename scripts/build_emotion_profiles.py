@@ -5,24 +5,56 @@ Build/rebuild emotion profiles for books based on reviews.
 This script:
 1. Fetches all reviews for each book
 2. Extracts emotions from review text
-3. Creates emotion profiles (for recommendations)
+3. Rewrites the book's emotion counts (book_emotion_counts) and its
+   emotion_profile JSON, which review writes then keep up to date
+
+With --bulk, reviews are streamed in chunks of whole books and extraction
+fans out over a process pool (one extractor per worker); each chunk is
+written back with batched statements in a single transaction.
+
+Every rebuild stamps book.profile_built_at. --incremental only recomputes
+books with reviews created or edited since their own stamp; --since does
+the same against a fixed timestamp. Both imply --bulk.
+
+--user-tastes rebuilds every user's emotion taste vector
+(user_emotion_tastes) from their reviews instead; run it once after the
+migration and whenever TASTE_HALF_LIFE_DAYS changes.
 """
 
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.models.book import Book
 from app.models.review import Review
+from app.services.emotion_profile_service import EmotionProfileService
+from app.services.review_service import ReviewService
+from app.services.user_taste_service import UserTasteService
 from app.services.mood_recommendation.emotion_extractor import (
     EmotionExtractor,
     emotion_lexicon
 )
-import json
+
+def _build_watermark() -> datetime:
+    """
+    profile_built_at value for a rebuild starting now.
+
+    Taken before any review is read so edits made during the run are caught
+    next time, and backed off a second because SQLite's CURRENT_TIMESTAMP
+    (Review.updated_at) only has second precision.
+    """
+    return datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=1)
+
 
 def build_emotion_profiles(limit: int = None) -> dict:
     """
@@ -51,9 +83,12 @@ def build_emotion_profiles(limit: int = None) -> dict:
         "errors": []
     }
     
+    built_at = _build_watermark()
+
     try:
         # Initialize emotion extractor
         emotion_extractor = EmotionExtractor(emotion_lexicon)
+        profiles = EmotionProfileService(db, emotion_extractor=emotion_extractor)
         print(f"✓ Initialized emotion extractor with {len(emotion_lexicon)} emotions")
         
         # Get all books
@@ -71,66 +106,30 @@ def build_emotion_profiles(limit: int = None) -> dict:
                     Review.book_id == book.book_id
                 ).all()
                 
-                # Initialize empty profile for all books
-                emotions_aggregated = {
-                    emotion: {"count": 0, "score": 0.0} 
-                    for emotion in emotion_lexicon.keys()
-                }
-                
+                review_texts = [review.body for review in reviews if review.body]
                 if not reviews:
                     stats["books_without_reviews"] += 1
                     print(f"[{idx}/{len(books)}] {book.title}: No reviews → default empty profile")
-                else:
-                    # Extract emotions from all reviews
-                    for review in reviews:
-                        if review.body:
-                            print(f"    Review: {review.body}")
-                            try:
-                                emotions = emotion_extractor.extract_emotions(review.body)
-                            except Exception as e:
-                                print(f"    ❌ Emotion extraction failed for review: {str(e)}")
-                                stats["errors"].append(f"Review extraction failed for book {book.title}: {str(e)}")
-                                continue
-
-                            print(f"    Extracted: {emotions}")
-                            counts = emotions.get("counts", {}) or {}
-                            scores = emotions.get("scores", {}) or {}
-                            if not counts and not scores:
-                                print("    ⚠️ No emotions detected in this review")
-
-                            for emotion, count in counts.items():
-                                emotions_aggregated[emotion]["count"] += count
-                                emotions_aggregated[emotion]["score"] += scores.get(emotion, 0.0)
-                            stats["reviews_analyzed"] += 1
-                    
-                    # Print top emotions for book
-                    top_emotions = sorted(
-                        [(e, d["score"]) for e, d in emotions_aggregated.items()],
-                        key=lambda x: x[1],
-                        reverse=True
-                    )[:3]
+
+                # Rebuild counts + emotion_profile column — always save!
+                try:
+                    counts = profiles.rebuild_book(book.book_id, review_texts, built_at=built_at)
+                    db.commit()
+                    stats["emotion_profiles_created"] += 1
+                    stats["reviews_analyzed"] += len(review_texts)
+                except Exception as e:
+                    db.rollback()
+                    stats["errors"].append(f"Failed to save profile for {book.title}: {str(e)}")
+                    print(f"    ❌ Failed to save profile: {str(e)}")
+                    continue
+
+                if reviews:
                     top_emotions_str = ", ".join(
-                        [f"{e}({s:.1f})" for e, s in top_emotions if s > 0]
+                        f"{e}({c})" for e, c in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:3]
                     ) or "No emotions detected"
-                    
                     print(f"[{idx}/{len(books)}] {book.title}: {len(reviews)} reviews analyzed")
                     print(f"             Top emotions: {top_emotions_str}\n")
                 
-                # Aggregate and store in book model (emotion_profile column) — always save!
-                if hasattr(book, "emotion_profile"):
-                    try:
-                        profile_json = json.dumps(emotions_aggregated)
-                        book.emotion_profile = profile_json
-                        db.add(book)
-                        db.commit()
-                        if reviews:
-                            print(f"    ✅ Saved emotion profile for '{book.title}' to DB")
-                        stats["emotion_profiles_created"] += 1
-                    except Exception as e:
-                        db.rollback()
-                        stats["errors"].append(f"Failed to save profile for {book.title}: {str(e)}")
-                        print(f"    ❌ Failed to save profile: {str(e)}")
-                
                 stats["books_processed"] += 1
                 
             except Exception as e:
@@ -165,6 +164,149 @@ def build_emotion_profiles(limit: int = None) -> dict:
         db.close()
 
 
+# --- Bulk rebuild ---
+
+# Per-process extractor, created once by the pool initializer
+_worker_extractor = None
+
+
+def _init_worker(tokenizer: str) -> None:
+    global _worker_extractor
+    from app.services.mood_recommendation.preprocessing import TextPreprocessor
+
+    _worker_extractor = EmotionExtractor(emotion_lexicon)
+    _worker_extractor.preprocessor = TextPreprocessor(tokenizer=tokenizer)
+
+
+def _count_chunk(rows: list) -> tuple:
+    """Emotion counts and summed review scores per book for one chunk of (book_id, body) rows."""
+    texts_by_book = {}
+    for book_id, body in rows:
+        texts_by_book.setdefault(book_id, []).append(body)
+
+    counts_by_book, scores_by_book = {}, {}
+    for book_id, texts in texts_by_book.items():
+        extracted = _worker_extractor.extract_emotions_batch(texts)
+        counts_by_book[book_id] = {emotion: count for emotion, count in extracted["counts"].items() if count}
+        scores_by_book[book_id] = {emotion: score for emotion, score in extracted["score_sums"].items() if score}
+    return counts_by_book, scores_by_book
+
+
+def rebuild_emotion_profiles_bulk(
+    workers: int = None,
+    chunk_size: int = 5000,
+    tokenizer: str = "nltk",
+    incremental: bool = False,
+    since: datetime = None,
+    db: Session = None,
+) -> dict:
+    """
+    Rebuild emotion profiles with a process pool.
+
+    Args:
+        workers: Extraction processes (default: CPU count; 0 runs in-process)
+        chunk_size: Reviews per chunk (rounded up to whole books)
+        tokenizer: TextPreprocessor tokenizer used by the workers ("nltk" or "fast")
+        incremental: Only books with reviews changed since their profile_built_at
+        since: Only books with reviews changed at or after this time
+        db: Session to use (default: a new SessionLocal)
+
+    Returns:
+        Dict with stats (books_processed, reviews_analyzed, errors)
+    """
+    owns_session = db is None
+    db = db or SessionLocal()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    stats = {
+        "books_processed": 0,
+        "reviews_analyzed": 0,
+        "books_without_reviews": 0,
+        "emotion_profiles_created": 0,
+        "chunks": 0,
+        "errors": []
+    }
+    started = time.perf_counter()
+    built_at = _build_watermark()
+    profiles = EmotionProfileService(db, emotion_extractor=EmotionExtractor(emotion_lexicon))
+    seen_books = set()
+
+    def write_chunk(totals: tuple, review_count: int) -> None:
+        counts_by_book, scores_by_book = totals
+        try:
+            written = profiles.write_counts_bulk(counts_by_book, scores_by_book, built_at=built_at)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            stats["errors"].append(f"Chunk {stats['chunks'] + 1} ({len(counts_by_book)} books): {str(e)}")
+            return
+        stats["chunks"] += 1
+        stats["books_processed"] += written
+        stats["emotion_profiles_created"] += written
+        stats["reviews_analyzed"] += review_count
+        elapsed = time.perf_counter() - started
+        print(f"  chunk {stats['chunks']}: {stats['reviews_analyzed']} reviews, "
+              f"{stats['books_processed']} books ({stats['reviews_analyzed'] / elapsed:,.0f} reviews/s)")
+
+    try:
+        review_service = ReviewService(db)
+        target_books = None
+        if incremental or since is not None:
+            target_books = review_service.get_books_with_changed_reviews(since=since)
+            print(f"{len(target_books)} books have changed reviews")
+        chunks = review_service.iter_review_text_chunks(chunk_size=chunk_size, book_ids=target_books)
+        if workers == 0:
+            _init_worker(tokenizer)
+            for rows in chunks:
+                seen_books.update(book_id for book_id, _ in rows)
+                write_chunk(_count_chunk(rows), len(rows))
+        else:
+            print(f"Extracting with {workers} worker processes...")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tokenizer,)) as pool:
+                # Keep a couple of chunks per worker in flight; results are written in order.
+                pending = deque()
+                for rows in chunks:
+                    seen_books.update(book_id for book_id, _ in rows)
+                    pending.append((pool.submit(_count_chunk, rows), len(rows)))
+                    while len(pending) >= workers * 2:
+                        future, review_count = pending.popleft()
+                        write_chunk(future.result(), review_count)
+                while pending:
+                    future, review_count = pending.popleft()
+                    write_chunk(future.result(), review_count)
+
+        # Books without any review text get an empty profile
+        candidates = target_books if target_books is not None else db.scalars(select(Book.book_id))
+        unreviewed = [book_id for book_id in candidates if book_id not in seen_books]
+        for start in range(0, len(unreviewed), chunk_size):
+            batch = unreviewed[start:start + chunk_size]
+            write_chunk(({book_id: {} for book_id in batch}, {}), 0)
+            stats["books_without_reviews"] += len(batch)
+
+        print(f"\n✓ Rebuilt {stats['books_processed']} profiles from {stats['reviews_analyzed']} reviews "
+              f"in {time.perf_counter() - started:.1f}s ({len(stats['errors'])} errors)")
+        for error in stats["errors"][:5]:
+            print(f"  - {error}")
+        return stats
+    finally:
+        if owns_session:
+            db.close()
+
+
+def rebuild_user_tastes(chunk_size: int = 1000, db: Session = None) -> int:
+    """Recompute every user's taste vector; returns the number of users written."""
+    owns_session = db is None
+    db = db or SessionLocal()
+    started = time.perf_counter()
+    try:
+        profiles = EmotionProfileService(db, emotion_extractor=EmotionExtractor(emotion_lexicon))
+        written = UserTasteService(db, profiles).rebuild_all(chunk_size=chunk_size)
+        print(f"\n✓ Rebuilt {written} user tastes in {time.perf_counter() - started:.1f}s")
+        return written
+    finally:
+        if owns_session:
+            db.close()
+
+
 def show_emotion_profile_stats():
     """Show emotion extraction capabilities."""
     print("""
@@ -204,6 +346,45 @@ if __name__ == "__main__":
         default=None,
         help="Limit number of books to process (for testing)"
     )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Rebuild all books with a process pool (ignores --limit)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --bulk (default: CPU count, 0 = in-process)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=5000,
+        help="Reviews per chunk for --bulk"
+    )
+    parser.add_argument(
+        "--tokenizer",
+        choices=["nltk", "fast"],
+        default="nltk",
+        help="Tokenizer used by --bulk workers"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rebuild books whose reviews changed since their last build"
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Only rebuild books with reviews changed at/after this UTC time (ISO format)"
+    )
+    parser.add_argument(
+        "--user-tastes",
+        action="store_true",
+        help="Rebuild per-user emotion taste vectors instead of book profiles"
+    )
     parser.add_argument(
         "--info",
         action="store_true",
@@ -214,6 +395,18 @@ if __name__ == "__main__":
     
     if args.info:
         show_emotion_profile_stats()
+    elif args.user_tastes:
+        print("Rebuilding user taste vectors...\n")
+        rebuild_user_tastes()
+    elif args.bulk or args.incremental or args.since:
+        print("Rebuilding all emotion profiles (bulk)...\n")
+        stats = rebuild_emotion_profiles_bulk(
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            tokenizer=args.tokenizer,
+            incremental=args.incremental,
+            since=args.since,
+        )
     else:
         print("Building emotion profiles from reviews...\n")
         stats = build_emotion_profiles(limit=args.limit)
@@ -27,6 +27,7 @@ from app.models.review import Review
 from app.models.book import Book
 from app.models.user import User
 from app.models.mood import Mood
+from app.services.review_service import ReviewService
 
 
 def import_reviews_from_csv(csv_file: str, user_id: str) -> dict:
@@ -136,6 +137,8 @@ def import_reviews_from_csv(csv_file: str, user_id: str) -> dict:
         
         # Commit successful reviews
         db.commit()
+        # Reviews were inserted directly, so refresh the rating aggregates
+        ReviewService(db).rebuild_rating_stats()
         print(f"\n✓ Successfully imported {stats['success_count']} reviews")
         if stats["skipped_count"] > 0:
             print(f"⊘ Skipped {stats['skipped_count']} duplicate/incomplete reviews")
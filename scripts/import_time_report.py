@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Report per-module import cost of the API (or any module).
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+prints the slowest modules by cumulative time, plus self time grouped by
+top-level package, so cold-start regressions are easy to spot.
+
+Usage:
+    python scripts/import_time_report.py [--module app.main] [--top 25]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# "import time:       472 |     613553 |   fastapi"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def collect(module: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="Rows to show per table")
+    args = parser.parse_args()
+
+    rows = collect(args.module)
+    total_us = max((cumulative for _, _, cumulative in rows), default=0)
+    print(f"Importing {args.module}: {total_us / 1000:.0f} ms across {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    print(f"\n{'self ms':>8}  package")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>8.1f}  {package}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,7 @@ from app.db.database import SessionLocal
 from app.models.review import Review
 from app.models.book import Book
 from app.models.user import User
+from app.services.review_service import ReviewService
 
 MOOD_REVIEWS = {
 
@@ -324,6 +325,8 @@ def seed():
                 print(f"  ✗  [{mood:>12}]  Book {book_id} ERROR: {e}")
 
         db.commit()
+        # Reviews were inserted directly, so refresh the rating aggregates
+        ReviewService(db).rebuild_rating_stats()
 
         print(f"\n{'='*70}")
         print("SEEDING COMPLETE")
@@ -3,6 +3,8 @@ Shared pytest fixtures and configuration for review tests.
 This file is automatically discovered by pytest.
 """
 
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -14,6 +16,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+# TestClient runs the app lifespan; skip the background NLTK and Chroma warm-ups there.
+os.environ.setdefault("NLTK_WARMUP", "0")
+os.environ.setdefault("CHROMA_WARMUP", "0")
+
 from app.main import app
 from app.db.database import Base, get_db
 from app.services.review_service import ReviewService
@@ -21,6 +27,9 @@ from app.models.review import Review
 from app.models.user import User
 from app.models.book import Book
 from app.models.mood import Mood
+from app.services.mood_recommendation.rating_matrix import rating_index
+from app.services.mood_recommendation.result_cache import recommendation_cache
+from app.services.mood_recommendation.user_taste import user_taste_index
 
 """In-memory SQLite database setup for testing"""
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -37,6 +46,10 @@ def mock_db():
 @pytest.fixture
 def db():
     Base.metadata.create_all(bind=engine)
+    # Every test starts from a fresh database, so no cached result may carry over
+    recommendation_cache.bump_global()
+    rating_index.invalidate()
+    user_taste_index.invalidate()
     session = TestingSessionLocal()
     try:
         yield session
@@ -13,12 +13,15 @@ with patch("app.services.cognito_service.boto3.client") as mock_boto_client, \
     from app.main import app
 
 from app.models.book import Book
+from app.models.book_genre import BookGenre
 from app.models.genre import Genre
 from app.schemas.book import BookCreate, BookUpdate, BookRead
 from app.dependencies.services import get_book_service
 from app.dependencies.auth import get_current_user
 from app.dependencies.roles import required_admin_role
 from app.dependencies.db import get_db
+from app.services.book_service import BookService
+from app.services.catalogue_version import bump_catalogue_version, catalogue_etag
 
 
 @pytest.fixture
@@ -122,7 +125,7 @@ class TestBookRoutes:
         assert data.index("Biography") < data.index("Fantasy")
 
     def test_get_books_success(self, client, mock_book_service, sample_book_read):
-        mock_book_service.get_books.return_value = [sample_book_read]
+        mock_book_service.list_books.return_value = ([sample_book_read.model_dump()], None)
         app.dependency_overrides[get_book_service] = lambda: mock_book_service
 
         response = client.get("/books/")
@@ -133,6 +136,67 @@ class TestBookRoutes:
         assert data[0]["book_id"] == "test-book-123"
         assert data[0]["title"] == "Test Book"
 
+    def test_get_books_pages_by_cursor_with_genre_and_field_filters(self, client, db):
+        fantasy = Genre(name="Fantasy")
+        db.add(fantasy)
+        db.add_all(
+            [Book(book_id=f"b{i}", title=f"Book {i}", created_at=datetime(2024, 1, 1 + i % 2)) for i in range(5)]
+        )
+        db.flush()
+        db.add_all([BookGenre(book_id=b, genre_id=fantasy.genre_id) for b in ("b1", "b2", "b4")])
+        db.commit()
+
+        first = client.get("/books/", params={"limit": 2, "fields": "title"})
+        assert first.status_code == 200
+        assert first.json() == [{"book_id": "b0", "title": "Book 0"}, {"book_id": "b2", "title": "Book 2"}]
+
+        pages = [first.json()]
+        cursor = first.headers["X-Next-Cursor"]
+        while cursor:
+            page = client.get("/books/", params={"limit": 2, "fields": "title", "cursor": cursor})
+            pages.append(page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+        assert [[b["book_id"] for b in page] for page in pages] == [["b0", "b2"], ["b4", "b1"], ["b3"]]
+
+        tagged = client.get("/books/", params=[("genre", "Fantasy"), ("genre", "Unknown")])
+        assert [b["book_id"] for b in tagged.json()] == ["b2", "b4", "b1"]
+        assert set(tagged.json()[0]) == set(BookRead.model_fields)
+
+    def test_get_books_rejects_bad_fields_and_cursors(self, client):
+        assert client.get("/books/", params={"fields": "title,password"}).status_code == 400
+        assert client.get("/books/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    def test_get_books_revalidates_with_etag(self, client, db, mock_book_service, sample_book_read):
+        mock_book_service.list_books.return_value = ([sample_book_read.model_dump()], None)
+        app.dependency_overrides[get_book_service] = lambda: mock_book_service
+
+        response = client.get("/books/")
+        etag = response.headers["ETag"]
+        assert client.get("/books/", params={"limit": 5}).headers["ETag"] != etag
+
+        not_modified = client.get("/books/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert mock_book_service.list_books.call_count == 2
+
+        BookService(db).add_book(BookCreate(book_id="new-book", title="New Book"))
+        assert client.get("/books/", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_get_books_etag_follows_the_committed_version(self, client, db, mock_book_service):
+        mock_book_service.list_books.return_value = ([], None)
+        app.dependency_overrides[get_book_service] = lambda: mock_book_service
+
+        # Any worker derives the same tag from the stored version alone
+        etag = client.get("/books/").headers["ETag"]
+        assert etag == catalogue_etag(0, None, None, None, None)
+
+        bump_catalogue_version(db)
+        db.rollback()
+        assert client.get("/books/", headers={"If-None-Match": etag}).status_code == 304
+
+        bump_catalogue_version(db)
+        db.commit()
+        assert client.get("/books/").headers["ETag"] == catalogue_etag(1, None, None, None, None)
+
     def test_get_book_success(self, client, mock_book_service, sample_book_read):
         mock_book_service.get_book.return_value = sample_book_read
         app.dependency_overrides[get_book_service] = lambda: mock_book_service
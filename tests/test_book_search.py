@@ -0,0 +1,115 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.book_search import ensure_book_search
+from app.dependencies.db import get_db
+from app.main import app
+from app.models.book import Book
+from app.services.book_search_service import BookSearchService, build_match_query
+
+
+def _ids(hits):
+    return [hit["book_id"] for hit in hits]
+
+
+def test_match_query_quotes_words_and_prefixes_the_last():
+    assert build_match_query("dune messiah") == '"dune" "messiah"*'
+    assert build_match_query('title:"x" OR -y*', prefix=False) == '"title" "x" "OR" "y"'
+    assert build_match_query("  ?! ") == ""
+
+
+def test_search_ranks_title_matches_first_and_supports_prefixes(db):
+    db.add_all(
+        [
+            Book(book_id="b1", title="Ocean Tales", abstract="Stories about the deep sea"),
+            Book(book_id="b2", title="Mountains", abstract="A climber remembers the ocean"),
+            Book(book_id="b3", title="Desert", CommunitySynopsis="Dry and quiet"),
+        ]
+    )
+    db.commit()
+    search = BookSearchService(db)
+
+    hits = search.search("ocean")
+    assert _ids(hits) == ["b1", "b2"]
+    assert hits[0]["score"] > hits[1]["score"] > 0
+    assert _ids(search.search("oce")) == ["b1", "b2"]
+    assert search.search("oce", prefix=False) == []
+    assert _ids(search.search("quiet")) == ["b3"]
+    assert search.search('"unbalanced') == []
+
+
+def test_triggers_keep_the_index_in_step_with_book_writes(db):
+    book = Book(book_id="b1", title="Old Name")
+    db.add(book)
+    db.commit()
+
+    book.title = "New Name"
+    db.commit()
+    search = BookSearchService(db)
+    assert _ids(search.search("new")) == ["b1"]
+    assert search.search("old") == []
+
+    db.delete(book)
+    db.commit()
+    assert search.search("new") == []
+
+
+def test_text_search_route(client, db):
+    db.add(Book(book_id="b1", title="Gardening Basics", subtitle="Soil and seeds"))
+    db.commit()
+    # The books routes depend on app.dependencies.db.get_db
+    app.dependency_overrides[get_db] = lambda: db
+
+    response = client.get("/books/search/text", params={"q": "gard"})
+
+    assert response.status_code == 200
+    assert [(hit["book_id"], hit["subtitle"]) for hit in response.json()] == [("b1", "Soil and seeds")]
+    assert client.get("/books/search/text", params={"q": ""}).status_code == 422
+
+
+def test_ensure_backfills_databases_created_without_the_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE book (book_id VARCHAR PRIMARY KEY, title VARCHAR, subtitle VARCHAR, "
+                                "abstract VARCHAR, CommunitySynopsis VARCHAR)"))
+        connection.execute(text("INSERT INTO book (book_id, title) VALUES ('b1', 'Legacy Book')"))
+
+    ensure_book_search(engine)
+    ensure_book_search(engine)
+
+    assert "book_fts" in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT book_id FROM book_fts WHERE book_fts MATCH 'legacy'")).all()
+    assert rows == [("b1",)]
+
+
+def test_triggers_replace_rows_by_rowid(db):
+    plan = db.execute(text("EXPLAIN QUERY PLAN DELETE FROM book_fts WHERE rowid = 1")).all()
+    # "INDEX 0:=" is a rowid lookup; an unconstrained "INDEX 0:" would scan the index
+    assert plan[0][-1].endswith("INDEX 0:=")
+
+    db.add(Book(book_id="b1", title="First"))
+    db.commit()
+    assert db.execute(text("SELECT f.book_id FROM book_fts AS f JOIN book AS b ON b.rowid = f.rowid")).all() == [("b1",)]
+
+
+def test_ensure_upgrades_old_triggers_and_realigns_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE book (book_id VARCHAR PRIMARY KEY, title VARCHAR, subtitle VARCHAR, "
+                                "abstract VARCHAR, CommunitySynopsis VARCHAR)"))
+        connection.execute(text("CREATE VIRTUAL TABLE book_fts USING fts5(book_id UNINDEXED, title, subtitle, "
+                                "abstract, CommunitySynopsis)"))
+        connection.execute(text("CREATE TRIGGER book_fts_ad AFTER DELETE ON book BEGIN "
+                                "DELETE FROM book_fts WHERE book_id = old.book_id; END"))
+        connection.execute(text("INSERT INTO book (book_id, title) VALUES ('b1', 'Old Index'), ('b2', 'Other')"))
+        # Rows copied without rowids, as the old triggers and backfill did
+        connection.execute(text("INSERT INTO book_fts (book_id, title) SELECT book_id, title FROM book ORDER BY book_id DESC"))
+
+    ensure_book_search(engine)
+
+    with engine.begin() as connection:
+        triggers = connection.execute(text("SELECT sql FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+        assert len(triggers) == 3 and all("rowid" in sql for sql in triggers)
+        connection.execute(text("DELETE FROM book WHERE book_id = 'b1'"))
+        rows = connection.execute(text("SELECT book_id FROM book_fts WHERE book_fts MATCH 'old OR other'")).all()
+    assert rows == [("b2",)]
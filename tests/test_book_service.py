@@ -161,4 +161,21 @@ class TestBookService:
 
         mock_db.delete.assert_not_called()
         mock_db.commit.assert_not_called()
-        assert result is False
\ No newline at end of file
+        assert result is False
+
+def test_column_projections_skip_orm_rows(db):
+    db.add_all(
+        [
+            Book(book_id="b1", title="One", abstract="long text", emotion_profile='{"happy": {"score": 100.0}}'),
+            Book(book_id="b2", title="Two"),
+        ]
+    )
+    db.commit()
+    db.expunge_all()
+    service = BookService(db)
+
+    assert service.get_book_titles() == {"b1": "One", "b2": "Two"}
+    assert service.get_book_titles(["b2", "missing"], chunk_size=1) == {"b2": "Two"}
+    assert service.get_emotion_profiles(["b1", "b2"]) == {"b1": '{"happy": {"score": 100.0}}', "b2": None}
+    # Nothing was loaded into the identity map
+    assert not list(db.identity_map.values())
@@ -4,7 +4,7 @@ import os
 import uuid
 from typing import Optional
 
-from app.services.chroma_service import ChromaService
+from app.services.chroma_service import ID_PAGE_SIZE, ChromaService, ChromaServiceRegistry, content_hash
 from app.models.book import Book
 from app.services.book_service import BookService
 
@@ -42,6 +42,9 @@ def chroma_service_mocked(mock_chroma_client, mock_chroma_collection):
         # Manually attach the mocks needed for the tests
         service.client = mock_chroma_client
         service.collection = mock_chroma_collection
+        # One fake vector per document: [len(document)]
+        service.embedding_function = Mock(side_effect=lambda docs: [[float(len(d))] for d in docs])
+        service.embedding_model = "test_embedding_model"
         yield service
 
 # Mock database session dependency
@@ -73,6 +76,31 @@ def create_mock_book(book_id: str, title: str, abstract: Optional[str]):
     mock_book.abstract = abstract
     return mock_book
 
+# Stand-in for Collection.get over `records` (a list of IDs, or a dict of ID -> metadata)
+def chroma_get(records):
+    if not isinstance(records, dict):
+        records = dict.fromkeys(records)
+
+    def get(ids=None, include=None, limit=None, offset=0):
+        assert include is not None, "collection.get() without include reads documents and embeddings"
+        selected = [i for i in records if ids is None or i in ids][offset:]
+        if limit is not None:
+            selected = selected[:limit]
+        page = {"ids": selected}
+        if "metadatas" in include:
+            page["metadatas"] = [records[i] for i in selected]
+        return page
+    return get
+
+# Metadata ChromaService stores for a book
+def book_metadata(title: str, description: str, document: str):
+    return {
+        "title": title,
+        "description": description,
+        "content_hash": content_hash(document),
+        "embedding_model": "test_embedding_model",
+    }
+
 # --- Tests for sync_books ---
 
 def test_sync_books_no_books_in_db_or_chroma(
@@ -80,15 +108,16 @@ def test_sync_books_no_books_in_db_or_chroma(
 ):
     # Arrange
     mock_book_service.get_books.return_value = []
-    mock_chroma_collection.get.return_value = {"ids": []}
+    mock_chroma_collection.get.side_effect = chroma_get([])
 
     # Act
     result = chroma_service_mocked.sync_books()
 
     # Assert
-    assert result == {"upserted": 0, "deleted": 0}
+    assert result == {"upserted": 0, "skipped": 0, "deleted": 0}
     mock_book_service.get_books.assert_called_once_with(limit=None)
-    mock_chroma_collection.get.assert_called_once()
+    # One ID-only page covers the whole (small) collection
+    mock_chroma_collection.get.assert_any_call(include=[], limit=ID_PAGE_SIZE, offset=0)
     mock_chroma_collection.upsert.assert_not_called()
     mock_chroma_collection.delete.assert_not_called()
 
@@ -103,21 +132,24 @@ def test_sync_books_add_new_books_to_chroma(
         create_mock_book(book_id_2, "Title 2", None),
     ]
     mock_book_service.get_books.return_value = db_books
-    mock_chroma_collection.get.return_value = {"ids": []}
+    mock_chroma_collection.get.side_effect = chroma_get([])
 
     # Act
     result = chroma_service_mocked.sync_books()
 
     # Assert
-    assert result == {"upserted": 2, "deleted": 0}
+    assert result == {"upserted": 2, "skipped": 0, "deleted": 0}
     mock_book_service.get_books.assert_called_once_with(limit=None)
-    mock_chroma_collection.get.assert_called_once()
-    # Assert that upsert was called via add_book
-    assert mock_chroma_collection.upsert.call_count == 2
-    mock_chroma_collection.upsert.assert_has_calls([
-        call(ids=[book_id_1], documents=[f"Title 1. Abstract 1"], metadatas=[{'title': 'Title 1', 'description': 'Abstract 1'}]),
-        call(ids=[book_id_2], documents=[f"Title 2"], metadatas=[{'title': 'Title 2', 'description': ''}]),
-    ], any_order=True)
+    # One ID-only page covers the whole (small) collection
+    mock_chroma_collection.get.assert_any_call(include=[], limit=ID_PAGE_SIZE, offset=0)
+    # Both books go in one batch: one embedding request, one upsert
+    chroma_service_mocked.embedding_function.assert_called_once_with(["Title 1. Abstract 1", "Title 2"])
+    mock_chroma_collection.upsert.assert_called_once_with(
+        ids=[book_id_1, book_id_2],
+        documents=["Title 1. Abstract 1", "Title 2"],
+        metadatas=[book_metadata("Title 1", "Abstract 1", "Title 1. Abstract 1"), book_metadata("Title 2", "", "Title 2")],
+        embeddings=[[19.0], [7.0]],
+    )
     mock_chroma_collection.delete.assert_not_called()
 
 def test_sync_books_delete_removed_books_from_chroma(
@@ -127,15 +159,16 @@ def test_sync_books_delete_removed_books_from_chroma(
     book_id_1 = str(uuid.uuid4())
     book_id_2 = str(uuid.uuid4())
     mock_book_service.get_books.return_value = [] # Main DB is empty
-    mock_chroma_collection.get.return_value = {"ids": [book_id_1, book_id_2]}
+    mock_chroma_collection.get.side_effect = chroma_get([book_id_1, book_id_2])
 
     # Act
     result = chroma_service_mocked.sync_books()
 
     # Assert
-    assert result == {"upserted": 0, "deleted": 2}
+    assert result == {"upserted": 0, "skipped": 0, "deleted": 2}
     mock_book_service.get_books.assert_called_once_with(limit=None)
-    mock_chroma_collection.get.assert_called_once()
+    # One ID-only page covers the whole (small) collection
+    mock_chroma_collection.get.assert_any_call(include=[], limit=ID_PAGE_SIZE, offset=0)
     mock_chroma_collection.upsert.assert_not_called()
     # Check that delete was called with the correct IDs (order doesn't matter)
     mock_chroma_collection.delete.assert_called_once()
@@ -158,22 +191,26 @@ def test_sync_books_mix_of_adds_updates_deletions(
     mock_book_service.get_books.return_value = db_books
 
     # ChromaDB state: one book to be updated, one to be deleted
-    mock_chroma_collection.get.return_value = {"ids": [book_id_update, book_id_delete]}
+    mock_chroma_collection.get.side_effect = chroma_get([book_id_update, book_id_delete])
 
     # Act
     result = chroma_service_mocked.sync_books()
 
     # Assert
-    assert result == {"upserted": 2, "deleted": 1}
+    assert result == {"upserted": 2, "skipped": 0, "deleted": 1}
     mock_book_service.get_books.assert_called_once_with(limit=None)
-    mock_chroma_collection.get.assert_called_once()
+    # One ID-only page covers the whole (small) collection
+    mock_chroma_collection.get.assert_any_call(include=[], limit=ID_PAGE_SIZE, offset=0)
 
     # Verify upserts for added and updated books
-    assert mock_chroma_collection.upsert.call_count == 2
-    mock_chroma_collection.upsert.assert_has_calls([
-        call(ids=[book_id_add], documents=["New Book. New Abstract"], metadatas=[{"title": "New Book", "description": "New Abstract"}]),
-        call(ids=[book_id_update], documents=["Existing Book Updated. Updated Abstract"], metadatas=[{"title": "Existing Book Updated", "description": "Updated Abstract"}]),
-    ], any_order=True)
+    mock_chroma_collection.upsert.assert_called_once()
+    upsert = mock_chroma_collection.upsert.call_args.kwargs
+    assert upsert["ids"] == [book_id_add, book_id_update]
+    assert upsert["documents"] == ["New Book. New Abstract", "Existing Book Updated. Updated Abstract"]
+    assert upsert["metadatas"] == [
+        book_metadata("New Book", "New Abstract", "New Book. New Abstract"),
+        book_metadata("Existing Book Updated", "Updated Abstract", "Existing Book Updated. Updated Abstract"),
+    ]
 
     # Verify deletion
     mock_chroma_collection.delete.assert_called_once_with(ids=[book_id_delete])
@@ -184,13 +221,13 @@ def test_sync_books_with_limit_parameter(
     # Arrange
     db_books = [create_mock_book(str(uuid.uuid4()), f"Book {i}", f"Abstract {i}") for i in range(3)]
     mock_book_service.get_books.return_value = db_books[:2] # BookService honors the limit
-    mock_chroma_collection.get.return_value = {"ids": [str(b.book_id) for b in db_books]} # Chroma has all books
+    mock_chroma_collection.get.side_effect = chroma_get([str(b.book_id) for b in db_books]) # Chroma has all books
 
     # Act
     result = chroma_service_mocked.sync_books(limit=2)
 
     # Assert
-    assert result == {"upserted": 2, "deleted": 1} # Upserts 2, deletes the one not in the limited set
+    assert result == {"upserted": 2, "skipped": 0, "deleted": 1} # Upserts 2, deletes the one not in the limited set
     mock_book_service.get_books.assert_called_once_with(limit=2)
     mock_chroma_collection.delete.assert_called_once_with(ids=[str(db_books[2].book_id)])
 
@@ -207,6 +244,119 @@ def test_sync_books_exception_handling(
     # Verify session was closed even after exception
     mock_db_session.close.assert_called_once()
 
+def test_sync_books_skips_unchanged_books(
+    chroma_service_mocked, mock_db_session, mock_book_service, mock_chroma_collection
+):
+    # Arrange: "same" is indexed with its current text, "edited" with old text,
+    # "old_model" was embedded by a different model
+    mock_book_service.get_books.return_value = [
+        create_mock_book("same", "Same", "Abstract"),
+        create_mock_book("edited", "Edited", "New abstract"),
+        create_mock_book("old_model", "Old Model", None),
+        create_mock_book("new", "New", None),
+    ]
+    stale_model = {**book_metadata("Old Model", "", "Old Model"), "embedding_model": "previous-model"}
+    mock_chroma_collection.get.side_effect = chroma_get({
+        "same": book_metadata("Same", "Abstract", "Same. Abstract"),
+        "edited": book_metadata("Edited", "Old abstract", "Edited. Old abstract"),
+        "old_model": stale_model,
+        "gone": None,
+    })
+
+    # Act
+    result = chroma_service_mocked.sync_books()
+
+    # Assert
+    assert result == {"upserted": 3, "skipped": 1, "deleted": 1}
+    assert mock_chroma_collection.upsert.call_args.kwargs["ids"] == ["edited", "old_model", "new"]
+    mock_chroma_collection.delete.assert_called_once_with(ids=["gone"])
+
+    # Forcing re-embeds everything
+    with patch('app.services.chroma_service.get_db', return_value=iter([Mock()])):
+        assert chroma_service_mocked.sync_books(force=True)["upserted"] == 4
+
+def test_sync_books_upserts_in_batches(
+    chroma_service_mocked, mock_db_session, mock_book_service, mock_chroma_collection
+):
+    # Arrange
+    db_books = [create_mock_book(f"id{i}", f"Book {i}", None) for i in range(5)]
+    mock_book_service.get_books.return_value = db_books
+    mock_chroma_collection.get.side_effect = chroma_get([])
+
+    # Act
+    result = chroma_service_mocked.sync_books(batch_size=2)
+
+    # Assert: 5 books cost 3 embedding requests and 3 upserts
+    assert result == {"upserted": 5, "skipped": 0, "deleted": 0}
+    assert chroma_service_mocked.embedding_function.call_count == 3
+    upserted_ids = [
+        book_id for c in mock_chroma_collection.upsert.call_args_list for book_id in c.kwargs["ids"]
+    ]
+    assert sorted(upserted_ids) == [f"id{i}" for i in range(5)]
+    assert all(len(c.kwargs["ids"]) <= 2 for c in mock_chroma_collection.upsert.call_args_list)
+
+def test_upsert_books_retries_failed_embedding_requests(chroma_service_mocked, mock_chroma_collection):
+    # Arrange: the provider fails twice, then answers
+    chroma_service_mocked.embedding_function = Mock(
+        side_effect=[Exception("429 rate limited"), Exception("timeout"), [[1.0]]]
+    )
+
+    # Act
+    with patch("app.services.chroma_service.time.sleep") as mock_sleep:
+        upserted = chroma_service_mocked.upsert_books([("id1", "Title", None)], backoff_seconds=0.1)
+
+    # Assert
+    assert upserted == 1
+    assert chroma_service_mocked.embedding_function.call_count == 3
+    assert mock_sleep.call_count == 2
+    mock_chroma_collection.upsert.assert_called_once_with(
+        ids=["id1"], documents=["Title"], metadatas=[book_metadata("Title", "", "Title")], embeddings=[[1.0]]
+    )
+
+def test_upsert_books_gives_up_after_max_attempts(chroma_service_mocked, mock_chroma_collection):
+    # Arrange
+    chroma_service_mocked.embedding_function = Mock(side_effect=Exception("provider down"))
+
+    # Act & Assert
+    with patch("app.services.chroma_service.time.sleep"):
+        with pytest.raises(Exception, match="provider down"):
+            chroma_service_mocked.upsert_books([("id1", "Title", None)], max_attempts=2)
+    assert chroma_service_mocked.embedding_function.call_count == 2
+    mock_chroma_collection.upsert.assert_not_called()
+
+def test_iter_ids_pages_without_payloads(chroma_service_mocked, mock_chroma_collection):
+    # Arrange
+    mock_chroma_collection.get.side_effect = chroma_get([f"id{i}" for i in range(5)])
+
+    # Act
+    ids = list(chroma_service_mocked.iter_ids(page_size=2))
+
+    # Assert
+    assert ids == [f"id{i}" for i in range(5)]
+    assert [c.kwargs for c in mock_chroma_collection.get.call_args_list] == [
+        {"include": [], "limit": 2, "offset": 0},
+        {"include": [], "limit": 2, "offset": 2},
+        {"include": [], "limit": 2, "offset": 4},
+    ]
+
+def test_sync_books_reads_metadata_only_for_the_synced_books(
+    chroma_service_mocked, mock_db_session, mock_book_service, mock_chroma_collection
+):
+    # Arrange: Chroma holds many more books than the (limited) sync covers
+    mock_book_service.get_books.return_value = [create_mock_book("id1", "Title", None)]
+    mock_chroma_collection.get.side_effect = chroma_get(
+        {"id1": book_metadata("Title", "", "Title"), **{f"other{i}": None for i in range(5)}}
+    )
+
+    # Act
+    with patch("app.services.chroma_service.ID_PAGE_SIZE", 2):
+        result = chroma_service_mocked.sync_books(limit=1)
+
+    # Assert
+    assert result == {"upserted": 0, "skipped": 1, "deleted": 5}
+    metadata_reads = [c.kwargs for c in mock_chroma_collection.get.call_args_list if c.kwargs["include"]]
+    assert metadata_reads == [{"ids": ["id1"], "include": ["metadatas"]}]
+
 # --- Tests for search_books ---
 
 def test_search_books_success(chroma_service_mocked):
@@ -226,7 +376,8 @@ def test_search_books_success(chroma_service_mocked):
     assert result[0]["id"] == "id1"
     assert result[0]["title"] == "Book 1"
     assert result[0]["distance"] == 0.1
-    mock_collection.query.assert_called_once_with(query_texts=["test query"], n_results=2)
+    chroma_service_mocked.embedding_function.assert_called_once_with(["test query"])
+    mock_collection.query.assert_called_once_with(query_embeddings=[[10.0]], n_results=2)
 
 def test_search_books_no_results(chroma_service_mocked):
     # Arrange
@@ -385,13 +536,13 @@ def test_sync_books_no_deletions_needed(
     book_id = str(uuid.uuid4())
     db_books = [create_mock_book(book_id, "Title", "Abstract")]
     mock_book_service.get_books.return_value = db_books
-    mock_chroma_collection.get.return_value = {"ids": [book_id]}
+    mock_chroma_collection.get.side_effect = chroma_get([book_id])
 
     # Act
     result = chroma_service_mocked.sync_books()
 
     # Assert
-    assert result == {"upserted": 1, "deleted": 0}
+    assert result == {"upserted": 1, "skipped": 0, "deleted": 0}
     mock_chroma_collection.delete.assert_not_called()
 
 def test_sync_books_successful_session_closure(
@@ -399,7 +550,7 @@ def test_sync_books_successful_session_closure(
 ):
     # Arrange
     mock_book_service.get_books.return_value = []
-    mock_chroma_collection.get.return_value = {"ids": []}
+    mock_chroma_collection.get.side_effect = chroma_get([])
 
     # Act
     chroma_service_mocked.sync_books()
@@ -417,7 +568,7 @@ def test_add_book_success(chroma_service_mocked, mock_chroma_collection):
     mock_chroma_collection.upsert.assert_called_once_with(
         ids=["id1"],
         documents=["Title. Abstract"],
-        metadatas=[{"title": "Title", "description": "Abstract"}]
+        metadatas=[book_metadata("Title", "Abstract", "Title. Abstract")]
     )
 
 def test_add_book_no_abstract(chroma_service_mocked, mock_chroma_collection):
@@ -428,20 +579,19 @@ def test_add_book_no_abstract(chroma_service_mocked, mock_chroma_collection):
     mock_chroma_collection.upsert.assert_called_once_with(
         ids=["id1"],
         documents=["Title"],
-        metadatas=[{"title": "Title", "description": ""}]
+        metadatas=[book_metadata("Title", "", "Title")]
     )
 
 def test_delete_book_success(chroma_service_mocked, mock_chroma_collection):
     # Arrange
     mock_chroma_collection.name = "books"
-    mock_chroma_collection.get.side_effect = [{"ids": ["id1"]}, {"ids": []}]
     
     # Act
     chroma_service_mocked.delete_book("id1")
     
-    # Assert
+    # Assert: a single delete by ID, no reads of the collection
     mock_chroma_collection.delete.assert_called_once_with(ids=["id1"])
-    assert mock_chroma_collection.get.call_count == 2
+    mock_chroma_collection.get.assert_not_called()
 
 # --- Tests for search_books Edge Cases ---
 
@@ -565,3 +715,81 @@ def test_generate_natural_language_response_unsupported_provider_exception(chrom
     
     # Assert
     assert "Error generating summary with unsupported LLM_PROVIDER: UNKNOWN - Custom error" in result
+
+# --- Tests for ChromaServiceRegistry ---
+
+def test_registry_builds_each_provider_once():
+    registry = ChromaServiceRegistry()
+    create = Mock(side_effect=lambda: Mock(spec=ChromaService))
+
+    first = registry.get("OPENAI", create)
+    assert registry.get("OPENAI", create) is first
+    assert registry.get("OLLAMA", create) is not first
+    assert create.call_count == 2
+
+def test_registry_does_not_cache_failed_builds():
+    registry = ChromaServiceRegistry()
+
+    with pytest.raises(RuntimeError):
+        registry.get("OPENAI", Mock(side_effect=RuntimeError("no key")))
+    assert "OPENAI" not in registry
+    assert registry.get("OPENAI", lambda: "service") == "service"
+
+def test_registry_drops_other_providers_after_collection_reset():
+    registry = ChromaServiceRegistry()
+    openai_service = Mock(llm_generator_client=Mock())
+    registry.get("OPENAI", lambda: openai_service)
+    ollama_service = Mock(collection_reset=True)
+
+    assert registry.get("OLLAMA", lambda: ollama_service) is ollama_service
+    assert "OPENAI" not in registry
+    openai_service.llm_generator_client.close.assert_called_once()
+
+    registry.clear()
+    assert "OLLAMA" not in registry
+
+# --- Tests for stream_natural_language_response ---
+
+def test_stream_natural_language_response_openai(chroma_service_mocked):
+    # Arrange
+    chroma_service_mocked.llm_provider = "OPENAI"
+    chroma_service_mocked.llm_model_for_generation = "gpt-4"
+    mock_client = Mock()
+    chroma_service_mocked.llm_generator_client = mock_client
+    mock_client.chat.completions.create.return_value = iter([
+        Mock(choices=[Mock(delta=Mock(content="Two"))]),
+        Mock(choices=[Mock(delta=Mock(content=" books"))]),
+        Mock(choices=[Mock(delta=Mock(content=None))]),
+        Mock(choices=[]),
+    ])
+
+    # Act
+    tokens = list(chroma_service_mocked.stream_natural_language_response("query", [{"title": "Book 1"}]))
+
+    # Assert
+    assert tokens == ["Two", " books"]
+    assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+def test_stream_natural_language_response_ollama(chroma_service_mocked):
+    # Arrange
+    chroma_service_mocked.llm_provider = "OLLAMA"
+    chroma_service_mocked.llm_model_for_generation = "gemma"
+    mock_client = Mock()
+    chroma_service_mocked.llm_generator_client = mock_client
+    mock_client.chat.return_value = iter([
+        {"message": {"content": "One"}},
+        {"message": {"content": " book"}},
+        {"message": {"content": ""}, "done": True},
+    ])
+
+    # Act
+    tokens = list(chroma_service_mocked.stream_natural_language_response("query", [{"title": "Book 1"}]))
+
+    # Assert
+    assert tokens == ["One", " book"]
+    assert mock_client.chat.call_args.kwargs["stream"] is True
+
+def test_stream_natural_language_response_no_results(chroma_service_mocked):
+    assert list(chroma_service_mocked.stream_natural_language_response("query", [])) == [
+        "No similar books found for the query: 'query'."
+    ]
@@ -107,3 +107,17 @@ def test_search_similarities_endpoint_service_initialization_failure(client):
         # Assert
         assert response.status_code == 500
         assert "Failed to initialize ChromaDB service" in response.json()["detail"]
+
+def test_search_reuses_one_service_per_provider(client, mock_chroma_service):
+    # Arrange
+    mock_instance = mock_chroma_service.return_value
+    mock_instance.search_books.return_value = [
+        {"id": "1", "title": "Book", "description": "Desc", "distance": 0.2}
+    ]
+
+    # Act
+    for _ in range(3):
+        assert client.get("/books/search/vector/search?query=test").status_code == 200
+
+    # Assert: built on the first request only
+    mock_chroma_service.assert_called_once()
@@ -100,3 +100,54 @@ def test_search_summary_endpoint_unauthorized(client):
     # Assert
     assert response.status_code == 401
     app.dependency_overrides.clear()
+
+# --- Integration Tests for /books/search/vector/summary/stream Endpoint ---
+
+def test_summary_stream_forwards_tokens_as_sse(client, mock_chroma_service):
+    # Arrange
+    mock_instance = mock_chroma_service.return_value
+    mock_instance.search_books.return_value = [{"id": "1", "title": "Book", "description": "Desc", "distance": 0.1}]
+    mock_instance.stream_natural_language_response.return_value = iter(["Book is", " a\nstory."])
+
+    # Act
+    response = client.get("/books/search/vector/summary/stream?query=test")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'data: {"token": "Book is"}\n\n'
+        'data: {"token": " a\\nstory."}\n\n'
+        'event: done\ndata: {"results": 1}\n\n'
+    )
+
+def test_summary_stream_reports_provider_errors_in_band(client, mock_chroma_service):
+    # Arrange
+    def failing_stream(query, results):
+        yield "Partial"
+        raise Exception("connection reset")
+
+    mock_instance = mock_chroma_service.return_value
+    mock_instance.search_books.return_value = [{"id": "1", "title": "Book", "description": "Desc", "distance": 0.1}]
+    mock_instance.stream_natural_language_response.side_effect = failing_stream
+    mock_instance.summary_error_message.return_value = "Error generating summary"
+
+    # Act
+    response = client.get("/books/search/vector/summary/stream?query=test")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.text.endswith('event: error\ndata: {"detail": "Error generating summary"}\n\n')
+    assert 'data: {"token": "Partial"}' in response.text
+
+def test_summary_stream_no_results(client, mock_chroma_service):
+    # Arrange
+    mock_instance = mock_chroma_service.return_value
+    mock_instance.search_books.return_value = []
+
+    # Act
+    response = client.get("/books/search/vector/summary/stream?query=nothing")
+
+    # Assert
+    assert response.status_code == 404
+    mock_instance.stream_natural_language_response.assert_not_called()
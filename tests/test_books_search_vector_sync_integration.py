@@ -69,7 +69,7 @@ def mock_chroma_service_in_route():
 def test_sync_from_db_endpoint_success(client, mock_chroma_service_in_route):
     # Arrange
     mock_instance = mock_chroma_service_in_route.return_value
-    mock_instance.sync_books.return_value = {"upserted": 10, "deleted": 5}
+    mock_instance.sync_books.return_value = {"upserted": 10, "skipped": 3, "deleted": 5}
     mock_instance.llm_provider = "OPENAI"
     
     # Act
@@ -78,7 +78,10 @@ def test_sync_from_db_endpoint_success(client, mock_chroma_service_in_route):
     # Assert
     assert response.status_code == 200
     assert response.json() == {
-        "message": "ChromaDB synchronization completed using OPENAI. Upserted: 10 books, Deleted: 5 books."
+        "message": "ChromaDB synchronization completed using OPENAI. Upserted: 10 books, Skipped: 3 unchanged books, Deleted: 5 books.",
+        "upserted": 10,
+        "skipped": 3,
+        "deleted": 5,
     }
     mock_instance.sync_books.assert_called_once_with(limit=10)
 
@@ -116,6 +119,7 @@ def test_sync_from_db_endpoint_unauthorized(client):
 
 def test_get_chroma_service_fallback_to_ollama(client, mock_chroma_service_in_route):
     # Arrange: Mock env vars so OPENAI is default but key is missing
+    mock_chroma_service_in_route.return_value.sync_books.return_value = {"upserted": 0, "skipped": 0, "deleted": 0}
     with patch.dict(os.environ, {"LLM_PROVIDER": "OPENAI", "OPENAI_API_KEY": ""}):
         # Act
         client.post("/books/search/vector/sync")
@@ -127,6 +131,7 @@ def test_get_chroma_service_fallback_to_ollama(client, mock_chroma_service_in_ro
 
 def test_get_chroma_service_explicit_ollama(client, mock_chroma_service_in_route):
     # Arrange: Mock env vars for OLLAMA
+    mock_chroma_service_in_route.return_value.sync_books.return_value = {"upserted": 0, "skipped": 0, "deleted": 0}
     with patch.dict(os.environ, {"LLM_PROVIDER": "OLLAMA"}):
         # Act
         client.post("/books/search/vector/sync")
@@ -37,7 +37,10 @@ def test_get_chatbot_service_wires_dependencies():
         review_service=mock_review_service.return_value,
         bookshelf_service=mock_bookshelf_service.return_value,
         db=db,
+        result_cache=chatbot.recommendation_cache,
+        trace=mock_engine.call_args.kwargs["trace"],
     )
+    assert not mock_engine.call_args.kwargs["trace"].enabled
     mock_chatbot_service.assert_called_once_with(db=db, recommendation_engine=mock_engine.return_value)
 
 
@@ -0,0 +1,108 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from app.services.chroma_service import ChromaService
+from app.services.embedding_cache import EmbeddingCache
+
+
+def _compute():
+    # One vector per text: [len(text), 1.0]
+    return Mock(side_effect=lambda texts: [[float(len(t)), 1.0] for t in texts])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_only_uncached_texts_are_computed(cache):
+    compute = _compute()
+
+    first = cache.embed(["cozy mystery", "dark", "cozy mystery"], "OPENAI", "m1", compute)
+    second = cache.embed(["dark", "hopeful"], "OPENAI", "m1", compute)
+
+    assert compute.call_args_list[0].args == (["cozy mystery", "dark"],)
+    assert compute.call_args_list[1].args == (["hopeful"],)
+    assert [v.tolist() for v in first] == [[12.0, 1.0], [4.0, 1.0], [12.0, 1.0]]
+    assert first[0].dtype == np.float32
+    assert [v.tolist() for v in second] == [[4.0, 1.0], [7.0, 1.0]]
+
+
+def test_entries_are_keyed_by_provider_and_model_and_survive_reopening(cache):
+    compute = _compute()
+    cache.embed(["dark"], "OPENAI", "m1", compute)
+    cache.embed(["dark"], "OPENAI", "m2", compute)
+    cache.embed(["dark"], "OLLAMA", "m1", compute)
+    assert compute.call_count == 3
+
+    reopened = EmbeddingCache(cache.path, max_entries=10)
+    reopened.embed(["dark"], "OPENAI", "m2", compute)
+    assert compute.call_count == 3
+    assert len(reopened) == 3
+    reopened.close()
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr("app.services.embedding_cache.time.time", lambda: next(clock))
+    compute = _compute()
+    cache.embed([f"t{i}" for i in range(10)], "OPENAI", "m1", compute)
+    cache.embed(["t0"], "OPENAI", "m1", compute)  # t0 becomes most recently used
+
+    cache.embed(["new"], "OPENAI", "m1", compute)
+
+    # 11 entries > 10: evicted down to 9, oldest first (t1, t2)
+    assert len(cache) == 9
+    compute.reset_mock()
+    cache.embed(["t0", "t3", "new"], "OPENAI", "m1", compute)
+    compute.assert_not_called()
+    cache.embed(["t1"], "OPENAI", "m1", compute)
+    compute.assert_called_once_with(["t1"])
+
+
+def test_disabled_cache_always_computes(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "off.db"), max_entries=0)
+    compute = _compute()
+
+    cache.embed(["dark"], "OPENAI", "m1", compute)
+    cache.embed(["dark"], "OPENAI", "m1", compute)
+
+    assert compute.call_count == 2
+    assert not (tmp_path / "off.db").exists()
+
+
+def test_chroma_service_reuses_cached_embeddings_for_sync_and_queries(cache):
+    service = ChromaService.__new__(ChromaService)
+    service.llm_provider = "OPENAI"
+    service.embedding_model = "m1"
+    service.embedding_function = _compute()
+    service.embedding_cache = cache
+    service.collection = Mock(query=Mock(return_value={"ids": [[]], "metadatas": [[]], "distances": [[]]}))
+
+    service.upsert_books([("b1", "Dune", None), ("b2", "Emma", "A novel")])
+    service.upsert_books([("b1", "Dune", None)])
+    service.search_books("Dune")
+
+    # "Dune" was embedded once, for the first sync; the re-sync and the query reuse it
+    service.embedding_function.assert_called_once_with(["Dune", "Emma. A novel"])
+    vector = service.collection.query.call_args.kwargs["query_embeddings"][0]
+    assert vector.tolist() == [4.0, 1.0]
+
+
+def test_eviction_counts_entries_written_by_other_processes(cache, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr("app.services.embedding_cache.time.time", lambda: next(clock))
+    compute = _compute()
+    other = EmbeddingCache(cache.path, max_entries=10)
+    cache.embed(["t0"], "OPENAI", "m1", compute)  # both caches open the file early
+    other.embed([f"o{i}" for i in range(9)], "OPENAI", "m1", compute)
+
+    cache.embed(["new"], "OPENAI", "m1", compute)
+
+    # 11 entries > 10: evicted down to 9, even though this cache only wrote two
+    assert len(cache) == len(other) == 9
+    other.close()
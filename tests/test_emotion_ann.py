@@ -0,0 +1,110 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.models.book import Book
+from app.services.mood_recommendation.emotion_ann import IVFIndex
+from app.services.mood_recommendation.emotion_index import EmotionIndex, EmotionMatrix, top_k_indices
+
+
+def _clustered_vectors(n=2000, dims=12, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.random((clusters, dims), dtype=np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.05 * rng.random((n, dims), dtype=np.float32)
+    vectors[:10] = 0.0  # books without a profile
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors.astype(np.float32)
+
+
+def _normalised(vector):
+    return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+
+def test_ivf_search_recalls_exact_top_k():
+    vectors = _clustered_vectors()
+    index = IVFIndex(vectors, n_lists=20)
+    rng = np.random.default_rng(1)
+
+    hits = 0
+    for _ in range(20):
+        query = _normalised(rng.random(vectors.shape[1]))
+        exact = set(top_k_indices(vectors @ query, 10).tolist())
+        approx, scores = index.search(query, 10, n_probe=4)
+        hits += len(exact & set(approx.tolist()))
+        assert np.allclose(scores, vectors[approx] @ query)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    assert hits / 200 >= 0.9
+
+
+def test_ivf_search_over_fetches_past_excluded_rows():
+    vectors = _clustered_vectors()
+    index = IVFIndex(vectors, n_lists=20)
+    query = vectors[500]
+    nearest = top_k_indices(vectors @ query, 300)
+    exclude = np.zeros(len(vectors), dtype=bool)
+    exclude[nearest] = True
+
+    found, _ = index.search(query, 5, n_probe=1, exclude=exclude)
+
+    assert len(found) == 5
+    assert not exclude[found].any()
+
+
+def test_ivf_min_similarity_and_zero_rows_are_skipped():
+    vectors = _clustered_vectors()
+    index = IVFIndex(vectors, n_lists=20)
+
+    found, scores = index.search(vectors[100], len(vectors), min_similarity=0.0)
+
+    assert (scores > 0).all()
+    assert not set(range(10)) & set(found.tolist())
+
+
+def test_ivf_pending_rows_are_always_scored():
+    vectors = _clustered_vectors()
+    index = IVFIndex(vectors, n_lists=20)
+    query = vectors[100].copy()
+    vectors[0] = query  # a previously empty book now matches the query exactly
+
+    assert 0 not in index.search(query, 1, n_probe=1)[0]
+    index.add_pending([0])
+    assert index.search(query, 1, n_probe=1)[0].tolist() == [0]
+
+
+def test_matrix_search_and_iter_search_agree_with_and_without_ann():
+    scores_by_book = {f"b{i}": {"happy": float(i % 7), "sad": float(i % 5), "dark": 1.0} for i in range(200)}
+    exact = EmotionMatrix.from_scores(scores_by_book)
+    approx = EmotionMatrix.from_scores(scores_by_book)
+    approx.ann = IVFIndex(approx.vectors, n_lists=4)
+    approx.ann_probe = 4
+    query = {"happy": 3.0, "dark": 1.0}
+
+    assert exact.search(query, 5)[0].tolist() == approx.search(query, 5)[0].tolist()
+    exact_ranked = [index for index, _ in exact.iter_search(query, initial=2)]
+    approx_ranked = [index for index, _ in approx.iter_search(query, initial=2)]
+    assert sorted(exact_ranked) == sorted(approx_ranked) == list(range(200))
+
+
+def test_emotion_index_attaches_ann_for_large_catalogues(db):
+    db.add_all(
+        [
+            Book(book_id=f"b{i}", title=f"Book {i}", emotion_profile=json.dumps({"happy": {"score": float(i), "count": 1}}))
+            for i in range(1, 5)
+        ]
+    )
+    db.commit()
+
+    assert EmotionIndex(ttl_seconds=60, ann_min_books=0).get_matrix(db).ann is None
+    assert EmotionIndex(ttl_seconds=60, ann_min_books=10).get_matrix(db).ann is None
+
+    index = EmotionIndex(ttl_seconds=60, ann_min_books=4, ann_probe=2)
+    matrix = index.get_matrix(db)
+    assert isinstance(matrix.ann, IVFIndex)
+    assert matrix.ann_probe == 2
+
+    indices, similarities = matrix.search({"happy": 1.0}, 2, exclude=matrix.mask(["b1"]))
+    assert [matrix.book_ids[i] for i in indices] == ["b2", "b3"]
+    assert similarities.tolist() == pytest.approx([1.0, 1.0])
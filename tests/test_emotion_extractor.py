@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
+from app.services.mood_recommendation import emotion_extractor as emotion_extractor_module
 from app.services.mood_recommendation.emotion_extractor import EmotionExtractor
 
 
@@ -195,7 +196,7 @@ class TestExtractEmotionsBatch:
         ext, mock_prep = extractor_with_mock_preprocessor
         mock_prep.preprocess.return_value = ['happy']
         result = ext.extract_emotions_batch(["happy review"])
-        assert set(result.keys()) == {'counts', 'scores', 'num_reviews'}
+        assert set(result.keys()) == {'counts', 'scores', 'score_sums', 'num_reviews'}
 
     def test_num_reviews_is_correct(self, extractor_with_mock_preprocessor):
         ext, mock_prep = extractor_with_mock_preprocessor
@@ -223,6 +224,14 @@ class TestExtractEmotionsBatch:
         result = ext.extract_emotions_batch(["r1", "r2"])
         assert abs(sum(result['scores'].values()) - 100.0) < 0.01
 
+    def test_score_sums_add_each_reviews_scores(self, extractor_with_mock_preprocessor):
+        ext, mock_prep = extractor_with_mock_preprocessor
+        mock_prep.preprocess.side_effect = [['happy', 'happy'], ['sad']]
+        result = ext.extract_emotions_batch(["r1", "r2"])
+        assert result['score_sums']['happy'] == pytest.approx(100.0)
+        assert result['score_sums']['sad'] == pytest.approx(100.0)
+        assert result['score_sums']['angry'] == 0.0
+
     def test_all_emotions_present_in_output(self, extractor_with_mock_preprocessor, simple_lexicon):
         ext, mock_prep = extractor_with_mock_preprocessor
         mock_prep.preprocess.return_value = ['happy']
@@ -245,4 +254,106 @@ class TestExtractEmotionsBatch:
         mock_prep.preprocess.reset_mock()
         mock_prep.preprocess.return_value = ['happy', 'sad']
         batch_result = ext.extract_emotions_batch(["text"])
-        assert single_result['counts'] == batch_result['counts']
\ No newline at end of file
+        assert single_result['counts'] == batch_result['counts']
+
+# Compiled counting and memoisation
+
+class TestCompiledExtraction:
+    def test_compiled_matches_uncompiled_with_duplicate_lexicon_words(self, mock_preprocessor):
+        lexicon = {
+            'romantic': ['love', 'loving', 'loving'],
+            'happy': ['love', 'joy'],
+        }
+        tokens = ['love', 'loving', 'joy', 'xyz', 'loving']
+        mock_preprocessor.preprocess.return_value = tokens
+        compiled = EmotionExtractor(lexicon)
+        compiled.preprocessor = mock_preprocessor
+        reference = EmotionExtractor(lexicon, compiled=False)
+        reference.preprocessor = mock_preprocessor
+
+        result = compiled.extract_emotions("text")
+
+        assert result == reference.extract_emotions("text")
+        assert result['counts'] == {'romantic': 5, 'happy': 2}
+        assert result['total_emotion_words'] == 7
+
+    def test_repeated_text_is_served_from_cache(self, extractor_with_mock_preprocessor):
+        ext, mock_prep = extractor_with_mock_preprocessor
+        mock_prep.preprocess.return_value = ['happy']
+
+        first = ext.extract_emotions("happy")
+        second = ext.extract_emotions("happy")
+
+        assert first == second
+        assert mock_prep.preprocess.call_count == 1
+
+    def test_batch_preprocesses_each_distinct_text_once(self, extractor_with_mock_preprocessor):
+        ext, mock_prep = extractor_with_mock_preprocessor
+        mock_prep.preprocess.side_effect = lambda text: text.split()
+
+        result = ext.extract_emotions_batch(["happy sad", "happy sad", "furious"])
+
+        assert mock_prep.preprocess.call_count == 2
+        assert result['counts']['happy'] == 2
+        assert result['counts']['angry'] == 1
+        assert result['num_reviews'] == 3
+
+    def test_cache_is_bounded_lru(self, simple_lexicon, mock_preprocessor):
+        ext = EmotionExtractor(simple_lexicon, cache_size=2)
+        ext.preprocessor = mock_preprocessor
+        mock_preprocessor.preprocess.return_value = ['happy']
+
+        ext.extract_emotions("a")
+        ext.extract_emotions("b")
+        ext.extract_emotions("a")
+        ext.extract_emotions("c")  # evicts "b", the least recently used
+        mock_preprocessor.preprocess.reset_mock()
+        ext.extract_emotions("a")
+        ext.extract_emotions("b")
+
+        assert mock_preprocessor.preprocess.call_count == 1
+
+    def test_replacing_preprocessor_clears_cache(self, extractor_with_mock_preprocessor):
+        ext, mock_prep = extractor_with_mock_preprocessor
+        mock_prep.preprocess.return_value = ['happy']
+        ext.extract_emotions("text")
+
+        replacement = MagicMock()
+        replacement.preprocess.return_value = ['sad']
+        ext.preprocessor = replacement
+
+        assert ext.extract_emotions("text")['counts']['sad'] == 1
+
+    def test_non_string_input_is_not_cached(self, extractor_with_mock_preprocessor):
+        ext, mock_prep = extractor_with_mock_preprocessor
+        mock_prep.preprocess.return_value = []
+
+        ext.extract_emotions(None)
+        ext.extract_emotions(None)
+
+        assert mock_prep.preprocess.call_count == 2
+
+
+# Shared lazy extractor
+
+class TestLazyEmotionExtractor:
+    def test_builds_once_on_first_use(self, simple_lexicon, mock_preprocessor):
+        built = []
+
+        def build(lexicon):
+            ext = EmotionExtractor(lexicon)
+            ext.preprocessor = mock_preprocessor
+            built.append(ext)
+            return ext
+
+        with patch.object(emotion_extractor_module, "EmotionExtractor", side_effect=build):
+            lazy = emotion_extractor_module._LazyEmotionExtractor(simple_lexicon)
+            assert not lazy.initialized
+
+            mock_preprocessor.preprocess.return_value = ['happy']
+            assert lazy.extract_emotions("happy")['counts']['happy'] == 1
+            assert lazy.emotion_lexicon == simple_lexicon
+
+        assert lazy.initialized
+        assert len(built) == 1
+        assert lazy.get() is built[0]
@@ -0,0 +1,180 @@
+import json
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.models.book import Book
+from app.services.book_service import BookService
+from app.services.mood_recommendation.emotion_index import (
+    EmotionIndex,
+    EmotionMatrix,
+    iter_ranked_indices,
+    parse_emotion_profile,
+    top_k_indices,
+)
+from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+
+
+def _profile(**scores):
+    return json.dumps({emotion: {"score": score, "count": 1} for emotion, score in scores.items()})
+
+
+def test_parse_emotion_profile_handles_valid_and_invalid_json():
+    assert parse_emotion_profile(_profile(happy=2.0)) == {"happy": {"score": 2.0, "count": 1}}
+    assert parse_emotion_profile(None) is None
+    assert parse_emotion_profile("{bad") is None
+    assert parse_emotion_profile("[1, 2]") is None
+
+
+def test_matrix_similarities_match_dict_cosine():
+    scores_by_book = {
+        "b1": {"happy": 3.0, "sad": 1.0},
+        "b2": {"dark": 2.0},
+        "b3": {},
+    }
+    matrix = EmotionMatrix.from_scores(scores_by_book)
+    engine = RecommendationEngine(
+        book_service=MagicMock(),
+        review_service=MagicMock(),
+        bookshelf_service=MagicMock(),
+        emotion_extractor_instance=MagicMock(),
+        emotion_profiler_instance=MagicMock(),
+    )
+    query = {"happy": 1.0, "sad": 2.0, "unknown": 1.0}
+
+    sims = matrix.similarities(query)
+
+    assert matrix.vectors.dtype == np.float32
+    for row, book_id in enumerate(matrix.book_ids):
+        expected = engine._cosine_similarity(query, scores_by_book[book_id])
+        assert sims[row] == pytest.approx(expected, abs=1e-6)
+
+
+def test_top_k_indices_excludes_masked_rows_and_keeps_tie_order():
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9], dtype=np.float32)
+    exclude = np.array([False, False, False, False, True])
+
+    assert top_k_indices(scores, 3, exclude=exclude).tolist() == [1, 0, 2]
+    assert top_k_indices(scores, 10, exclude=exclude).tolist() == [1, 0, 2, 3]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_iter_ranked_indices_yields_full_descending_order():
+    scores = np.arange(50, dtype=np.float32)
+    exclude = scores % 2 == 0
+
+    ranked = list(iter_ranked_indices(scores, exclude=exclude, initial=2))
+
+    assert ranked == list(range(49, 0, -2))
+
+
+def test_emotion_index_caches_until_invalidated(db):
+    db.add_all(
+        [
+            Book(book_id="b1", title="Stored", emotion_profile=_profile(happy=1.0)),
+            Book(book_id="b2", title="Missing"),
+        ]
+    )
+    db.commit()
+    index = EmotionIndex(ttl_seconds=3600)
+
+    matrix = index.get_matrix(db)
+
+    assert matrix.book_ids == ["b1", "b2"]
+    assert matrix.vectors[1].tolist() == [0.0]
+    assert index.get_matrix(db) is matrix
+
+    index.invalidate()
+    assert index.get_matrix(db) is not matrix
+
+
+def test_emotion_index_update_book_refreshes_row_in_place(db):
+    db.add_all(
+        [
+            Book(book_id="b1", title="One", emotion_profile=_profile(happy=1.0, sad=0.0)),
+            Book(book_id="b2", title="Two", emotion_profile=_profile(sad=1.0)),
+        ]
+    )
+    db.commit()
+    index = EmotionIndex(ttl_seconds=3600)
+    matrix = index.get_matrix(db)
+
+    index.update_book("b1", {"happy": 0.0, "sad": 2.0})
+    assert index.get_matrix(db) is matrix
+    assert matrix.similarities({"sad": 1.0})[0] == pytest.approx(1.0)
+
+    index.update_book("b1", {"dark": 1.0})
+    assert index.get_matrix(db) is not matrix
+
+
+def test_engine_uses_shared_index_when_db_is_available(db, monkeypatch):
+    db.add_all(
+        [
+            Book(book_id="b1", title="Target", emotion_profile=_profile(happy=1.0)),
+            Book(book_id="b2", title="Read", emotion_profile=_profile(happy=1.0)),
+            Book(book_id="b3", title="Dark", emotion_profile=_profile(dark=1.0)),
+            Book(book_id="b4", title="Joyful", emotion_profile=_profile(happy=4.0, dark=1.0)),
+        ]
+    )
+    db.commit()
+    index = EmotionIndex(ttl_seconds=3600)
+    monkeypatch.setattr(
+        "app.services.mood_recommendation.recommendation_engine.emotion_index",
+        index,
+    )
+    book_service = MagicMock(wraps=BookService(db))
+    bookshelf_service = MagicMock()
+    bookshelf_service.list_shelf.return_value = [MagicMock(book_id="b2")]
+    extractor = MagicMock()
+    extractor.extract_emotions.return_value = {"scores": {"happy": 100.0}}
+    engine = RecommendationEngine(
+        book_service=book_service,
+        review_service=MagicMock(),
+        bookshelf_service=bookshelf_service,
+        db=db,
+        emotion_extractor_instance=extractor,
+        emotion_profiler_instance=MagicMock(),
+    )
+
+    recs = engine.recommend_by_mood("u1", "happy", top_n=3)
+
+    assert [r["book"].book_id for r in recs] == ["b1", "b4"]
+    assert recs[0]["similarity"] == pytest.approx(1.0, abs=1e-6)
+    book_service.get_books.assert_not_called()
+
+
+def test_engine_hydrates_only_the_top_k_and_skips_missing_books(db, monkeypatch):
+    db.add_all(
+        [
+            Book(book_id="b1", title="Gone", emotion_profile=_profile(happy=1.0)),
+            Book(book_id="b2", title="Close", emotion_profile=_profile(happy=3.0, dark=1.0)),
+            Book(book_id="b3", title="Far", emotion_profile=_profile(happy=1.0, dark=3.0)),
+            Book(book_id="b4", title="Dark", emotion_profile=_profile(dark=1.0)),
+        ]
+    )
+    db.commit()
+    monkeypatch.setattr(
+        "app.services.mood_recommendation.recommendation_engine.emotion_index",
+        EmotionIndex(ttl_seconds=3600),
+    )
+    book_service = MagicMock(wraps=BookService(db))
+    bookshelf_service = MagicMock()
+    bookshelf_service.list_shelf.return_value = []
+    engine = RecommendationEngine(
+        book_service=book_service,
+        review_service=MagicMock(),
+        bookshelf_service=bookshelf_service,
+        db=db,
+        emotion_extractor_instance=MagicMock(extract_emotions=MagicMock(return_value={"scores": {"happy": 1.0}})),
+        emotion_profiler_instance=MagicMock(),
+    )
+    # b1 ranks first but has been deleted since the matrix was built
+    engine._catalogue_matrix()
+    db.delete(db.get(Book, "b1"))
+    db.commit()
+
+    recs = engine.recommend_by_mood("u1", "happy", top_n=2)
+
+    assert [r["book"].book_id for r in recs] == ["b2", "b3"]
+    assert [call.args[0] for call in book_service.get_books_by_ids.call_args_list] == [["b1", "b2"], ["b3"]]
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime
+
+from app.models.book import Book
+from app.models.user import User
+from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.emotion_profile_service import EmotionProfileService
+from app.services.review_service import ReviewService
+
+
+class WordCountExtractor:
+    """Counts each known word as one match of the emotion with the same name."""
+
+    emotion_lexicon = {"happy": ["happy"], "sad": ["sad"]}
+
+    def extract_emotions(self, text):
+        words = text.split()
+        return {"counts": {emotion: words.count(emotion) for emotion in self.emotion_lexicon}}
+
+
+def _seed(db):
+    db.add_all(
+        [
+            User(user_id="u1", cognito_sub="sub-1", email="u1@example.com"),
+            User(user_id="u2", cognito_sub="sub-2", email="u2@example.com"),
+            Book(book_id="b1", title="One"),
+        ]
+    )
+    db.commit()
+
+
+def _stored_profile(db, book_id):
+    db.expire_all()
+    return json.loads(db.get(Book, book_id).emotion_profile)
+
+
+def test_review_writes_apply_emotion_deltas(db):
+    _seed(db)
+    profiles = EmotionProfileService(db, emotion_extractor=WordCountExtractor())
+    service = ReviewService(db, emotion_profiles=profiles)
+
+    first = service.add_review(book_id="b1", user_id="u1", review_data=ReviewCreate(rating=5, comment="happy happy"))
+    service.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=2, comment="sad"))
+
+    assert profiles.get_counts("b1") == {"happy": 2, "sad": 1}
+    profile = _stored_profile(db, "b1")
+    assert profile["happy"]["count"] == 2
+    # Scores add up each review's percentages, so both reviews weigh the same
+    assert profile["happy"]["score"] == 100.0
+    assert profile["sad"]["score"] == 100.0
+
+    service.update_review(first.review_id, "u1", ReviewUpdate(comment="sad"))
+    assert profiles.get_counts("b1") == {"sad": 2}
+    assert _stored_profile(db, "b1")["sad"] == {"count": 2, "score": 200.0}
+
+    service.delete_review(first.review_id, "u1")
+    assert profiles.get_counts("b1") == {"sad": 1}
+    assert _stored_profile(db, "b1")["happy"] == {"count": 0, "score": 0.0}
+
+
+def test_apply_review_change_skips_when_extraction_fails(db):
+    class BrokenExtractor(WordCountExtractor):
+        def extract_emotions(self, text):
+            raise LookupError("missing corpus")
+
+    _seed(db)
+    profiles = EmotionProfileService(db, emotion_extractor=BrokenExtractor())
+
+    assert profiles.apply_review_change("b1", None, "happy") is None
+    assert profiles.get_counts("b1") == {}
+
+
+def test_rebuild_book_replaces_counts(db):
+    _seed(db)
+    profiles = EmotionProfileService(db, emotion_extractor=WordCountExtractor())
+    profiles.apply_review_change("b1", None, "sad sad sad")
+
+    counts = profiles.rebuild_book("b1", ["happy", None, "happy sad"])
+    db.commit()
+
+    assert counts == {"happy": 2, "sad": 1}
+    assert profiles.get_totals("b1") == ({"happy": 2, "sad": 1}, {"happy": 150.0, "sad": 50.0})
+    assert _stored_profile(db, "b1")["happy"] == {"count": 2, "score": 150.0}
+
+
+def test_write_counts_bulk_replaces_many_books(db):
+    _seed(db)
+    db.add(Book(book_id="b2", title="Two"))
+    db.commit()
+    profiles = EmotionProfileService(db, emotion_extractor=WordCountExtractor())
+    profiles.apply_review_change("b1", None, "sad")
+
+    written = profiles.write_counts_bulk({"b1": {"happy": 3}, "b2": {}}, {"b1": {"happy": 200.0}}, chunk_size=1)
+    db.commit()
+
+    assert written == 2
+    assert profiles.get_counts("b1") == {"happy": 3}
+    assert profiles.get_counts("b2") == {}
+    assert _stored_profile(db, "b1")["happy"] == {"count": 3, "score": 200.0}
+    assert _stored_profile(db, "b2")["sad"] == {"count": 0, "score": 0.0}
+
+
+def test_write_counts_bulk_records_build_watermark(db):
+    _seed(db)
+    profiles = EmotionProfileService(db, emotion_extractor=WordCountExtractor())
+
+    profiles.write_counts_bulk({"b1": {"sad": 1}}, {"b1": {"sad": 100.0}}, built_at=datetime(2026, 5, 1, 12, 0))
+    db.commit()
+    db.expire_all()
+
+    assert db.get(Book, "b1").profile_built_at == datetime(2026, 5, 1, 12, 0)
@@ -0,0 +1,114 @@
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import text
+
+from app.dependencies.auth import get_current_user
+from app.dependencies.db import get_db
+from app.main import app
+from app.models.book import Book
+from app.routes.chroma import get_chroma_service
+from app.services.book_search_service import BookSearchService
+from app.services.hybrid_search_service import HybridSearchService, reciprocal_rank_fusion
+
+
+def _vector(*hits):
+    return Mock(search_books=Mock(return_value=[
+        {"id": book_id, "title": book_id.upper(), "description": "", "distance": distance}
+        for book_id, distance in hits
+    ]))
+
+
+def _seed(db):
+    db.add_all(
+        [
+            Book(book_id="b1", title="Ocean", abstract="A short novel"),
+            Book(book_id="b2", title="Ocean Tales", abstract="Stories about the ocean"),
+            Book(book_id="b3", title="Sea Songs", abstract="Poems about the ocean floor"),
+            Book(book_id="b4", title="Tides", abstract="Coastal walks"),
+        ]
+    )
+    db.commit()
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]], k=60)
+
+    assert [item for item, _ in fused] == ["b", "c", "a"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_exact_title_matches_ignore_case_and_punctuation(db):
+    _seed(db)
+    search = BookSearchService(db)
+
+    assert [hit["book_id"] for hit in search.exact_title_matches("ocean tales!")] == ["b2"]
+    assert [hit["book_id"] for hit in search.exact_title_matches("OCEAN")] == ["b1"]
+    assert search.exact_title_matches("tales") == []
+
+
+def test_hybrid_pins_exact_title_and_fuses_the_rest(db):
+    _seed(db)
+    chroma = _vector(("b4", 0.2), ("b3", 0.3))
+
+    hits, next_offset = HybridSearchService(db, chroma).search("ocean", limit=3)
+
+    # b3 is found by both sides; vector-only b4 (rank 1) beats keyword-only b2 (rank 2)
+    assert [hit["book_id"] for hit in hits] == ["b1", "b3", "b4"]
+    assert hits[0]["exact_title"] and not hits[1]["exact_title"]
+    assert hits[1]["lexical_rank"] == 3 and hits[1]["vector_rank"] == 2
+    assert hits[2]["lexical_rank"] is None
+    assert next_offset == 3
+    # The vector side is asked for one page only
+    chroma.search_books.assert_called_once_with("ocean", n_results=3, distance_threshold=0.9)
+
+
+def test_hybrid_pages_and_survives_vector_failures(db):
+    _seed(db)
+    chroma = Mock(search_books=Mock(side_effect=RuntimeError("provider down")))
+    service = HybridSearchService(db, chroma)
+
+    first, next_offset = service.search("ocean", limit=2)
+    second, last = service.search("ocean", limit=2, offset=next_offset)
+
+    assert [hit["book_id"] for hit in first + second] == ["b1", "b2", "b3"]
+    assert last is None
+    chroma.search_books.assert_called_with("ocean", n_results=4, distance_threshold=0.9)
+
+
+def test_hybrid_route(client, db):
+    _seed(db)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: {"id": "u1"}
+    app.dependency_overrides[get_chroma_service] = lambda: _vector(("b3", 0.1))
+
+    response = client.get("/books/search/hybrid", params={"query": "ocean tales", "limit": 5})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [hit["book_id"] for hit in body["response"]] == ["b2", "b3"]
+    assert body["next_offset"] is None
+    assert client.get("/books/search/hybrid", params={"query": "x", "limit": 0}).status_code == 422
+
+
+def test_exact_title_lookup_only_reads_matching_titles(db):
+    db.add_all(
+        [Book(book_id=f"long{i:02d}", title=f"The Ocean Chronicles Volume {i}") for i in range(30)]
+        + [Book(book_id="exact", title="The Ocean"), Book(book_id="inner", title="Beyond The Ocean")]
+    )
+    db.commit()
+    search = BookSearchService(db)
+    executed = []
+    original = db.execute
+    db.execute = lambda *args, **kwargs: executed.append(args[1]) or original(*args, **kwargs)
+
+    assert [hit["book_id"] for hit in search.exact_title_matches("The Ocean", limit=1)] == ["exact"]
+    assert executed == [{"typed": "the ocean", "words": "the ocean", "limit": 1}]
+    # Equality probes of the lower(title) index, never a scan of titles containing the words
+    plan = " ".join(
+        row[-1] for row in original(
+            text("EXPLAIN QUERY PLAN SELECT book_id FROM book WHERE lower(title) IN (:a, :b)"),
+            {"a": "the ocean", "b": "the ocean"},
+        )
+    )
+    assert "USING INDEX ix_book_title_lower" in plan
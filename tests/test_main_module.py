@@ -102,6 +102,25 @@ def test_lifespan_catches_startup_exception(monkeypatch):
     scheduler.stop.assert_called_once()
 
 
+def test_warm_up_emotion_extractor_runs_hook(monkeypatch):
+    from app.services.mood_recommendation import emotion_extractor
+
+    warm_up = Mock()
+    monkeypatch.setattr(emotion_extractor, "warm_up", warm_up)
+
+    asyncio.run(main_module._warm_up_emotion_extractor())
+
+    warm_up.assert_called_once_with()
+
+
+def test_warm_up_emotion_extractor_swallows_errors(monkeypatch):
+    from app.services.mood_recommendation import emotion_extractor
+
+    monkeypatch.setattr(emotion_extractor, "warm_up", Mock(side_effect=LookupError("no wordnet")))
+
+    asyncio.run(main_module._warm_up_emotion_extractor())
+
+
 def test_trigger_manual_sync_returns_error_when_scheduler_missing(monkeypatch):
     monkeypatch.setattr(main_module, "SynopsisScheduler", None)
 
@@ -30,6 +30,21 @@ def test_ensure_nltk_resource_downloads_when_missing():
     mock_download.assert_called_once_with("punkt", quiet=True)
 
 
+def test_ensure_nltk_resources_checks_each_resource_once(monkeypatch):
+    monkeypatch.setattr(preprocessing, "_ensured_resources", set())
+
+    with patch.object(preprocessing, "_ensure_nltk_resource") as mock_ensure:
+        preprocessing.ensure_nltk_resources("stopwords")
+        preprocessing.ensure_nltk_resources("stopwords", "wordnet")
+        preprocessing.ensure_nltk_resources()
+
+    assert [c.args for c in mock_ensure.call_args_list] == [
+        ("corpora/stopwords", "stopwords"),
+        ("corpora/wordnet", "wordnet"),
+        ("tokenizers/punkt", "punkt"),
+    ]
+
+
 def test_init_preserves_negation_words():
     processor = make_preprocessor(["the", "and", "not", "never"])
 
@@ -104,3 +119,54 @@ def test_preprocess_runs_clean_and_tokenize_pipeline():
     assert result == ["token"]
     mock_clean.assert_called_once_with("raw text")
     mock_tokenize.assert_called_once_with("cleaned")
+
+
+def test_init_rejects_unknown_tokenizer():
+    with pytest.raises(ValueError):
+        with patch.object(preprocessing.stopwords, "words", return_value=[]):
+            TextPreprocessor(tokenizer="spacy")
+
+
+def test_init_reads_tokenizer_from_environment(monkeypatch):
+    monkeypatch.setenv("TEXT_PREPROCESSOR_TOKENIZER", "fast")
+    assert make_preprocessor().tokenizer == "fast"
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("hello!!! visit now...", ["hello", "visit", "now"]),
+        ("is it sad?really. yes!", ["is", "it", "sad", "really", "yes"]),
+        ("wow...great e.g. end.", ["wow", "great", "e.g", "end"]),
+        ("... !? .", []),
+    ],
+)
+def test_fast_tokenize_splits_like_word_tokenize_on_cleaned_text(text, expected):
+    assert TextPreprocessor.fast_tokenize(text) == expected
+
+
+def test_fast_mode_skips_word_tokenize():
+    processor = make_preprocessor(["the"])
+    processor.tokenizer = "fast"
+    processor.lemmatizer = MagicMock()
+    processor.lemmatizer.lemmatize.side_effect = lambda token: token
+
+    with patch.object(preprocessing, "word_tokenize") as mock_tokenize:
+        tokens = processor.tokenize_and_lemmatize("the cats were happy.")
+
+    mock_tokenize.assert_not_called()
+    assert tokens == ["cats", "were", "happy"]
+
+
+def test_lemmas_are_memoised_per_lemmatizer():
+    processor = make_preprocessor([])
+    processor.tokenizer = "fast"
+    processor.lemmatizer = MagicMock()
+    processor.lemmatizer.lemmatize.side_effect = lambda token: token.rstrip("s")
+
+    assert processor.tokenize_and_lemmatize("cats cats dogs cats") == ["cat", "cat", "dog", "cat"]
+    assert processor.lemmatizer.lemmatize.call_count == 2
+
+    processor.lemmatizer = MagicMock()
+    processor.lemmatizer.lemmatize.side_effect = str.upper
+    assert processor.tokenize_and_lemmatize("cats") == ["CATS"]
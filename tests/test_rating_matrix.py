@@ -0,0 +1,131 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.book import Book
+from app.models.user import User
+from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.book_service import BookService
+from app.services.bookshelf_service import BookshelfService
+from app.services.mood_recommendation.rating_matrix import RatingIndex, RatingMatrix, rating_index
+from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.review_service import ReviewService
+
+
+ROWS = [("u1", "b1", 5), ("u2", "b1", 4), ("u1", "b2", 3), ("u3", "b3", 5), ("u2", "b3", 2)]
+
+
+def _ratings(matrix, user_id):
+    columns, ratings = matrix.user_ratings(user_id)
+    return {matrix.book_ids[c]: r for c, r in zip(columns.tolist(), ratings.tolist())}
+
+
+def test_from_rows_builds_csr_rows_per_user():
+    matrix = RatingMatrix.from_rows(ROWS)
+
+    assert matrix.nnz == 5
+    assert matrix.indptr.tolist() == [0, 2, 4, 5]
+    assert _ratings(matrix, "u1") == {"b1": 5.0, "b2": 3.0}
+    assert _ratings(matrix, "u2") == {"b1": 4.0, "b3": 2.0}
+    assert _ratings(matrix, "unknown") == {}
+
+
+def test_book_raters_read_a_csc_slice_and_apply_writes():
+    matrix = RatingMatrix.from_rows(ROWS)
+
+    # Columns b1, b2, b3; rows u1, u2, u3
+    assert matrix.col_indptr.tolist() == [0, 2, 3, 5]
+    assert matrix.row_indices.tolist() == [0, 1, 0, 1, 2]
+    assert matrix.book_raters("b3") == ["u2", "u3"]
+    assert matrix.book_raters("unknown") == []
+
+    matrix.set_rating("u2", "b3", None)
+    matrix.set_rating("u1", "b3", 4)
+    matrix.set_rating("new-user", "b3", 5)
+    assert matrix.book_raters("b3") == ["u3", "u1", "new-user"]
+    assert matrix.book_raters("b1") == ["u1", "u2"]
+    assert RatingMatrix.from_rows([]).book_raters("b1") == []
+
+
+def test_neighbour_averages_keeps_high_ratings_only():
+    matrix = RatingMatrix.from_rows(ROWS)
+
+    columns, averages = matrix.neighbour_averages(["u1", "u2", "u3"], min_rating=4)
+
+    assert dict(zip((matrix.book_ids[c] for c in columns), averages.tolist())) == {"b1": 4.5, "b3": 5.0}
+
+
+def test_set_rating_overrides_rows_until_rebuild():
+    matrix = RatingMatrix.from_rows(ROWS)
+
+    assert matrix.set_rating("u1", "b3", 4)
+    assert matrix.set_rating("u1", "b2", None)
+    assert matrix.set_rating("new-user", "b1", 1)
+    assert not matrix.set_rating("u1", "unknown-book", 5)
+
+    assert _ratings(matrix, "u1") == {"b1": 5.0, "b3": 4.0}
+    assert _ratings(matrix, "new-user") == {"b1": 1.0}
+
+
+def test_index_rebuilds_when_a_write_touches_an_unknown_book():
+    index = RatingIndex(ttl_seconds=60)
+    db = MagicMock()
+    db.execute.return_value.all.return_value = ROWS
+
+    first = index.get_matrix(db)
+    index.set_rating("u3", "b1", 5)
+    assert index.get_matrix(db) is first
+    assert _ratings(first, "u3") == {"b1": 5.0, "b3": 5.0}
+
+    index.set_rating("u3", "b9", 5)
+    assert index.get_matrix(db) is not first
+    assert db.execute.call_count == 2
+
+
+def test_review_scores_are_memoised_per_review_and_text():
+    index = RatingIndex(review_cache_size=2)
+    extract = MagicMock(side_effect=lambda text: {"happy": float(len(text))})
+
+    assert index.review_scores("r1", "joy", extract) == {"happy": 3.0}
+    assert index.review_scores("r1", "joy", extract) == {"happy": 3.0}
+    assert extract.call_count == 1
+
+    assert index.review_scores("r1", "edited", extract) == {"happy": 6.0}
+    index.review_scores(None, "joy", extract)
+    assert extract.call_count == 3
+
+
+def test_collaborative_recommendations_follow_review_writes(db):
+    db.add_all(
+        [User(user_id=u, cognito_sub=f"sub-{u}", email=f"{u}@example.com") for u in ("u1", "u2", "u3")]
+        + [Book(book_id=b, title=b.upper()) for b in ("b1", "b2", "b3")]
+    )
+    db.commit()
+    extractor = MagicMock(extract_emotions=MagicMock(return_value={"scores": {"happy": 1.0}}))
+    profiles = MagicMock(apply_review_change=MagicMock(return_value=None))
+    reviews = ReviewService(db, emotion_profiles=profiles)
+    reviews.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=5, comment="lovely"))
+    reviews.add_review(book_id="b2", user_id="u2", review_data=ReviewCreate(rating=5, comment="lovely"))
+    reviews.add_review(book_id="b3", user_id="u3", review_data=ReviewCreate(rating=2, comment="meh"))
+    engine = RecommendationEngine(
+        book_service=BookService(db),
+        review_service=reviews,
+        bookshelf_service=BookshelfService(db),
+        db=db,
+        emotion_extractor_instance=extractor,
+        emotion_profiler_instance=MagicMock(),
+    )
+
+    recs = engine.recommend_collaborative("u1", "b1", "happy")
+    assert [(r["book"].book_id, r["score"]) for r in recs] == [("b2", pytest.approx(5.0))]
+
+    # u2's later review of b3 is applied to the cached matrix in place
+    matrix = rating_index.get_matrix(db)
+    review = reviews.add_review(book_id="b3", user_id="u2", review_data=ReviewCreate(rating=4, comment="ok"))
+    recs = engine.recommend_collaborative("u1", "b1", "happy")
+    assert [r["book"].book_id for r in recs] == ["b2", "b3"]
+    assert recs[1]["score"] == pytest.approx(0.7 * 4 + 0.3 * 3.0)
+    assert rating_index.get_matrix(db) is matrix
+
+    reviews.update_review(review.review_id, "u2", ReviewUpdate(rating=3))
+    assert [r["book"].book_id for r in engine.recommend_collaborative("u1", "b1", "happy")] == ["b2"]
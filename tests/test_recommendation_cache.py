@@ -0,0 +1,122 @@
+from unittest.mock import MagicMock, patch
+
+from app.models.book import Book
+from app.models.user import User
+from app.schemas.review import ReviewCreate
+from app.services.book_service import BookService
+from app.services.bookshelf_service import BookshelfService
+from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.mood_recommendation.result_cache import RecommendationCache, recommendation_cache
+from app.services.review_service import ReviewService
+
+
+def test_cache_hits_until_ttl_expires():
+    cache = RecommendationCache(ttl_seconds=10, max_entries=8)
+    compute = MagicMock(return_value=["a"])
+
+    with patch("app.services.mood_recommendation.result_cache.time.monotonic", return_value=100.0):
+        assert cache.get_or_compute("mood", "u1", ("happy",), compute) == ["a"]
+        assert cache.get_or_compute("mood", "u1", ("happy",), compute) == ["a"]
+    assert compute.call_count == 1
+
+    with patch("app.services.mood_recommendation.result_cache.time.monotonic", return_value=111.0):
+        cache.get_or_compute("mood", "u1", ("happy",), compute)
+    assert compute.call_count == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RecommendationCache(ttl_seconds=60, max_entries=2)
+    for user_id in ("u1", "u2"):
+        cache.put(cache.make_key("mood", user_id, ()), user_id)
+    cache.get(cache.make_key("mood", "u1", ()))
+
+    cache.put(cache.make_key("mood", "u3", ()), "u3")
+
+    assert cache.get(cache.make_key("mood", "u2", ())) is None
+    assert cache.get(cache.make_key("mood", "u1", ())) == "u1"
+
+
+def test_version_bumps_make_entries_unreachable():
+    cache = RecommendationCache(ttl_seconds=60, max_entries=8)
+    cache.put(cache.make_key("mood", "u1", ()), "u1")
+    cache.put(cache.make_key("mood", "u2", ()), "u2")
+
+    cache.bump_user("u1")
+    assert cache.get(cache.make_key("mood", "u1", ())) is None
+    assert cache.get(cache.make_key("mood", "u2", ())) == "u2"
+
+    cache.bump_global()
+    assert cache.get(cache.make_key("mood", "u2", ())) is None
+
+
+def test_put_is_dropped_when_versions_moved_during_compute():
+    cache = RecommendationCache(ttl_seconds=60, max_entries=8)
+    key = cache.make_key("mood", "u1", ())
+    cache.bump_user("u1")
+
+    cache.put(key, "stale")
+
+    assert len(cache._entries) == 0
+
+
+def test_disabled_cache_always_computes():
+    cache = RecommendationCache(ttl_seconds=60, max_entries=0)
+    compute = MagicMock(return_value=[])
+
+    cache.get_or_compute("mood", "u1", (), compute)
+    cache.get_or_compute("mood", "u1", (), compute)
+
+    assert compute.call_count == 2
+
+
+def _engine(db, cache):
+    return RecommendationEngine(
+        book_service=BookService(db),
+        review_service=MagicMock(),
+        bookshelf_service=MagicMock(),
+        db=db,
+        emotion_extractor_instance=MagicMock(),
+        emotion_profiler_instance=MagicMock(),
+        result_cache=cache,
+    )
+
+
+def test_engine_rehydrates_cached_ids_in_current_session(db):
+    db.add_all([Book(book_id="b1", title="One"), Book(book_id="b2", title="Two")])
+    db.commit()
+    cache = RecommendationCache(ttl_seconds=60, max_entries=8)
+    engine = _engine(db, cache)
+    engine._recommend_by_mood = MagicMock(
+        return_value=[{"book": db.get(Book, "b1"), "similarity": 0.9}, {"book": db.get(Book, "b2"), "similarity": 0.5}]
+    )
+
+    first = engine.recommend_by_mood("u1", "happy", top_n=2)
+    assert [r["book"].book_id for r in first] == ["b1", "b2"]
+    db.delete(db.get(Book, "b2"))
+    db.commit()
+    db.expunge_all()
+    second = engine.recommend_by_mood("u1", "happy", top_n=2)
+
+    engine._recommend_by_mood.assert_called_once_with("u1", "happy", 2)
+    assert [(r["book"].title, r["similarity"]) for r in second] == [("One", 0.9)]
+
+
+def test_shelf_and_review_writes_bump_versions(db):
+    db.add_all(
+        [
+            User(user_id="u1", cognito_sub="sub-1", email="u1@example.com"),
+            Book(book_id="b1", title="One"),
+        ]
+    )
+    db.commit()
+    user_version = recommendation_cache.user_version("u1")
+    global_version = recommendation_cache.global_version
+
+    BookshelfService(db).add_to_shelf(user_id="u1", book_id="b1")
+    assert recommendation_cache.user_version("u1") == user_version + 1
+
+    ReviewService(db, emotion_profiles=MagicMock(apply_review_change=MagicMock(return_value=None))).add_review(
+        book_id="b1", user_id="u1", review_data=ReviewCreate(rating=4, comment="fine")
+    )
+    assert recommendation_cache.global_version == global_version + 1
@@ -3,6 +3,7 @@ import unittest
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+from app.services.mood_recommendation.emotion_index import EmotionMatrix
 from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
 
 
@@ -32,6 +33,17 @@ class FakeBookService:
     def get_book(self, book_id):
         return self._books.get(book_id)
 
+    def get_books_by_ids(self, book_ids):
+        return {book_id: self._books[book_id] for book_id in book_ids if book_id in self._books}
+
+    def get_book_titles(self, book_ids=None):
+        ids = self._books if book_ids is None else [b for b in book_ids if b in self._books]
+        return {book_id: self._books[book_id].title for book_id in ids}
+
+    def get_emotion_profiles(self, book_ids=None):
+        ids = self._books if book_ids is None else [b for b in book_ids if b in self._books]
+        return {book_id: self._books[book_id].emotion_profile for book_id in ids}
+
 
 class FakeReviewService:
     def __init__(self, reviews_by_book, avg_by_book, db=None):
@@ -42,9 +54,18 @@ class FakeReviewService:
     def get_reviews_by_book_id(self, book_id, **kwargs):
         return self._reviews_by_book.get(book_id, [])
 
+    def get_review_texts_for_books(self, book_ids, per_book_limit=500):
+        return {
+            book_id: [r.body for r in self._reviews_by_book.get(book_id, []) if r.body][:per_book_limit]
+            for book_id in book_ids
+        }
+
     def get_average_rating(self, book_id):
         return self._avg_by_book.get(book_id)
 
+    def get_stored_average_ratings(self, book_ids):
+        return {book_id: self._avg_by_book.get(book_id) for book_id in book_ids}
+
 
 class FakeBookshelfService:
     def __init__(self, read_book_ids):
@@ -81,7 +102,21 @@ class FakeEmotionProfiler:
         }
 
 
+def _rating_rows(reviews):
+    """(user_id, book_id, rating) rows as returned by the rating matrix query."""
+    return [(r.user_id, r.book_id, r.rating) for r in reviews]
+
+
 class RecommendationEngineTests(unittest.TestCase):
+    def setUp(self):
+        # Mock sessions have no taste rows, so collaborative filtering compares review texts
+        patcher = patch(
+            "app.services.mood_recommendation.recommendation_engine.user_taste_index.get_matrix",
+            return_value=EmotionMatrix.from_scores({}),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def _make_engine(
         self,
         *,
@@ -138,13 +173,8 @@ class RecommendationEngineTests(unittest.TestCase):
             }
         )
         db = MagicMock()
-        db.query.return_value.filter.return_value.first.return_value = FakeBook(
-            "b1",
-            "Target",
-            emotion_profile=saved_profile,
-        )
         engine = self._make_engine(
-            books=[FakeBook("b1", "Target")],
+            books=[FakeBook("b1", "Target", emotion_profile=saved_profile)],
             reviews_by_book={},
             avg_by_book={},
             read_book_ids=set(),
@@ -157,15 +187,10 @@ class RecommendationEngineTests(unittest.TestCase):
         self.assertEqual(profile["emotion_counts"], {"joy": 4, "fear": 1})
         self.assertEqual(profile["num_reviews"], 2)
 
-    def test_get_emotion_profile_falls_back_on_invalid_saved_profile(self):
+    def test_get_emotion_profile_is_empty_for_invalid_saved_profile(self):
         db = MagicMock()
-        db.query.return_value.filter.return_value.first.return_value = FakeBook(
-            "b1",
-            "Target",
-            emotion_profile="{invalid-json",
-        )
         engine = self._make_engine(
-            books=[FakeBook("b1", "Target")],
+            books=[FakeBook("b1", "Target", emotion_profile="{invalid-json")],
             reviews_by_book={},
             avg_by_book={},
             read_book_ids=set(),
@@ -175,18 +200,13 @@ class RecommendationEngineTests(unittest.TestCase):
 
         profile = engine.get_emotion_profile("b1", "Target", ["r1"])
 
-        self.assertEqual(profile["emotion_scores"], {"joy": 100.0})
+        self.assertEqual(profile["emotion_scores"], {})
         self.assertEqual(profile["num_reviews"], 1)
 
-    def test_get_emotion_profile_falls_back_when_saved_profile_is_missing(self):
+    def test_get_emotion_profile_does_not_rebuild_missing_profile_from_reviews(self):
         db = MagicMock()
-        db.query.return_value.filter.return_value.first.return_value = FakeBook(
-            "b1",
-            "Target",
-            emotion_profile=None,
-        )
         engine = self._make_engine(
-            books=[FakeBook("b1", "Target")],
+            books=[FakeBook("b1", "Target", emotion_profile=None)],
             reviews_by_book={},
             avg_by_book={},
             read_book_ids=set(),
@@ -196,17 +216,30 @@ class RecommendationEngineTests(unittest.TestCase):
 
         profile = engine.get_emotion_profile("b1", "Target", ["r1"])
 
-        self.assertEqual(profile["emotion_scores"], {"joy": 55.0})
+        self.assertEqual(profile["emotion_scores"], {})
+        self.assertEqual(profile["emotion_counts"], {})
 
-    def test_get_emotion_profile_falls_back_when_db_query_fails(self):
-        db = MagicMock()
-        db.query.side_effect = RuntimeError("db unavailable")
+    def test_get_emotion_profile_is_empty_when_db_query_fails(self):
+        engine = self._make_engine(
+            books=[FakeBook("b1", "Target")],
+            reviews_by_book={},
+            avg_by_book={},
+            read_book_ids=set(),
+            db=MagicMock(),
+            book_scores={"b1": {"joy": 75.0}},
+        )
+        engine.book_service.get_emotion_profiles = MagicMock(side_effect=RuntimeError("db unavailable"))
+
+        profile = engine.get_emotion_profile("b1", "Target", ["r1"])
+
+        self.assertEqual(profile["emotion_scores"], {})
+
+    def test_get_emotion_profile_builds_from_reviews_without_db(self):
         engine = self._make_engine(
             books=[FakeBook("b1", "Target")],
             reviews_by_book={},
             avg_by_book={},
             read_book_ids=set(),
-            db=db,
             book_scores={"b1": {"joy": 75.0}},
         )
 
@@ -433,7 +466,7 @@ class RecommendationEngineTests(unittest.TestCase):
             FakeReview(user_id="u3", rating=3, book_id="b3"),
         ]
         mock_db = MagicMock()
-        mock_db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        mock_db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
@@ -462,7 +495,7 @@ class RecommendationEngineTests(unittest.TestCase):
         books = [FakeBook("b1", "Target"), FakeBook("b2", "Candidate")]
         similar_user_reviews = [FakeReview(user_id="u2", rating=5, book_id="b2")]
         fallback_db = MagicMock()
-        fallback_db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        fallback_db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
@@ -487,7 +520,7 @@ class RecommendationEngineTests(unittest.TestCase):
         books = [FakeBook("b1", "Target"), FakeBook("b2", "Candidate")]
         similar_user_reviews = [FakeReview(user_id="u2", rating=5, book_id="b2")]
         db = MagicMock()
-        db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
@@ -509,7 +542,7 @@ class RecommendationEngineTests(unittest.TestCase):
         books = [FakeBook("b1", "Target"), FakeBook("b2", "Candidate")]
         similar_user_reviews = [FakeReview(user_id="u2", rating=5, book_id="b2")]
         db = MagicMock()
-        db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
@@ -536,7 +569,7 @@ class RecommendationEngineTests(unittest.TestCase):
         books = [FakeBook("b1", "Target")]
         similar_user_reviews = [FakeReview(user_id="u2", rating=5, book_id="missing-book")]
         db = MagicMock()
-        db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
@@ -554,29 +587,11 @@ class RecommendationEngineTests(unittest.TestCase):
 
         self.assertEqual(engine.recommend_collaborative("u1", "b1", "great"), [])
 
-    def test_collaborative_filtering_skips_candidate_without_ratings(self):
-        class FlakyReview(FakeReview):
-            def __init__(self, user_id, rating, first_book_id, later_book_id):
-                super().__init__(body="match", user_id=user_id, rating=rating, book_id=None)
-                self._first_book_id = first_book_id
-                self._later_book_id = later_book_id
-                self._access_count = 0
-
-            @property
-            def book_id(self):
-                self._access_count += 1
-                if self._access_count == 1:
-                    return self._first_book_id
-                return self._later_book_id
-
-            @book_id.setter
-            def book_id(self, value):
-                return None
-
+    def test_collaborative_filtering_ignores_ratings_below_four(self):
         books = [FakeBook("b1", "Target"), FakeBook("b2", "Candidate")]
-        similar_user_reviews = [FlakyReview("u2", 5, "b2", "different-book")]
+        similar_user_reviews = [FakeReview(user_id="u2", rating=3, book_id="b2")]
         db = MagicMock()
-        db.execute.return_value.scalars.return_value.all.return_value = similar_user_reviews
+        db.execute.return_value.all.return_value = _rating_rows(similar_user_reviews)
         engine = self._make_engine(
             books=books,
             reviews_by_book={
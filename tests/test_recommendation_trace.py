@@ -0,0 +1,92 @@
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.dependencies.db import get_db
+from app.main import app
+from app.models.book import Book
+from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.mood_recommendation.trace import RecommendationTrace
+
+
+def _request(headers=None, query=None):
+    return SimpleNamespace(
+        headers=headers or {},
+        query_params=query or {},
+        method="POST",
+        url=SimpleNamespace(path="/api/content-based"),
+    )
+
+
+def _trace_records(caplog):
+    prefix = "recommendation trace "
+    return [json.loads(r.getMessage()[len(prefix):]) for r in caplog.records if r.getMessage().startswith(prefix)]
+
+
+def test_trace_is_enabled_by_header_or_query_flag():
+    assert not RecommendationTrace.from_request(None).enabled
+    assert not RecommendationTrace.from_request(_request()).enabled
+    assert not RecommendationTrace.from_request(_request(query={"debug": "0"})).enabled
+    assert RecommendationTrace.from_request(_request(headers={"X-Debug-Trace": "1"})).enabled
+    assert RecommendationTrace.from_request(_request(query={"debug": "true"})).enabled
+
+
+def test_disabled_trace_records_and_logs_nothing(caplog):
+    trace = RecommendationTrace()
+
+    with caplog.at_level(logging.INFO):
+        trace.start("mood")
+        trace.step("rank", candidates=3)
+        trace.emit(results=1)
+
+    assert trace.steps == []
+    assert _trace_records(caplog) == []
+
+
+def test_engine_emits_one_structured_line_per_call(db, caplog):
+    db.add(Book(book_id="b1", title="One"))
+    db.commit()
+    bookshelf = MagicMock()
+    bookshelf.list_shelf.return_value = []
+    engine = RecommendationEngine(
+        book_service=MagicMock(),
+        review_service=MagicMock(),
+        bookshelf_service=bookshelf,
+        db=db,
+        emotion_extractor_instance=MagicMock(extract_emotions=MagicMock(return_value={"scores": {"joy": 1.0}})),
+        emotion_profiler_instance=MagicMock(),
+        trace=RecommendationTrace(True, path="/api/chatbot/chat"),
+    )
+    engine.review_service.get_stored_average_ratings.return_value = {"b1": 4.0}
+    engine.book_service.get_books_by_ids.return_value = {"b1": db.get(Book, "b1")}
+
+    with caplog.at_level(logging.INFO, logger="app.services.mood_recommendation.trace"):
+        engine.recommend_by_mood("u1", "happy", top_n=1)
+
+    [record] = _trace_records(caplog)
+    assert record["call"] == "mood"
+    assert record["path"] == "/api/chatbot/chat"
+    assert record["cache"] == "off"
+    assert record["book_ids"] == ["b1"]
+    assert [step["step"] for step in record["steps"]] == ["mood_emotions", "read_set", "rank", "top_rated_fallback"]
+    assert all(step["ms"] >= 0 for step in record["steps"])
+
+
+def test_content_based_route_traces_only_on_request(client, db, caplog):
+    # The recommendation routes depend on app.dependencies.db.get_db
+    app.dependency_overrides[get_db] = lambda: db
+    with caplog.at_level(logging.INFO, logger="app.services.mood_recommendation.trace"):
+        body = {"user_id": "u1", "book_id": "missing", "rating": 5}
+        assert client.post("/api/content-based", json=body).json() == []
+        assert _trace_records(caplog) == []
+
+        client.post("/api/content-based", json={**body, "rating": 4}, headers={"X-Debug-Trace": "1"})
+        client.post("/api/content-based", json=body, params={"debug": "1"})
+
+    app.dependency_overrides.pop(get_db)
+    computed, cached = _trace_records(caplog)
+    assert computed["path"] == "/api/content-based"
+    assert computed["cache"] == "miss"
+    assert [(step["step"], step.get("found")) for step in computed["steps"]] == [("read_set", None), ("target_book", False)]
+    assert cached["cache"] == "hit"
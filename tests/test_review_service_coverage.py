@@ -160,7 +160,7 @@ def test_update_review_invalid_rating_raises_422():
 
 def test_update_review_maps_comment_and_legacy_mood_alias():
     db = MagicMock()
-    review = SimpleNamespace(user_id="u1", body="old", rating=3)
+    review = SimpleNamespace(user_id="u1", book_id="b1", body="old", rating=3)
     service = ReviewService(db)
     service._ensure_user_exists = MagicMock(return_value=None)
     service._get_review_or_404 = MagicMock(return_value=review)
@@ -179,7 +179,7 @@ def test_update_review_maps_comment_and_legacy_mood_alias():
 
 def test_update_review_with_explicit_book_mood_skips_legacy_alias_branch():
     db = MagicMock()
-    review = SimpleNamespace(user_id="u1", body="old", rating=3)
+    review = SimpleNamespace(user_id="u1", book_id="b1", body="old", rating=3)
     service = ReviewService(db)
     service._ensure_user_exists = MagicMock(return_value=None)
     service._get_review_or_404 = MagicMock(return_value=review)
@@ -194,7 +194,7 @@ def test_update_review_with_explicit_book_mood_skips_legacy_alias_branch():
 
 def test_update_review_with_explicit_body_does_not_use_comment():
     db = MagicMock()
-    review = SimpleNamespace(user_id="u1", body="old")
+    review = SimpleNamespace(user_id="u1", book_id="b1", body="old")
     service = ReviewService(db)
     service._ensure_user_exists = MagicMock(return_value=None)
     service._get_review_or_404 = MagicMock(return_value=review)
@@ -212,7 +212,7 @@ def test_delete_review_success_and_forbidden_paths():
     service = ReviewService(db)
     service._ensure_user_exists = MagicMock(return_value=None)
 
-    owner_review = SimpleNamespace(user_id="u1")
+    owner_review = SimpleNamespace(user_id="u1", book_id="b1", rating=4, body="old")
     service._get_review_or_404 = MagicMock(return_value=owner_review)
     service.delete_review("r1", "u1")
     db.delete.assert_called_once_with(owner_review)
@@ -261,3 +261,167 @@ def test_get_average_rating_returns_value_and_none():
 
     db.scalar.return_value = None
     assert service.get_average_rating("b1") is None
+
+
+def test_get_review_texts_for_books_returns_newest_bodies_per_book(db):
+    from datetime import datetime, timedelta
+
+    from app.models.book import Book
+    from app.models.review import Review
+    from app.models.user import User
+
+    users = [User(user_id=f"u{i}", cognito_sub=f"sub-{i}", email=f"u{i}@example.com") for i in range(3)]
+    db.add_all(users + [Book(book_id="b1", title="One"), Book(book_id="b2", title="Two")])
+    base = datetime(2026, 1, 1)
+    db.add_all(
+        [
+            Review(user_id="u0", book_id="b1", rating=5, body="oldest", created_at=base),
+            Review(user_id="u1", book_id="b1", rating=4, body="newest", created_at=base + timedelta(days=2)),
+            Review(user_id="u2", book_id="b1", rating=3, body=None, created_at=base + timedelta(days=3)),
+            Review(user_id="u0", book_id="b2", rating=2, body="only", created_at=base),
+        ]
+    )
+    db.commit()
+    service = ReviewService(db)
+
+    texts = service.get_review_texts_for_books(["b1", "b2", "missing"], per_book_limit=1)
+
+    assert texts == {"b1": ["newest"], "b2": ["only"], "missing": []}
+    assert service.get_review_texts_for_books(["b1"], chunk_size=1) == {"b1": ["newest", "oldest"]}
+
+
+def test_iter_review_text_chunks_keeps_books_whole(db):
+    from app.models.book import Book
+    from app.models.review import Review
+    from app.models.user import User
+
+    db.add_all([User(user_id=f"u{i}", cognito_sub=f"sub-{i}", email=f"u{i}@example.com") for i in range(3)])
+    db.add_all([Book(book_id=book_id, title=book_id) for book_id in ("b1", "b2", "b3")])
+    db.add_all(
+        [
+            Review(review_id="r1", user_id="u0", book_id="b1", rating=5, body="one"),
+            Review(review_id="r2", user_id="u1", book_id="b1", rating=4, body="two"),
+            Review(review_id="r3", user_id="u2", book_id="b1", rating=3, body="three"),
+            Review(review_id="r4", user_id="u0", book_id="b2", rating=2, body=""),
+            Review(review_id="r5", user_id="u0", book_id="b3", rating=2, body="four"),
+        ]
+    )
+    db.commit()
+
+    chunks = list(ReviewService(db).iter_review_text_chunks(chunk_size=2))
+
+    assert chunks == [
+        [("b1", "one"), ("b1", "two"), ("b1", "three")],
+        [("b3", "four")],
+    ]
+
+
+def test_iter_review_text_chunks_restricted_to_books(db):
+    from app.models.book import Book
+    from app.models.review import Review
+    from app.models.user import User
+
+    db.add_all([User(user_id=f"u{i}", cognito_sub=f"sub-{i}", email=f"u{i}@example.com") for i in range(2)])
+    db.add_all([Book(book_id=book_id, title=book_id) for book_id in ("b1", "b2", "b3")])
+    db.add_all(
+        [
+            Review(review_id="r1", user_id="u0", book_id="b1", rating=5, body="one"),
+            Review(review_id="r2", user_id="u1", book_id="b1", rating=4, body="two"),
+            Review(review_id="r3", user_id="u0", book_id="b2", rating=2, body="skipped"),
+            Review(review_id="r4", user_id="u0", book_id="b3", rating=2, body="three"),
+        ]
+    )
+    db.commit()
+
+    chunks = list(ReviewService(db).iter_review_text_chunks(chunk_size=1, book_ids=["b3", "b1", "missing"]))
+
+    assert chunks == [[("b1", "one"), ("b1", "two")], [("b3", "three")]]
+
+
+def test_get_books_with_changed_reviews_uses_profile_watermarks(db):
+    from datetime import datetime
+
+    from app.models.book import Book
+    from app.models.review import Review
+    from app.models.user import User
+
+    db.add(User(user_id="u0", cognito_sub="sub-0", email="u0@example.com"))
+    db.add_all(
+        [
+            Book(book_id="stale", title="Stale", profile_built_at=datetime(2026, 1, 1)),
+            Book(book_id="fresh", title="Fresh", profile_built_at=datetime(2026, 3, 1)),
+            Book(book_id="never", title="Never built"),
+            Book(book_id="unreviewed", title="No reviews"),
+        ]
+    )
+    db.add_all(
+        [
+            Review(user_id="u0", book_id=book_id, rating=3, body="text", updated_at=datetime(2026, 2, 1))
+            for book_id in ("stale", "fresh", "never")
+        ]
+    )
+    db.commit()
+    service = ReviewService(db)
+
+    assert service.get_books_with_changed_reviews() == ["never", "stale"]
+    assert service.get_books_with_changed_reviews(since=datetime(2026, 2, 1)) == ["fresh", "never", "stale"]
+    assert service.get_books_with_changed_reviews(since=datetime(2026, 2, 2)) == []
+
+
+def _rating_stats(db, book_id):
+    from app.models.book_rating_stats import BookRatingStats
+
+    db.expire_all()
+    return db.get(BookRatingStats, book_id)
+
+
+def test_rating_stats_follow_review_writes(db):
+    from app.models.book import Book
+    from app.models.user import User
+
+    db.add_all(
+        [
+            User(user_id="u1", cognito_sub="sub-1", email="u1@example.com"),
+            User(user_id="u2", cognito_sub="sub-2", email="u2@example.com"),
+            Book(book_id="b1", title="One"),
+        ]
+    )
+    db.commit()
+    service = ReviewService(db)
+
+    first = service.add_review(book_id="b1", user_id="u1", review_data=ReviewCreate(rating=4, comment="ok"))
+    service.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=2, comment="meh"))
+    stats = _rating_stats(db, "b1")
+    assert (stats.review_count, stats.rating_sum, stats.average_rating) == (2, 6, 3.0)
+
+    service.update_review(first.review_id, "u1", ReviewUpdate(rating=5))
+    assert _rating_stats(db, "b1").average_rating == 3.5
+
+    service.delete_review(first.review_id, "u1")
+    stats = _rating_stats(db, "b1")
+    assert (stats.review_count, stats.rating_sum, stats.average_rating) == (1, 2, 2.0)
+    assert service.get_stored_average_ratings(["b1", "b2"]) == {"b1": 2.0, "b2": None}
+    assert service.get_average_ratings(["b1", "b2"]) == {"b1": 2.0, "b2": None}
+
+
+def test_rebuild_rating_stats_recomputes_from_reviews(db):
+    from app.models.book import Book
+    from app.models.review import Review
+    from app.models.user import User
+
+    db.add_all(
+        [
+            User(user_id="u1", cognito_sub="sub-1", email="u1@example.com"),
+            User(user_id="u2", cognito_sub="sub-2", email="u2@example.com"),
+            Book(book_id="b1", title="One"),
+            Book(book_id="b2", title="Two"),
+            Review(user_id="u1", book_id="b1", rating=5),
+            Review(user_id="u2", book_id="b1", rating=4),
+            Review(user_id="u1", book_id="b2", rating=1),
+        ]
+    )
+    db.commit()
+    service = ReviewService(db)
+
+    assert service.rebuild_rating_stats() == 2
+    assert service.get_stored_average_ratings(["b1", "b2"]) == {"b1": 4.5, "b2": 1.0}
@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.book import Book
+from app.models.user import User
+from app.schemas.review import ReviewCreate, ReviewUpdate
+from app.services.book_service import BookService
+from app.services.bookshelf_service import BookshelfService
+from app.services.mood_recommendation.rating_matrix import rating_index
+from app.services.mood_recommendation.recommendation_engine import RecommendationEngine
+from app.services.mood_recommendation.user_taste import TASTE_EPOCH, review_taste, review_taste_weight
+from app.services.review_service import ReviewService
+from app.services.user_taste_service import UserTasteService
+
+COUNTS = {"joyful": {"happy": 3, "excited": 1}, "grim": {"sad": 2}, "tense": {"scared": 1}}
+
+
+def _profiles():
+    return MagicMock(
+        apply_review_change=MagicMock(return_value=None),
+        extract_counts=MagicMock(side_effect=lambda text: dict(COUNTS.get(text, {}))),
+    )
+
+
+def _seed(db, users=("u1", "u2", "u3"), books=("b1", "b2", "b3")):
+    db.add_all(
+        [User(user_id=u, cognito_sub=f"sub-{u}", email=f"{u}@example.com") for u in users]
+        + [Book(book_id=b, title=b.upper()) for b in books]
+    )
+    db.commit()
+
+
+def test_review_weight_doubles_every_half_life():
+    later = TASTE_EPOCH + timedelta(days=180)
+
+    assert review_taste_weight(5, TASTE_EPOCH, half_life_days=180) == pytest.approx(1.0)
+    assert review_taste_weight(5, later, half_life_days=180) == pytest.approx(2.0)
+    assert review_taste_weight(4, later.replace(tzinfo=None), half_life_days=180) == pytest.approx(1.6)
+    assert review_taste(5, TASTE_EPOCH, {}) == {}
+
+
+def test_review_writes_keep_taste_in_step_and_remove_it_on_delete(db):
+    _seed(db)
+    reviews = ReviewService(db, emotion_profiles=_profiles())
+
+    first = reviews.add_review(book_id="b1", user_id="u1", review_data=ReviewCreate(rating=4, comment="joyful"))
+    taste = reviews.user_tastes.get_taste("u1")
+    assert set(taste) == {"happy", "excited"}
+    assert taste["happy"] == pytest.approx(3 * taste["excited"])
+
+    second = reviews.add_review(book_id="b2", user_id="u1", review_data=ReviewCreate(rating=5, comment="grim"))
+    reviews.update_review(first.review_id, "u1", ReviewUpdate(comment="tense"))
+    assert set(reviews.user_tastes.get_taste("u1")) == {"sad", "scared"}
+
+    reviews.delete_review(first.review_id, "u1")
+    reviews.delete_review(second.review_id, "u1")
+    assert reviews.user_tastes.get_taste("u1") == {}
+
+
+def test_rebuild_matches_incremental_updates(db):
+    _seed(db)
+    profiles = _profiles()
+    reviews = ReviewService(db, emotion_profiles=profiles)
+    reviews.add_review(book_id="b1", user_id="u1", review_data=ReviewCreate(rating=3, comment="joyful"))
+    review = reviews.add_review(book_id="b2", user_id="u1", review_data=ReviewCreate(rating=5, comment="grim"))
+    reviews.update_review(review.review_id, "u1", ReviewUpdate(rating=2))
+    incremental = reviews.user_tastes.get_taste("u1")
+
+    tastes = UserTasteService(db, profiles)
+    tastes.write_tastes_bulk({"u2": {"happy": 1.0}})
+    db.commit()
+
+    assert tastes.rebuild_all(chunk_size=1) == 1
+    assert tastes.get_taste("u1") == pytest.approx(incremental)
+    assert tastes.get_taste("u2") == {}
+
+
+def _engine(db, reviews, scores):
+    return RecommendationEngine(
+        book_service=BookService(db),
+        review_service=reviews,
+        bookshelf_service=BookshelfService(db),
+        db=db,
+        emotion_extractor_instance=MagicMock(extract_emotions=MagicMock(return_value={"scores": scores})),
+        emotion_profiler_instance=MagicMock(),
+    )
+
+
+def test_similar_users_are_ranked_by_stored_taste(db):
+    _seed(db, users=("u1", "u2", "u3", "u4"))
+    reviews = ReviewService(db, emotion_profiles=_profiles())
+    reviews.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=5, comment="grim"))
+    reviews.add_review(book_id="b1", user_id="u3", review_data=ReviewCreate(rating=5, comment="joyful"))
+    reviews.add_review(book_id="b2", user_id="u4", review_data=ReviewCreate(rating=5, comment="joyful"))
+    engine = _engine(db, reviews, {"happy": 1.0})
+    engine.get_reviews_for_book = MagicMock(side_effect=AssertionError("review texts should not be compared"))
+
+    ratings = rating_index.get_matrix(db)
+    similar = engine._similar_users_by_taste(db, "u1", "b1", {"happy": 1.0}, ratings)
+
+    # Only readers of b1 are candidates
+    assert similar == ["u3", "u2"]
+
+
+def test_collaborative_falls_back_to_review_texts_without_tastes(db):
+    _seed(db)
+    reviews = ReviewService(db, emotion_profiles=_profiles())
+    reviews.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=5, comment="lovely"))
+    reviews.add_review(book_id="b2", user_id="u2", review_data=ReviewCreate(rating=5, comment="lovely"))
+    engine = _engine(db, reviews, {"happy": 1.0})
+
+    assert reviews.user_tastes.get_taste("u2") == {}
+    ratings = rating_index.get_matrix(db)
+    assert engine._similar_users_by_taste(db, "u1", "b1", {"happy": 1.0}, ratings) is None
+    assert [r["book"].book_id for r in engine.recommend_collaborative("u1", "b1", "happy")] == ["b2"]
+
+
+def test_taste_similarity_weighs_review_and_own_taste_equally(db):
+    _seed(db, users=("u1", "u2", "u3"), books=("b1", "b2", "b3"))
+    reviews = ReviewService(db, emotion_profiles=_profiles())
+    reviews.add_review(book_id="b2", user_id="u1", review_data=ReviewCreate(rating=5, comment="grim"))
+    reviews.add_review(book_id="b3", user_id="u1", review_data=ReviewCreate(rating=5, comment="joyful"))
+    reviews.add_review(book_id="b1", user_id="u2", review_data=ReviewCreate(rating=5, comment="grim"))
+    reviews.add_review(book_id="b1", user_id="u3", review_data=ReviewCreate(rating=5, comment="joyful"))
+    engine = _engine(db, reviews, {})
+    ratings = rating_index.get_matrix(db)
+
+    # u1's taste leans sad, so it alone prefers u2
+    assert engine._similar_users_by_taste(db, "u1", "b1", {}, ratings) == ["u2", "u3"]
+    # A happy review mostly made of emotions no taste has still counts in full
+    # (cosine 0.95 for u3) against the taste side (0.62 for u3, 0.78 for u2)
+    scores = {"happy": 1.0, "bored": 10.0}
+    assert engine._similar_users_by_taste(db, "u1", "b1", scores, ratings) == ["u3", "u2"]